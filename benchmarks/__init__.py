@@ -0,0 +1,9 @@
+"""
+Local benchmarks for the lambdas and the shared layer code
+"""
+
+import os
+import sys
+
+# Make the common dependencies layer importable the same way Lambda exposes it
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'layers'))
@@ -0,0 +1,212 @@
+"""
+In-memory stand-ins for the SQS and DynamoDB calls the lambdas make
+"""
+
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeSQS:
+    """
+    SQS client keeping every queue in memory
+    """
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize the fake client
+
+        :param latency: delay added to every call in seconds
+        """
+        self.latency = latency
+        self.queues = {}
+        self.calls = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _enqueue(self, queue_url: str, body: str) -> str:
+        """
+        Append a message to a queue, the lock must be held
+        """
+        message_id = f"msg-{next(self._ids)}"
+        self.queues.setdefault(queue_url, []).append((message_id, body))
+        return message_id
+
+    def send_message(self, QueueUrl, MessageBody):  # pylint: disable=invalid-name
+        """
+        Enqueue one message
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            return {'MessageId': self._enqueue(QueueUrl, MessageBody)}
+
+    def send_message_batch(self, QueueUrl, Entries):  # pylint: disable=invalid-name
+        """
+        Enqueue up to ten messages
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            return {
+                'Successful': [
+                    {'Id': entry['Id'], 'MessageId': self._enqueue(QueueUrl, entry['MessageBody'])}
+                    for entry in Entries
+                ],
+                'Failed': [],
+            }
+
+    def drain(self, queue_url: str, batch_size: int = 10):
+        """
+        Remove every message of a queue as SQS event source batches
+
+        :param queue_url: URL of the queue
+        :param batch_size: records per event, 10 is the SQS event source default
+        :return: generator of Lambda events
+        """
+        with self._lock:
+            messages = self.queues.pop(queue_url, [])
+        for start in range(0, len(messages), batch_size):
+            yield sqs_event(messages[start:start + batch_size])
+
+
+def sqs_event(messages) -> dict:
+    """
+    Build the Lambda event SQS delivers for a batch of messages
+
+    :param messages: iterable of (message_id, body) tuples
+    :return: event dictionary
+    """
+    return {
+        'Records': [
+            {'messageId': message_id, 'body': body, 'eventSource': 'aws:sqs'}
+            for message_id, body in messages
+        ]
+    }
+
+
+class ClientError(Exception):
+    """
+    Stand-in for botocore's ClientError
+    """
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.response = {'Error': {'Message': message}}
+
+
+class ResourceNotFoundException(ClientError):
+    """
+    Stand-in for the DynamoDB ResourceNotFoundException
+    """
+
+
+class FakeBatchWriter:
+    """
+    Context manager collecting puts like boto3's batch_writer
+    """
+    def __init__(self, table, overwrite_by_pkeys=None):
+        self.table = table
+        self.overwrite_by_pkeys = overwrite_by_pkeys
+        self._items = []
+
+    def put_item(self, Item):  # pylint: disable=invalid-name
+        """
+        Buffer an item
+        """
+        self._items.append(Item)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            # batch_writer flushes 25 items per BatchWriteItem call
+            for start in range(0, len(self._items), 25):
+                self.table.dynamodb.call()
+                for item in self._items[start:start + 25]:
+                    self.table.items[tuple(item[name] for name in self.table.key_attributes)] = item
+
+
+class FakeTable:
+    """
+    DynamoDB Table resource backed by a dictionary
+    """
+    def __init__(self, dynamodb, name: str, key_attributes: tuple):
+        self.dynamodb = dynamodb
+        self.name = name
+        self.key_attributes = key_attributes
+        self.items = {}
+        self.meta = dynamodb.meta
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        """
+        Start a batch of puts
+        """
+        return FakeBatchWriter(self, overwrite_by_pkeys)
+
+
+class FakeDynamoDB:
+    """
+    DynamoDB service resource backed by in-memory tables
+    """
+    def __init__(self, latency: float = 0.0, key_attributes: tuple = ('id', 'startTimeEpoch')):
+        """
+        Initialize the fake resource
+
+        :param latency: delay added to every call in seconds
+        :param key_attributes: key attributes of every table
+        """
+        self.latency = latency
+        self.key_attributes = key_attributes
+        self.tables = {}
+        self.calls = 0
+        self.meta = SimpleNamespace(client=SimpleNamespace(exceptions=SimpleNamespace(
+            ClientError=ClientError,
+            ResourceNotFoundException=ResourceNotFoundException,
+        )))
+        self._lock = threading.Lock()
+
+    def call(self):
+        """
+        Account for one round trip
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+
+    def Table(self, name: str):  # pylint: disable=invalid-name
+        """
+        Get a table, creating it on first use
+        """
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = FakeTable(self, name, self.key_attributes)
+        return table
+
+    def batch_get_item(self, RequestItems):  # pylint: disable=invalid-name
+        """
+        Read items by key, applying the projection of each request
+        """
+        self.call()
+        responses = {}
+        for table_name, request in RequestItems.items():
+            if table_name not in self.tables:
+                raise ResourceNotFoundException(f"Requested resource not found: Table: {table_name} not found")
+
+            items = self.tables[table_name].items
+            names = request.get('ExpressionAttributeNames', {})
+            projection = None
+            if 'ProjectionExpression' in request:
+                projection = [names.get(name.strip(), name.strip()) for name in request['ProjectionExpression'].split(',')]
+
+            found = []
+            for key in request['Keys']:
+                item = items.get(tuple(key[name] for name in self.key_attributes))
+                if item is not None:
+                    found.append(item if projection is None else {name: item[name] for name in projection if name in item})
+            responses[table_name] = found
+
+        return {'Responses': responses, 'UnprocessedKeys': {}}
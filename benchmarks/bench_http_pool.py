@@ -0,0 +1,79 @@
+"""
+Benchmark per-request latency with and without keep-alive connection reuse
+
+Usage: python -m benchmarks.bench_http_pool [requests]
+"""
+
+import statistics
+import sys
+import time
+
+from common_dependencies_layer.http_pool import HTTPConnectionPool
+
+from .servers import LocalServer
+
+PAYLOAD = b'{"games": [], "updated_at": "09-28-2024 02:24:34"}'
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples
+
+    :param samples: samples
+    :param fraction: percentile between 0 and 1
+    :return: percentile value
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(pool_factory, url: str, count: int) -> list[float]:
+    """
+    Time ``count`` GET requests
+
+    :param pool_factory: callable returning the pool used for a request
+    :param url: target URL
+    :param count: number of requests
+    :return: per-request latencies in milliseconds
+    """
+    latencies = []
+    for _ in range(count):
+        pool = pool_factory()
+        start = time.perf_counter()
+        with pool.request("GET", url) as response:
+            response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    """
+    Print a latency summary line
+    """
+    print(f"{name:<12} mean={statistics.mean(latencies):7.3f}ms "
+          f"p50={percentile(latencies, 0.50):7.3f}ms p99={percentile(latencies, 0.99):7.3f}ms")
+
+
+def main(count: int = 200):
+    """
+    Run the benchmark against a local HTTPS stand-in
+    """
+    with LocalServer(payload=PAYLOAD, use_tls=True) as server:
+        url = f"{server.base_url}/casablanca/scoreboard/soccer-women/d1/2024/09/01/scoreboard.json"
+        context = server.client_ssl_context()
+
+        shared = HTTPConnectionPool(ssl_context=context)
+        pooled = run(lambda: shared, url, count)
+
+        # A fresh pool per request reproduces the old connection-per-invocation behaviour
+        fresh = run(lambda: HTTPConnectionPool(ssl_context=context), url, count)
+
+    print(f"{count} requests against {server.base_url}")
+    report("keep-alive", pooled)
+    report("no reuse", fresh)
+    print(f"connections opened with keep-alive: {shared.connections_created}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,174 @@
+"""
+Benchmark per-match CPU and memory of the Match record against per-record dictionaries
+
+Usage: python -m benchmarks.bench_match [games]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+from common_dependencies_layer.fingerprint import match_fingerprint
+from common_dependencies_layer.match import Match
+
+UPDATED_AT = 1727558443
+
+# The encoder Match.to_json matches the output of
+ENCODER = json.JSONEncoder(default=str)
+
+
+def synthetic_games(count: int) -> list[dict]:
+    """
+    Build synthetic scoreboard games
+
+    :param count: number of games
+    :return: list of game dictionaries
+    """
+    return [
+        {
+            "gameID": str(5000000 + i),
+            "startTimeEpoch": str(1725206400 + i),
+            "gameState": "final" if i % 3 else "live",
+            "away": {"score": i % 5, "names": {"full": f"Away University {i % 300}"}, "conferences": [{"conferenceName": "OVC"}]},
+            "home": {"score": i % 4, "names": {"full": f"Home University {i % 300}"}, "conferences": [{"conferenceName": "ASUN"}]},
+        }
+        for i in range(count)
+    ]
+
+
+def dict_from_feed(game: dict) -> dict:
+    """
+    Dictionary-per-record extraction, as the handlers used to do it
+    """
+    home = game.get('home')
+    away = game.get('away')
+    if home is None or away is None:
+        return None
+
+    home_names = home.get('names')
+    away_names = away.get('names')
+    if home_names is None or away_names is None:
+        return None
+
+    home_conference = away_conference = None
+
+    home_conferences = home.get('conferences')
+    if home_conferences is not None and isinstance(home_conferences, list) and len(home_conferences) > 0:
+        home_conference = home_conferences[0].get('conferenceName')
+
+    away_conferences = away.get('conferences')
+    if away_conferences is not None and isinstance(away_conferences, list) and len(away_conferences) > 0:
+        away_conference = away_conferences[0].get('conferenceName')
+
+    match = {
+        'id': int(game.get('gameID')),
+        'processTimeEpoch': int(time.time()),
+        'startTimeEpoch': int(game.get('startTimeEpoch')),
+        'matchState': game.get('gameState'),
+        'division': 'd1',
+        'gender': 'female',
+        'updatedAt': UPDATED_AT,
+        'awayTeam': away_names.get('full'),
+        'awayScore': away.get('score'),
+        'awayConference': away_conference,
+        'homeTeam': home_names.get('full'),
+        'homeScore': home.get('score'),
+        'homeConference': home_conference,
+    }
+    match['fingerprint'] = match_fingerprint(match)
+    return match
+
+
+def dict_from_message(body: dict, message_id: str) -> dict:
+    """
+    Dictionary rebuilt from a queue message, as process_ncaa_matches used to do it
+    """
+    match = {
+        'id': int(body['id']),
+        'messageId': message_id,
+        'processTimeEpoch': int(time.time()),
+        'startTimeEpoch': int(body['startTimeEpoch']),
+        'matchState': body['matchState'],
+        'division': body['division'],
+        'gender': body['gender'],
+        'updatedAt': int(body['updatedAt']),
+        'awayTeam': body['awayTeam'],
+        'awayScore': body['awayScore'],
+        'awayConference': body['awayConference'],
+        'homeTeam': body['homeTeam'],
+        'homeScore': body['homeScore'],
+        'homeConference': body['homeConference'],
+    }
+    match['fingerprint'] = body.get('fingerprint') or match_fingerprint(match)
+    return match
+
+
+def dict_pipeline(games: list[dict]) -> list:
+    """
+    feed -> queue -> process -> queue -> DynamoDB item using dictionaries
+    """
+    items = []
+    for game in games:
+        message = json.dumps(dict_from_feed(game))
+        processed = json.dumps(dict_from_message(json.loads(message), "message"))
+        items.append(json.loads(processed))
+    return items
+
+
+def match_pipeline(games: list[dict]) -> list:
+    """
+    feed -> queue -> process -> queue -> DynamoDB item using Match
+    """
+    items = []
+    now = int(time.time())
+    for game in games:
+        message = Match.from_feed(game, 'female', 'd1', UPDATED_AT, now).to_json()
+        processed = Match.from_message(json.loads(message), "message", now).to_json()
+        items.append(Match.from_message(json.loads(processed)).to_dynamo_item())
+    return items
+
+
+def measure_cpu(name: str, function, games: list[dict], repeat: int = 3):
+    """
+    Print the CPU time per match of a pipeline, the best of several rounds to keep noise out
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.process_time()
+        function(games)
+        rounds.append(time.process_time() - start)
+    elapsed = min(rounds)
+    print(f"{name:<16} {elapsed:7.3f}s cpu  {elapsed / len(games) * 1e6:7.2f}us/match (best of {repeat})")
+
+
+def measure_memory(name: str, build, games: list[dict]):
+    """
+    Print the memory retained by the extracted records
+    """
+    tracemalloc.start()
+    records = [build(game) for game in games]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<16} {current / 1024 / 1024:7.2f}MiB for {len(records)} records  {current / len(records):7.1f}B/match")
+
+
+def main(count: int = 100000):
+    """
+    Run the benchmark on synthetic games
+    """
+    games = synthetic_games(count)
+    print(f"{count} synthetic games")
+    measure_cpu("dict extract", lambda items: [dict_from_feed(game) for game in items], games)
+    measure_cpu("Match extract", lambda items: [Match.from_feed(game, 'female', 'd1', UPDATED_AT) for game in items], games)
+    measure_cpu("dict pipeline", dict_pipeline, games)
+    measure_cpu("Match pipeline", match_pipeline, games)
+    matches = [Match.from_feed(game, 'female', 'd1', UPDATED_AT, UPDATED_AT) for game in games]
+    measure_cpu("to_dict encode", lambda items: [ENCODER.encode(match.to_dict()) for match in items], matches)
+    measure_cpu("Match to_json", lambda items: [match.to_json() for match in items], matches)
+    measure_memory("dict records", dict_from_feed, games)
+    measure_memory("Match records", lambda game: Match.from_feed(game, 'female', 'd1', UPDATED_AT), games)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,193 @@
+"""
+Benchmark the fetch, process and ingest lambdas end to end against local stand-ins
+
+A fake data.ncaa.com serves synthetic scoreboards, and SQS and DynamoDB are replaced by
+in-memory fakes. Every scoreboard is fetched by the FetchNCAAMatches handler, its matches
+are queued for ProcessNCAAMatches, and whatever that publishes is stored by
+IngestNCAAMatches. Later rounds fetch the same scoreboards again, which exercises the
+unchanged-match paths.
+
+Usage: python -m benchmarks.bench_pipeline [--games N] [--days N] [--latency S] ...
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import resource
+import sys
+import time
+from unittest import mock
+
+from common_dependencies_layer.sqs_batch import SQSBatchPublisher
+from lambdas.fetch_ncaa_matches import handler as fetch_handler
+from lambdas.ingest_ncaa_matches import handler as ingest_handler
+from lambdas.process_ncaa_matches import handler as process_handler
+
+from .aws import FakeDynamoDB, FakeSQS
+from .bench_http_pool import percentile
+from .servers import ScoreboardServer
+
+PROCESS_QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/000000000000/NCAA-Match-Process-Queue'
+NCAA_BASE_URL = 'https://data.ncaa.com'
+START_DATE = datetime.date(2024, 9, 1)
+
+
+class Stage:
+    """
+    Latencies and record counts of one handler
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+        self.records = 0
+
+    def invoke(self, function, event, records: int):
+        """
+        Invoke a handler and record its latency
+
+        :param function: lambda handler
+        :param event: Lambda event
+        :param records: number of matches the event carries
+        :return: handler response
+        """
+        start = time.perf_counter()
+        response = function(event, None)
+        self.latencies.append((time.perf_counter() - start) * 1000)
+        self.records += records
+        return response
+
+    def report(self):
+        """
+        Print a summary line
+        """
+        if not self.latencies:
+            print(f"{self.name:<8} no invocations")
+            return
+
+        elapsed = sum(self.latencies) / 1000
+        rate = self.records / elapsed if elapsed else 0.0
+        print(f"{self.name:<8} {len(self.latencies):6d} invocations {self.records:8d} matches "
+              f"{rate:10.0f} matches/s p50={percentile(self.latencies, 0.50):8.3f}ms "
+              f"p99={percentile(self.latencies, 0.99):8.3f}ms")
+
+
+def fetch_events(days: int):
+    """
+    One FetchNCAAMatches event per date, gender and division
+
+    :param days: number of consecutive dates
+    :return: generator of events
+    """
+    for offset in range(days):
+        target_date = (START_DATE + datetime.timedelta(days=offset)).isoformat()
+        for gender in ('female', 'male'):
+            for division in ('d1', 'd2', 'd3'):
+                yield {'gender': gender, 'division': division, 'target_date': target_date}
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process
+
+    :return: megabytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_round(sqs: FakeSQS, days: int, stages: dict) -> int:
+    """
+    Run every scoreboard of the period through the three handlers
+
+    :param sqs: fake SQS client
+    :param days: number of dates
+    :param stages: Stage per handler name
+    :return: number of matches fetched
+    """
+    fetched = 0
+    publisher = SQSBatchPublisher(sqs, PROCESS_QUEUE_URL)
+
+    for event in fetch_events(days):
+        response = stages['fetch'].invoke(fetch_handler.lambda_handler, event, 0)
+        matches = json.loads(response['body']) if response['statusCode'] == 200 else []
+        stages['fetch'].records += len(matches)
+        fetched += len(matches)
+        publisher.publish([json.dumps(match) for match in matches])
+
+    for event in sqs.drain(PROCESS_QUEUE_URL):
+        stages['process'].invoke(process_handler.lambda_handler, event, len(event['Records']))
+
+    # New and changed matches both end up stored in full
+    for queue_url in (process_handler.INGESTION_QUEUE_URL, process_handler.UPDATE_QUEUE_URL):
+        for event in sqs.drain(queue_url):
+            stages['ingest'].invoke(ingest_handler.lambda_handler, event, len(event['Records']))
+
+    return fetched
+
+
+def parse_args(argv):
+    """
+    Parse the command line
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--games', type=int, default=100, help="games on every scoreboard")
+    parser.add_argument('--days', type=int, default=7, help="number of dates, six scoreboards each")
+    parser.add_argument('--rounds', type=int, default=2, help="times every scoreboard is fetched")
+    parser.add_argument('--latency', type=float, default=0.0, help="scoreboard server latency in seconds")
+    parser.add_argument('--aws-latency', type=float, default=0.0, help="SQS and DynamoDB latency in seconds")
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help="share of scoreboard requests answered with 404")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="share of scoreboard requests answered with 429")
+    parser.add_argument('--verbose', action='store_true', help="show the output of the handlers")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the pipeline benchmark
+    """
+    args = parse_args(argv)
+    sqs = FakeSQS(latency=args.aws_latency)
+    dynamodb = FakeDynamoDB(latency=args.aws_latency)
+    table = dynamodb.Table(process_handler.TABLE_NAME)
+
+    server = ScoreboardServer(games=args.games, latency=args.latency,
+                              not_found_rate=args.not_found_rate, throttle_rate=args.throttle_rate)
+
+    with server, contextlib.ExitStack() as stack:
+        original_generate_url = fetch_handler.generate_url
+
+        def local_url(gender, division, target_date):
+            return original_generate_url(gender, division, target_date).replace(NCAA_BASE_URL, server.base_url)
+
+        stack.enter_context(mock.patch.object(fetch_handler, 'generate_url', local_url))
+        stack.enter_context(mock.patch.object(process_handler, 'get_client', lambda name: sqs))
+        stack.enter_context(mock.patch.object(process_handler, 'get_resource', lambda name: dynamodb))
+        stack.enter_context(mock.patch.object(ingest_handler, 'get_table', dynamodb.Table))
+        if not args.verbose:
+            stack.enter_context(contextlib.redirect_stdout(open(os.devnull, 'w', encoding='utf-8')))
+
+        rounds = []
+        for _ in range(args.rounds):
+            stages = {name: Stage(name) for name in ('fetch', 'process', 'ingest')}
+            start = time.perf_counter()
+            fetched = run_round(sqs, args.days, stages)
+            rounds.append((stages, fetched, time.perf_counter() - start))
+
+    print(f"{args.days * 6} scoreboards of {args.games} games, latency {args.latency * 1000:.1f}ms, "
+          f"404 rate {args.not_found_rate:.0%}, 429 rate {args.throttle_rate:.0%}")
+    for number, (stages, fetched, elapsed) in enumerate(rounds, start=1):
+        print(f"round {number}: {fetched} matches in {elapsed:.3f}s, {fetched / elapsed:.0f} matches/s end to end")
+        for stage in stages.values():
+            stage.report()
+
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(server.statuses.items()))
+    print(f"scoreboard responses: {statuses}")
+    print(f"SQS calls: {sqs.calls}, DynamoDB calls: {dynamodb.calls}, items stored: {len(table.items)}")
+    print(f"peak RSS: {peak_rss_mb():.1f} MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
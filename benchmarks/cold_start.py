@@ -0,0 +1,151 @@
+"""
+Time the cold start of one lambda: importing its handler and its first invocation
+
+Meant to run in a fresh interpreter. The handler is imported before anything else so
+its import time is not flattered by modules the stand-ins load. data.ncaa.com is then
+replaced by a local server, and the first invocation builds real boto3 clients from
+dummy credentials; botocore stubs answer their calls, so boto3 is imported and its
+clients are created during the timed invocation but nothing leaves the machine.
+
+Usage: python -m benchmarks.cold_start <lambda name>
+"""
+
+import importlib
+import os
+import sys
+import time
+
+# Events of the lambdas that call nothing outside the function
+PLAIN_EVENTS = {
+    'format_dates': {'State': {'EnteredTime': '2024-09-02T06:00:00.000Z'}},
+    'hello': {},
+}
+
+# Offline configuration of the boto3 clients; the stubs answer before anything is signed or sent
+AWS_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_EC2_METADATA_DISABLED': 'true',
+}
+
+MATCHES = 10
+
+
+def match_body(match_id: int) -> str:
+    """
+    Body of a queued match
+
+    :param match_id: match id
+    :return: JSON string
+    """
+    return (
+        f'{{"id": {match_id}, "startTimeEpoch": 1725206400, "updatedAt": 1727558443, "matchState": "final", '
+        '"gender": "female", "division": "d1", "homeTeam": "Home", "homeScore": 1, "homeConference": "ASUN", '
+        '"awayTeam": "Away", "awayScore": 0, "awayConference": "OVC"}'
+    )
+
+
+def stubbed(factory, responses: dict):
+    """
+    Wrap a client or resource factory so the real boto3 objects it creates answer with canned responses
+
+    :param factory: get_client or get_resource
+    :param responses: list of (operation name, response) tuples by service name
+    :return: factory
+    """
+    stubbed_clients = set()
+
+    def create(service_name):
+        created = factory(service_name)
+        # A resource is stubbed through its client
+        client = getattr(created.meta, 'client', created)
+        if id(client) not in stubbed_clients:
+            from botocore.stub import Stubber  # pylint: disable=import-outside-toplevel
+            stubber = Stubber(client)
+            for operation, response in responses.get(service_name, ()):
+                stubber.add_response(operation, response)
+            stubber.activate()
+            stubbed_clients.add(id(client))
+        return created
+
+    return create
+
+
+def first_invocation(name: str, handler, stack) -> dict:
+    """
+    Point a handler at the local stand-ins and build its event
+
+    :param name: lambda name
+    :param handler: handler module
+    :param stack: ExitStack the patches and the server are entered on
+    :return: Lambda event
+    """
+    if name in PLAIN_EVENTS:
+        return PLAIN_EVENTS[name]
+
+    # pylint: disable=import-outside-toplevel
+    from unittest import mock
+
+    from common_dependencies_layer import aws_clients
+
+    from .aws import sqs_event
+    from .servers import ScoreboardServer
+
+    records = sqs_event((f"m{match_id}", match_body(match_id)) for match_id in range(MATCHES))
+
+    if name == 'fetch_ncaa_matches':
+        server = stack.enter_context(ScoreboardServer(games=100))
+        stack.enter_context(mock.patch.object(
+            handler, 'generate_url', lambda gender, division, target_date: f"{server.base_url}/{gender}/{division}/{target_date}"))
+        return {'gender': 'female', 'division': 'd1', 'target_date': '2024-09-01'}
+    if name == 'process_ncaa_matches':
+        # Every match is new, so all of them are read and sent to the ingestion queue in one batch
+        sent = {
+            'Successful': [{'Id': str(index), 'MessageId': f"msg-{index}", 'MD5OfMessageBody': '0' * 32}
+                           for index in range(MATCHES)],
+            'Failed': [],
+        }
+        stack.enter_context(mock.patch.object(
+            handler, 'get_client', stubbed(aws_clients.get_client, {'sqs': [('send_message_batch', sent)]})))
+        stack.enter_context(mock.patch.object(handler, 'get_resource', stubbed(aws_clients.get_resource, {
+            'dynamodb': [('batch_get_item', {'Responses': {handler.TABLE_NAME: []}, 'UnprocessedKeys': {}})],
+        })))
+        return records
+    if name == 'ingest_ncaa_matches':
+        # get_table builds the table from the module's get_resource
+        stack.enter_context(mock.patch.object(aws_clients, 'get_resource', stubbed(aws_clients.get_resource, {
+            'dynamodb': [('batch_write_item', {'UnprocessedItems': {}})],
+        })))
+        return records
+    raise ValueError(f"No stand-ins for the {name} lambda")
+
+
+def main(argv=None):
+    """
+    Print the import and first invocation times of a lambda in milliseconds
+    """
+    name = (argv or sys.argv[1:])[0]
+    for variable, value in AWS_ENVIRONMENT.items():
+        os.environ.setdefault(variable, value)
+
+    start = time.perf_counter()
+    handler = importlib.import_module(f"lambdas.{name}.handler")
+    import_ms = (time.perf_counter() - start) * 1000
+
+    import contextlib  # pylint: disable=import-outside-toplevel
+
+    with contextlib.ExitStack() as stack:
+        event = first_invocation(name, handler, stack)
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            response = handler.lambda_handler(event, {})
+            invocation_ms = (time.perf_counter() - start) * 1000
+
+    if response.get('statusCode', 200) != 200:
+        raise SystemExit(f"{name}: first invocation failed: {response}")
+    print(f"{import_ms:.3f} {invocation_ms:.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
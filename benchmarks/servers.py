@@ -0,0 +1,269 @@
+"""
+Local HTTP(S) stand-ins used by the benchmarks
+"""
+
+import json
+import os
+import random
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCOREBOARD_UPDATED_AT = "09-28-2024 02:24:34"
+
+
+def generate_self_signed_cert(directory: str):
+    """
+    Generate a throwaway self-signed certificate for localhost using openssl
+
+    :param directory: directory the key and certificate are written to
+    :return: tuple of certificate and key file paths
+    """
+    cert_file = os.path.join(directory, 'cert.pem')
+    key_file = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+            '-keyout', key_file, '-out', cert_file, '-days', '1', '-subj', '/CN=localhost',
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert_file, key_file
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive handler that answers every GET with the server's payload
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve the payload
+        """
+        body = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence the per-request access log
+        """
+
+
+def synthetic_scoreboard(path: str, games: int) -> bytes:
+    """
+    Build a scoreboard document shaped like the data.ncaa.com feed
+
+    Game ids are derived from the path, so every date, gender and division has its own matches.
+
+    :param path: request path
+    :param games: number of games
+    :return: JSON encoded scoreboard
+    """
+    base_id = zlib.crc32(path.encode()) % 1000000 * 1000
+    return json.dumps({
+        "inputMD5Sum": f"{base_id:032x}",
+        "updated_at": SCOREBOARD_UPDATED_AT,
+        "games": [
+            {
+                "game": {
+                    "gameID": str(base_id + i),
+                    "startTimeEpoch": str(1725206400 + i * 60),
+                    "gameState": "final" if i % 3 else "live",
+                    "away": {
+                        "score": str(i % 5),
+                        "names": {"full": f"Away University {i % 300}"},
+                        "conferences": [{"conferenceName": "OVC", "conferenceSeo": "ovc"}],
+                    },
+                    "home": {
+                        "score": str(i % 4),
+                        "names": {"full": f"Home University {i % 300}"},
+                        "conferences": [{"conferenceName": "ASUN", "conferenceSeo": "asun"}],
+                    },
+                }
+            }
+            for i in range(games)
+        ],
+    }).encode()
+
+
+class ScoreboardHandler(BaseHTTPRequestHandler):
+    """
+    Keep-alive handler that serves a synthetic scoreboard for any path
+
+    The server configures the number of games, a per-request latency and the share of
+    requests answered with 404 or 429.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve the scoreboard or an injected error
+        """
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        roll = server.random.random()
+        if roll < server.not_found_rate:
+            self._send_error(404)
+            return
+        if roll < server.not_found_rate + server.throttle_rate:
+            self._send_error(429, {'Retry-After': '1'})
+            return
+
+        body = server.payloads.get(self.path)
+        if body is None:
+            body = server.payloads[self.path] = synthetic_scoreboard(self.path, server.games)
+
+        server.count(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, headers: dict = None):
+        """
+        Send an empty error response, keeping the connection open
+        """
+        self.server.count(status)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence the per-request access log
+        """
+
+
+class LocalServer:
+    """
+    Context manager running an HTTP or HTTPS server on a background thread
+    """
+    def __init__(self, handler_class=StaticHandler, payload: bytes = b'{}', use_tls: bool = False):
+        """
+        Initialize the local server
+
+        :param handler_class: request handler class
+        :param payload: body served by StaticHandler
+        :param use_tls: serve HTTPS with a self-signed certificate
+        """
+        self.handler_class = handler_class
+        self.payload = payload
+        self.use_tls = use_tls
+        self.server = None
+        self.thread = None
+        self._cert_dir = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        Base URL of the running server
+
+        :return: URL
+        """
+        scheme = 'https' if self.use_tls else 'http'
+        host, port = self.server.server_address[:2]
+        return f"{scheme}://{host}:{port}"
+
+    def client_ssl_context(self) -> ssl.SSLContext:
+        """
+        SSL context that trusts the self-signed certificate
+
+        :return: SSL context
+        """
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+
+    def configure(self, server):
+        """
+        Hook for subclasses to set attributes on the server before it starts
+
+        :param server: HTTP server
+        """
+        server.payload = self.payload
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler_class)
+        self.server.daemon_threads = True
+        self.configure(self.server)
+
+        if self.use_tls:
+            self._cert_dir = tempfile.TemporaryDirectory()
+            cert_file, key_file = generate_self_signed_cert(self._cert_dir.name)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert_file, key_file)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._cert_dir is not None:
+            self._cert_dir.cleanup()
+
+
+class ScoreboardServer(LocalServer):
+    """
+    Fake data.ncaa.com serving synthetic scoreboards with configurable latency and errors
+    """
+    def __init__(self, games: int = 100, latency: float = 0.0, not_found_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 0, use_tls: bool = False):
+        """
+        Initialize the scoreboard server
+
+        :param games: number of games on every scoreboard
+        :param latency: delay before every response in seconds
+        :param not_found_rate: share of requests answered with 404
+        :param throttle_rate: share of requests answered with 429
+        :param seed: seed of the error injection
+        :param use_tls: serve HTTPS with a self-signed certificate
+        """
+        super().__init__(ScoreboardHandler, use_tls=use_tls)
+        self.games = games
+        self.latency = latency
+        self.not_found_rate = not_found_rate
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, status: int):
+        """
+        Record the status of a response
+
+        :param status: HTTP status
+        """
+        with self._lock:
+            self.statuses[status] += 1
+
+    def configure(self, server):
+        server.games = self.games
+        server.latency = self.latency
+        server.not_found_rate = self.not_found_rate
+        server.throttle_rate = self.throttle_rate
+        server.random = random.Random(self.seed)
+        server.payloads = {}
+        server.count = self.count
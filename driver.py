@@ -1,15 +1,37 @@
+"""
+Fetch the NCAA soccer matches of a date range and send them to SQS
+"""
+
+import os
+import sys
 import json
+import argparse
+import asyncio
 import time
 import datetime
-
-import boto3
-import requests
+import http.client
 
 from urllib.parse import urlparse
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
-sqs = boto3.client('sqs')
+# The shared modules live in the common dependencies layer, which Lambda mounts on its path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layers'))
+
+from common_dependencies_layer import (  # pylint: disable=wrong-import-position
+    ArchivePool,
+    AsyncFetchEngine,
+    FeedArchive,
+    FetchPlanner,
+    FetchTarget,
+    RecordingReader,
+    ScoreboardCache,
+    ScoreboardStream,
+    SQSBatchPublisher,
+    Match,
+    get_client,
+    get_pool,
+)
+from common_dependencies_layer.scoreboard_cache import DEFAULT_CACHE_DIRECTORY  # pylint: disable=wrong-import-position
+
 QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/194227249447/NCAA-Match-Data-Queue'
 
 # SQS Queue Information
@@ -50,12 +72,20 @@ class URLIterator:
 
         :return: URL
         """
+        return self.next_target().url
+
+    def next_target(self) -> FetchTarget:
+        """
+        Return the next URL along with the gender, division and date it was generated for
+
+        :return: FetchTarget
+        """
         if self.current_date > self.end_date:
             raise StopIteration
 
         gender = self.genders[self.gender_index]
         division = self.divisions[self.division_index]
-        url = generate_url(gender, division, self.current_date)
+        target = FetchTarget(generate_url(gender, division, self.current_date), gender, division, self.current_date)
 
         # Update indices for the next iteration
         self.division_index += 1
@@ -67,7 +97,19 @@ class URLIterator:
                 self.current_date += datetime.timedelta(days=1)
 
         self.counter += 1
-        return url
+        return target
+
+    def targets(self):
+        """
+        Iterate over the remaining targets
+
+        :return: generator of FetchTarget
+        """
+        while True:
+            try:
+                yield self.next_target()
+            except StopIteration:
+                return
 
     def get_current_gender(self):
         """
@@ -147,51 +189,9 @@ def extract_match_data(game: dict, active_gender: str, active_division: str, upd
     :param active_gender: Gender
     :param active_division: Division
     :param updated_at: Updated at
-    :return: important match data
+    :return: important match data as a Match, or None
     """
-    home = game.get('home')
-    away = game.get('away')
-
-    if home is None or away is None:
-        return None
-
-    home_names = home.get('names')
-    away_names = away.get('names')
-
-    if home_names is None or away_names is None:
-        return None
-
-    home_full = home_names.get('full')
-    away_full = away_names.get('full')
-
-    home_score = home.get('score')
-    away_score = away.get('score')
-
-    home_conference = away_conference = None
-
-    home_conferences = home.get('conferences')
-    if home_conferences is not None and isinstance(home_conferences, list) and len(home_conferences) > 0:
-        home_conference = home_conferences[0].get('conferenceName')
-
-    away_conferences = away.get('conferences')
-    if away_conferences is not None and isinstance(away_conferences, list) and len(away_conferences) > 0:
-        away_conference = away_conferences[0].get('conferenceName')
-
-    return {
-        'id': int(game.get('gameID')),
-        'processTimeEpoch': int(time.time()),
-        'startTimeEpoch': int(game.get('startTimeEpoch')),
-        'matchState': game.get('gameState'),
-        'division': active_division,
-        'gender': active_gender,
-        'updatedAt': updated_at,
-        'awayTeam': away_full,
-        'awayScore': away_score,
-        'awayConference': away_conference,
-        'homeTeam': home_full,
-        'homeScore': home_score,
-        'homeConference': home_conference,
-    }
+    return Match.from_feed(game, active_gender, active_division, updated_at)
 
 
 def extract_date_from_url(url: str) -> str:
@@ -215,119 +215,482 @@ def extract_date_from_url(url: str) -> str:
     # Return the date as a human-readable string
     return date_obj.strftime("%B %d, %Y")
 
-def fetch_matches(target_url: str, target_gender: str, target_division: str):
-    """
-    Fetch the matches from the specified URL
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 1
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
 
-    :param target_url: URL to fetch the matches
-    :param target_gender: Gender
-    :param target_division: Division
-    :return: List of matches
-    """
-    session = requests.Session()
-    retry = Retry(
-        total=5,
-        backoff_factor=1,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=frozenset(['HEAD', 'GET', 'OPTIONS'])
-    )
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
 
-    response = None
-    for attempt in range(retry.total):
-        response = None
+def fetch_scoreboard(target_url: str, handle_response, cache: ScoreboardCache = None, on_not_found=None, pool=None):
+    """
+    Fetch a scoreboard from the specified URL over the shared connection pool
+
+    Throttling and server errors are retried with exponential backoff. A successful
+    response is handed to ``handle_response`` while the connection is still open, so
+    the body can be parsed as it arrives. When a cache is given the request is
+    conditional and a 304 returns None.
+
+    :param target_url: URL to fetch the scoreboard
+    :param handle_response: callable taking the open 200 response
+    :param cache: optional ScoreboardCache
+    :param on_not_found: optional callable run when there is no scoreboard (404)
+    :param pool: connection pool, defaults to the shared one
+    :return: result of handle_response or None if there is no (new) data
+    """
+    pool = pool or get_pool()
+    headers = cache.request_headers(target_url) if cache is not None else None
+    for attempt in range(RETRY_TOTAL):
+        delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
         try:
-            response = session.get(target_url, timeout=10)
-            response.raise_for_status()
-            break
-        except requests.exceptions.RequestException as e:
+            with pool.request("GET", target_url, headers=headers) as response:
+                if response.status == 200:
+                    return handle_response(response)
+                response.read()
+        except (OSError, http.client.HTTPException) as e:
             error_type = type(e).__name__
-            if response is not None and response.status_code == 429:
-                print(f"Throttling detected. Retrying after delay...")
-                time.sleep(2 ** retry.total)
-            elif response is not None and response.status_code == 404:
-                print(f"No data found for {extract_date_from_url(target_url)}")
-                return []
-            elif response is not None:
-                print(f"Failed to fetch data from {target_url}: {e} (Error: {error_type})")
-                print(f"\tThe status code is {response.status_code}")
-                return []
-            else:
-                print(f"Failed to fetch data from {target_url}: {e} (Error: {error_type})")
-                return []
+            print(f"Failed to fetch data from {target_url}: {e} (Error: {error_type})")
+            time.sleep(delay)
+            continue
 
-    if response is None:
-        print(f"Failed to fetch data from {target_url}")
-        return []
+        if response.status == 304 and cache is not None:
+            cache.not_modified()
+            return None
 
-    data = response.json()
-    games = data.get('games', [])
-    if len(games) == 0:
-        return []
+        if response.status == 404:
+            print(f"No data found for {extract_date_from_url(target_url)}")
+            if on_not_found is not None:
+                on_not_found()
+            return None
+
+        if response.status == 429:
+            print("Throttling detected. Retrying after delay...")
+            time.sleep(delay)
+            continue
+
+        print(f"Failed to fetch data from {target_url}: {response.status} {response.reason}")
+        if response.status not in RETRY_STATUSES:
+            return None
+        time.sleep(delay)
+
+    print(f"Failed to fetch data from {target_url}")
+    return None
 
-    updated_at = data.get('updated_at')
 
-    # Here updated_at is a string in the format of "09-28-2024 02:24:34"
-    # We need to convert it to a Unix timestamp
-    updated_at = int(time.mktime(time.strptime(updated_at, "%m-%d-%Y %H:%M:%S")))
+def iter_matches(games, updated_at: str, target_gender: str, target_division: str):
+    """
+    Extract the matches from scoreboard game entries one at a time
 
-    fetched_matches = []
+    :param games: iterable of scoreboard game entries
+    :param updated_at: updated_at value of the scoreboard
+    :param target_gender: Gender
+    :param target_division: Division
+    :return: generator of matches
+    """
+    updated_at_epoch = None
     for item in games:
         game = item.get('game')
         if game is None:
             continue
 
-        match_data = extract_match_data(game, target_gender, target_division, updated_at)
+        if updated_at_epoch is None:
+            # Here updated_at is a string in the format of "09-28-2024 02:24:34"
+            # We need to convert it to a Unix timestamp
+            updated_at_epoch = int(time.mktime(time.strptime(updated_at, "%m-%d-%Y %H:%M:%S")))
+
+        match_data = extract_match_data(game, target_gender, target_division, updated_at_epoch)
         if match_data:
-            fetched_matches.append(match_data)
+            yield match_data
+
+
+def read_scoreboard(response, target_url: str, target_gender: str, target_division: str,
+                    cache: ScoreboardCache = None, archive: FeedArchive = None, target_date: datetime.date = None):
+    """
+    Parse the matches off an open scoreboard response one game at a time
 
+    With an archive the raw feed is recorded while it is parsed and archived once it
+    has been read to the end, whether or not the cache shows it has changed.
+
+    :param response: open 200 response
+    :param target_url: URL the response was fetched from
+    :param target_gender: Gender
+    :param target_division: Division
+    :param cache: optional ScoreboardCache
+    :param archive: optional FeedArchive
+    :param target_date: date of the scoreboard, recorded in the archive
+    :return: List of matches, or None when the cache shows the scoreboard has not changed
+    """
+    reader = RecordingReader(response) if archive is not None else response
+    stream = ScoreboardStream(reader)
+    updated_at = stream.read_updated_at()
+
+    fetched_matches = None
+    if cache is None or cache.changed(target_url, updated_at):
+        fetched_matches = list(iter_matches(stream.games(), updated_at, target_gender, target_division))
+
+    stream.drain()
+    # Only a scoreboard read to the end is cached, so a retry after a broken response parses it again
+    if cache is not None:
+        cache.save(target_url, response.getheader('ETag'), response.getheader('Last-Modified'), updated_at)
+    if archive is not None:
+        archive.put(target_url, reader.getvalue(), target_gender, target_division, target_date, updated_at)
     return fetched_matches
 
 
-def send_match_to_sqs(queue_url: str, match: dict):
+def fetch_target(target: FetchTarget, cache: ScoreboardCache = None, planner: FetchPlanner = None,
+                 archive: FeedArchive = None, pool=None):
+    """
+    Fetch the matches of a target, telling the planner whether its scoreboard had games
+
+    :param target: FetchTarget
+    :param cache: optional ScoreboardCache
+    :param planner: optional FetchPlanner
+    :param archive: optional FeedArchive the raw feed is archived in
+    :param pool: connection pool, defaults to the shared one
+    :return: List of matches
     """
-    Send a match to the SQS queue
+    def handle_response(response):
+        fetched_matches = read_scoreboard(response, target.url, target.gender, target.division, cache,
+                                          archive, target.target_date)
+        if fetched_matches is not None and planner is not None:
+            planner.record(target, len(fetched_matches))
+        return fetched_matches
 
-    :param match: Match dictionary
+    on_not_found = (lambda: planner.record(target, 0)) if planner is not None else None
+    return fetch_scoreboard(target.url, handle_response, cache, on_not_found, pool) or []
+
+
+async def fetch_all_matches(targets, max_concurrency: int = 4, requests_per_second: float = None,
+                            cache: ScoreboardCache = None, planner: FetchPlanner = None,
+                            archive: FeedArchive = None, pool=None):
+    """
+    Fetch the matches for every target concurrently, yielding them as they arrive
+
+    With a planner, targets it knows to be empty or out of season are not fetched
+    and the others are recorded on it.
+
+    :param targets: iterable of FetchTarget
+    :param max_concurrency: maximum number of requests in flight
+    :param requests_per_second: per-host rate limit, None for unlimited
+    :param cache: optional ScoreboardCache
+    :param planner: optional FetchPlanner
+    :param archive: optional FeedArchive the raw feeds are archived in
+    :param pool: connection pool, defaults to the shared one
+    :return: async iterator of matches
     """
-    # print(f"Todo: Send match to SQS {match}")
-    sqs.send_message(
-        QueueUrl=queue_url,
-        MessageBody=json.dumps(match)
+    if planner is not None:
+        targets = planner.plan(targets)
+
+    engine = AsyncFetchEngine(
+        lambda target: fetch_target(target, cache, planner, archive, pool),
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
     )
 
-def send_matches_to_sqs(queue_url: str, matches: list[dict]):
+    async for result in engine.fetch_all(targets):
+        if result.error is not None:
+            error_type = type(result.error).__name__
+            print(f"Failed to fetch data from {result.target.url}: {result.error} (Error: {error_type})")
+            continue
+
+        for match in result.value:
+            yield match
+
+
+async def collect_matches(targets, max_concurrency: int = 4, requests_per_second: float = None,
+                          cache: ScoreboardCache = None, planner: FetchPlanner = None,
+                          archive: FeedArchive = None, pool=None) -> list[Match]:
+    """
+    Fetch the matches for every target concurrently
+
+    :param targets: iterable of FetchTarget
+    :param max_concurrency: maximum number of requests in flight
+    :param requests_per_second: per-host rate limit, None for unlimited
+    :param cache: optional ScoreboardCache
+    :param planner: optional FetchPlanner
+    :param archive: optional FeedArchive the raw feeds are archived in
+    :param pool: connection pool, defaults to the shared one
+    :return: List of matches
     """
-    Send the matches to the SQS queue
+    return [
+        match async for match in fetch_all_matches(targets, max_concurrency, requests_per_second, cache, planner,
+                                                   archive, pool)
+    ]
+
+
+DEFAULT_CHECKPOINT_FILE = 'backfill_checkpoint.jsonl'
+
+
+class BackfillCheckpoint:
+    """
+    Scoreboard URLs a backfill has completed, with the ids of the messages sent for them
+
+    Every completed URL is appended to a JSON lines file and synced before the next one,
+    so a run that stops at any point resumes after the last URL it finished. Only the
+    completed URLs are kept in memory.
+    """
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_FILE):
+        """
+        Initialize the checkpoint, loading the URLs completed by earlier runs
+
+        :param path: checkpoint file
+        """
+        self.path = path
+        self.completed = set()
+        self.sent = 0
+
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line is cut short when a run is killed while writing it
+                    continue
+                self.completed.add(entry['url'])
+                self.sent += len(entry['message_ids'])
+
+    def is_completed(self, url: str) -> bool:
+        """
+        Whether an earlier run completed a URL
+
+        :param url: scoreboard URL
+        :return: bool
+        """
+        return url in self.completed
+
+    def record(self, url: str, message_ids):
+        """
+        Mark a URL completed
+
+        :param url: scoreboard URL
+        :param message_ids: ids of the messages sent for its matches
+        """
+        line = json.dumps({'url': url, 'message_ids': list(message_ids)}, separators=(',', ':'))
+        with open(self.path, 'a+', encoding='utf-8') as file:
+            # Start on a new line when the previous run was killed mid-line
+            if file.tell() > 0:
+                file.seek(file.tell() - 1)
+                if file.read(1) != '\n':
+                    line = '\n' + line
+            file.write(line + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+        self.completed.add(url)
+        self.sent += len(message_ids)
+
+
+class PendingScoreboardCache(ScoreboardCache):
+    """
+    ScoreboardCache that holds back its entries until the matches they cover were sent
+
+    Writing an entry as soon as its scoreboard is read would make a run that fails to
+    send see the scoreboard as unchanged next time, and its matches would never be sent.
+    """
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY):
+        """
+        Initialize the cache
+
+        :param directory: directory the cache entries are stored in
+        """
+        super().__init__(directory)
+        self.pending = []
+
+    def save(self, url: str, etag: str, last_modified: str, updated_at: str):
+        """
+        Hold back the entry of a scoreboard that was read completely until commit()
+
+        :param url: scoreboard URL
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :param updated_at: updated_at value reported by the feed
+        """
+        with self._lock:
+            self.pending.append((url, etag, last_modified, updated_at))
+
+    def commit(self):
+        """
+        Store the entries held back so far
+        """
+        with self._lock:
+            pending, self.pending = self.pending, []
+        for entry in pending:
+            super().save(*entry)
+
+
+async def backfill(targets, queue_url: str, checkpoint: BackfillCheckpoint, total: int = None,
+                   max_concurrency: int = 4, requests_per_second: float = None, cache: ScoreboardCache = None,
+                   planner: FetchPlanner = None, progress_every: int = 25, archive: FeedArchive = None,
+                   pool=None) -> dict:
+    """
+    Fetch and send the matches of every target that the checkpoint has not completed
+
+    The matches of each URL are sent as soon as it is fetched and the URL is then
+    checkpointed, so memory holds one scoreboard per fetch in flight instead of the
+    whole season. A URL that fails to fetch or send is not checkpointed and is
+    retried by the next run.
+
+    :param targets: iterable of FetchTarget
+    :param queue_url: SQS queue the matches are sent to
+    :param checkpoint: BackfillCheckpoint
+    :param total: number of targets, used for the progress lines
+    :param max_concurrency: maximum number of requests in flight
+    :param requests_per_second: per-host rate limit, None for unlimited
+    :param cache: optional ScoreboardCache
+    :param planner: optional FetchPlanner
+    :param progress_every: print progress after this many URLs
+    :param archive: optional FeedArchive the raw feeds are archived in
+    :param pool: connection pool, defaults to the shared one
+    :return: dictionary of counters
+    """
+    counters = {'resumed': 0, 'completed': 0, 'failed': 0, 'matches': 0, 'sent': 0}
+
+    def pending_targets():
+        for target in targets:
+            if checkpoint.is_completed(target.url):
+                counters['resumed'] += 1
+            else:
+                yield target
+
+    publisher = SQSBatchPublisher(get_client('sqs'), queue_url)
+    engine = AsyncFetchEngine(
+        lambda target: fetch_target(target, cache, planner, archive, pool),
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
+    )
+    pending = pending_targets()
+    if planner is not None:
+        pending = planner.plan(pending)
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    async for result in engine.fetch_all(pending):
+        if result.error is not None:
+            error_type = type(result.error).__name__
+            print(f"Failed to fetch data from {result.target.url}: {result.error} (Error: {error_type})")
+            counters['failed'] += 1
+            continue
+
+        matches = sorted(result.value, key=lambda x: (x.gender, x.matchState != 'final', x.startTimeEpoch))
+        published = await loop.run_in_executor(None, publisher.publish, [match.to_json() for match in matches])
+        counters['matches'] += len(matches)
+        counters['sent'] += published.sent
+
+        if published.failed:
+            for failure in published.failed:
+                print(f"Failed to send message: {failure['code']} {failure['message']}")
+            counters['failed'] += 1
+        else:
+            checkpoint.record(result.target.url, published.message_ids)
+            counters['completed'] += 1
+
+        handled = counters['completed'] + counters['failed']
+        if progress_every and handled % progress_every == 0:
+            elapsed = time.perf_counter() - start
+            done = counters['resumed'] + handled
+            print(f"Progress: {done}/{total or '?'} URLs ({counters['resumed']} from the checkpoint), "
+                  f"{counters['sent']} messages, {handled / elapsed:.1f} URLs/sec, "
+                  f"{counters['sent'] / elapsed:.1f} messages/sec")
+
+    return counters
+
+
+def send_matches_to_sqs(queue_url: str, matches: list[Match]):
+    """
+    Send the matches to the SQS queue in batches
 
     :param matches: List of matches
+    :return: PublishResult
     """
-    for current_match in matches:
-        send_match_to_sqs(queue_url, current_match)
+    publisher = SQSBatchPublisher(get_client('sqs'), queue_url)
+    result = publisher.publish(current_match.to_json() for current_match in matches)
 
+    print(f"Sent {result.sent} messages in {result.batches} batches "
+          f"({result.throughput:.1f} messages/sec)")
+    for failure in result.failed:
+        print(f"Failed to send message: {failure['code']} {failure['message']}")
 
-if __name__ == "__main__":
-    genders = ['male', 'female']
-    divisions = ['d1', 'd2']
-    end_date = datetime.date.today()
-    start_date = end_date - datetime.timedelta(days=4) # 3 Days before the end date
+    return result
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line
 
-    url_iterator = URLIterator(genders, divisions, start_date, end_date)
+    :param argv: arguments, defaults to sys.argv
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Fetch NCAA soccer matches and send them to SQS")
+    parser.add_argument('--backfill', action='store_true',
+                        help="Send each URL's matches as it is fetched and checkpoint it, resuming earlier runs")
+    parser.add_argument('--start-date', type=datetime.date.fromisoformat,
+                        help="First date to fetch (default: four days before the end date)")
+    parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="Last date to fetch (default: today)")
+    parser.add_argument('--genders', nargs='+', default=['male', 'female'])
+    parser.add_argument('--divisions', nargs='+', default=['d1', 'd2'])
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT_FILE, help="Checkpoint file of the backfill")
+    parser.add_argument('--progress-every', type=int, default=25, help="Print backfill progress after this many URLs")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--archive', metavar='DIRECTORY', help="Archive the raw scoreboard feeds in this directory")
+    source.add_argument('--from-archive', metavar='DIRECTORY',
+                        help="Replay the feeds archived in this directory instead of fetching them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Fetch the matches of a date range and send them to SQS
 
-    all_matches = []
-    for url in url_iterator:
-        current_gender = url_iterator.get_current_gender()
-        current_division = url_iterator.get_current_division()
-        all_matches.extend(fetch_matches(url, current_gender, current_division))
+    :param argv: arguments, defaults to sys.argv
+    """
+    args = parse_args(argv)
+    start_date = args.start_date or args.end_date - datetime.timedelta(days=4) # 3 Days before the end date
+
+    url_iterator = URLIterator(args.genders, args.divisions, start_date, args.end_date)
+    # A replay must not skip the targets the planner learned about from the live feed
+    fetch_planner = FetchPlanner() if args.from_archive is None else None
+    archive = FeedArchive(args.archive) if args.archive else None
+    pool = ArchivePool(FeedArchive(args.from_archive)) if args.from_archive else None
+
+    if args.backfill:
+        total = len(args.genders) * len(args.divisions) * ((args.end_date - start_date).days + 1)
+        checkpoint = BackfillCheckpoint(args.checkpoint)
+        # No scoreboard cache: after a crash between fetching and sending a URL, the cache
+        # would report it unchanged and its matches would never be sent
+        counters = asyncio.run(backfill(url_iterator.targets(), QUEUE_URL, checkpoint, total=total,
+                                        max_concurrency=4, requests_per_second=5,
+                                        planner=fetch_planner, progress_every=args.progress_every,
+                                        archive=archive, pool=pool))
+        print(f"Backfill: {counters}")
+        print(f"Checkpoint: {len(checkpoint.completed)} URLs completed, {checkpoint.sent} messages sent")
+    else:
+        # Archived feeds carry no validators, and a replay should return every match again
+        scoreboard_cache = PendingScoreboardCache() if pool is None else None
+        all_matches = asyncio.run(collect_matches(url_iterator.targets(), max_concurrency=4, requests_per_second=5,
+                                                  cache=scoreboard_cache, planner=fetch_planner,
+                                                  archive=archive, pool=pool))
 
-    # Sort the matches first by gender, then by state putting final matches first, then by startTimeEpoch
-    all_matches.sort(key=lambda x: (x['gender'], x['matchState'] != 'final', x['startTimeEpoch']))
+        # Sort the matches first by gender, then by state putting final matches first, then by startTimeEpoch
+        all_matches.sort(key=lambda x: (x.gender, x.matchState != 'final', x.startTimeEpoch))
 
-    send_matches_to_sqs(QUEUE_URL, all_matches)
+        result = send_matches_to_sqs(QUEUE_URL, all_matches)
+
+        print(f"Total Matches: {len(all_matches)}")
+        if scoreboard_cache is not None:
+            # Only once every match was sent, so the scoreboards of a failed run are fetched again
+            if not result.failed:
+                scoreboard_cache.commit()
+            print(f"Scoreboard Cache: {scoreboard_cache.stats()}")
 
-    print(f"Total Matches: {len(all_matches)}")
     print(f"Total URLs Processed: {url_iterator.get_counter()}")
+    if fetch_planner is not None:
+        fetch_planner.save()
+        print(f"Fetch Planner: {fetch_planner.stats()}")
+    if archive is not None:
+        print(f"Feed Archive: {archive.stats()}")
     print("Done!")
 
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,29 @@
 """
-Lambda function to fetch NCAA matches for a given date
+Lambda function to fetch NCAA matches for a given date, or for several targets at once
 """
 
 import json
 import datetime
 import time
 import http.client
-from urllib.parse import urlparse
+from typing import NamedTuple
+
+from common_dependencies_layer.fetch_target import FetchResult, FetchTarget
+from common_dependencies_layer.http_pool import get_pool
+from common_dependencies_layer.logger import get_logger
+from common_dependencies_layer.match import Match
+from common_dependencies_layer.metrics import get_metrics, instrument
+from common_dependencies_layer.scoreboard_cache import ScoreboardCache
+from common_dependencies_layer.scoreboard_stream import ScoreboardStream
+
+LOGGER = get_logger('fetch_ncaa_matches')
+
+# Matches the idle connections the shared pool keeps per host, so every fetch reuses one
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+
+# Keeps one invocation well inside the Lambda timeout and the response size limit
+MAX_TARGETS = 64
 
 
 def generate_url(gender: str, division: str, target_date: datetime.date) -> str:
@@ -36,145 +53,433 @@ def generate_url(gender: str, division: str, target_date: datetime.date) -> str:
     formatted_date = target_date.strftime("%Y/%m/%d")
     return f"{base_url}-{gender_string}/{division}/{formatted_date}/scoreboard.json"
 
-def fetch_matches(target_url: str):
+class FetchOptions(NamedTuple):
+    """
+    How the scoreboards of an invocation are fetched
     """
-    Fetch the matches from the specified URL using http.client
+    # Makes the requests conditional and skips the scoreboards that did not change
+    cache: ScoreboardCache = None
+    # FeedArchive the raw feeds are archived in
+    archive: object = None
+    # Connection pool, the shared one when None; an ArchivePool serves archived feeds instead
+    pool: object = None
+
+def fetch_matches(target: FetchTarget, options: FetchOptions = FetchOptions()):
+    """
+    Fetch the matches of a target over a pooled keep-alive connection
+
+    When a cache is given the request is conditional, and an unchanged scoreboard
+    short-circuits to an empty list. With an archive the raw feed is archived; with an
+    ArchivePool as the pool archived feeds are served instead of fetching them.
 
-    :param target_url: URL to fetch the matches
+    :param target: FetchTarget, its gender and division are recorded on the matches
+    :param options: FetchOptions
     :return: List of matches
     """
-    parsed_url = urlparse(target_url)
-    conn = http.client.HTTPSConnection(parsed_url.netloc)
-    conn.request("GET", parsed_url.path)
-    response = conn.getresponse()
+    return request_matches(target, options)[2]
 
-    if response.status != 200:
-        print(f"Failed to fetch data from {target_url}: {response.status} {response.reason}")
-        return []
+def request_matches(target: FetchTarget, options: FetchOptions = FetchOptions()):
+    """
+    Fetch the matches of a target, keeping the status of the response
 
-    data = json.loads(response.read().decode())
-    games = data.get('games', [])
-    if len(games) == 0:
-        return []
+    :param target: FetchTarget, its gender and division are recorded on the matches
+    :param options: FetchOptions
+    :return: tuple of the HTTP status, its reason and the list of matches
+    """
+    cache = options.cache
+    headers = cache.request_headers(target.url) if cache is not None else None
+    with (options.pool or get_pool()).request("GET", target.url, headers=headers) as response:
+        if response.status == 304 and cache is not None:
+            cache.not_modified()
+            get_metrics().count('notModified')
+            return response.status, response.reason, []
+
+        if response.status != 200:
+            response.read()
+            get_metrics().count('fetchErrors')
+            LOGGER.warning("Failed to fetch data from %s: %s %s", target.url, response.status, response.reason)
+            return response.status, response.reason, []
+
+        if options.archive is None:
+            return response.status, response.reason, list(iter_matches(ScoreboardStream(response), response, target, cache))
+
+        # The archive is only imported by the events that use it
+        from common_dependencies_layer.feed_archive import RecordingReader  # pylint: disable=import-outside-toplevel
+        reader = RecordingReader(response)
+        stream = ScoreboardStream(reader)
+        matches = list(iter_matches(stream, response, target, cache))
+        with get_metrics().phase('archiveTime'):
+            options.archive.put(target.url, reader.getvalue(), target.gender, target.division, target.target_date,
+                                stream.updated_at)
+        return response.status, response.reason, matches
+
+def iter_matches(stream: ScoreboardStream, response, target: FetchTarget, cache: ScoreboardCache = None):
+    """
+    Parse the matches off a scoreboard response one game at a time
+
+    :param stream: ScoreboardStream over the response
+    :param response: scoreboard response, its validators are cached
+    :param target: FetchTarget the response was fetched for, its URL is the cache key
+    :param cache: optional ScoreboardCache
+    :return: generator of matches
+    """
+    updated_at = stream.read_updated_at()
 
-    updated_at = data.get('updated_at')
-    updated_at = int(time.mktime(time.strptime(updated_at, "%m-%d-%Y %H:%M:%S")))
+    if cache is not None and not cache.changed(target.url, updated_at):
+        stream.drain()
+        cache.save(target.url, response.getheader('ETag'), response.getheader('Last-Modified'), updated_at)
+        return
 
-    fetched_matches = []
-    for item in games:
+    updated_at_epoch = None
+    games_seen = games_skipped = 0
+    for item in stream.games():
         game = item.get('game')
         if game is None:
             continue
 
-        match_data = extract_match_data(game, updated_at)
+        games_seen += 1
+        if updated_at_epoch is None:
+            updated_at_epoch = int(time.mktime(time.strptime(updated_at, "%m-%d-%Y %H:%M:%S")))
+
+        match_data = extract_match_data(game, updated_at_epoch, target.gender, target.division)
         if match_data:
-            fetched_matches.append(match_data)
+            yield match_data
+        else:
+            games_skipped += 1
 
-    return fetched_matches
+    stream.drain()
+    # Only a scoreboard read to the end is cached, so a broken response is parsed again next time
+    if cache is not None:
+        cache.save(target.url, response.getheader('ETag'), response.getheader('Last-Modified'), updated_at)
 
-def extract_match_data(game: dict, updated_at: int):
+    metrics = get_metrics()
+    metrics.count('gamesSeen', games_seen)
+    metrics.count('gamesSkipped', games_skipped)
+
+def extract_match_data(game: dict, updated_at: int, gender: str = None, division: str = None):
     """
     Extract the game data
 
     :param game: Game data
     :param updated_at: Updated at
-    :return: important match data
+    :param gender: Gender
+    :param division: Division
+    :return: important match data as a Match, or None
     """
-    home = game.get('home')
-    away = game.get('away')
+    return Match.from_feed(game, gender, division, updated_at)
 
-    if home is None or away is None:
-        return None
+def parse_date(value: str) -> datetime.date:
+    """
+    Parse a date in the YYYY-MM-DD format of the events
 
-    home_names = home.get('names')
-    away_names = away.get('names')
+    :param value: date string
+    :return: date
+    """
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
 
-    if home_names is None or away_names is None:
-        return None
+def is_multi_target(event: dict) -> bool:
+    """
+    Whether an event asks for several targets instead of a single gender, division and date
 
-    home_full = home_names.get('full')
-    away_full = away_names.get('full')
+    :param event: Lambda event
+    :return: bool
+    """
+    return 'targets' in event or 'genders' in event
+
+def parse_targets(event: dict) -> list:
+    """
+    Build the targets of a multi-target event
+
+    The event either lists its targets, each with a gender, division and either a
+    target_date or a day_offset (days before the event's reference_date), or gives
+    genders, divisions and either dates or a start_date and end_date (inclusive) and
+    asks for every combination, in the order driver.URLIterator visits them.
+
+    :param event: Lambda event
+    :return: list of FetchTarget
+    :raises KeyError: when a required key is missing
+    :raises ValueError: when a value is invalid or there are too many targets
+    """
+    if 'targets' in event:
+        reference_date = parse_date(event['reference_date']) if 'reference_date' in event else None
+        combinations = []
+        for target in event['targets']:
+            if 'target_date' in target or reference_date is None:
+                target_date = parse_date(target['target_date'])
+            else:
+                target_date = reference_date - datetime.timedelta(days=int(target['day_offset']))
+            combinations.append((target['gender'], target['division'], target_date))
+    else:
+        if 'dates' in event:
+            dates = [parse_date(value) for value in event['dates']]
+        else:
+            start_date = parse_date(event['start_date'])
+            end_date = parse_date(event['end_date'])
+            if end_date < start_date:
+                raise ValueError(f"End date {end_date} is before start date {start_date}")
+            if (end_date - start_date).days >= MAX_TARGETS:
+                raise ValueError(f"Too many targets: at most {MAX_TARGETS} are fetched per invocation")
+            dates = [start_date + datetime.timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+        combinations = [(gender, division, target_date)
+                        for target_date in dates for gender in event['genders'] for division in event['divisions']]
+
+    if not combinations:
+        raise ValueError("No targets specified")
+    if len(combinations) > MAX_TARGETS:
+        raise ValueError(f"Too many targets: {len(combinations)} requested, at most {MAX_TARGETS} are fetched per invocation")
+
+    return [FetchTarget(generate_url(gender, division, target_date), gender, division, target_date)
+            for gender, division, target_date in combinations]
+
+async def fetch_targets(targets: list, options: FetchOptions = FetchOptions(),
+                        max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+    """
+    Fetch several targets concurrently over the shared connection pool
 
-    home_score = home.get('score')
-    away_score = away.get('score')
+    :param targets: list of FetchTarget
+    :param options: FetchOptions every target is fetched with
+    :param max_concurrency: maximum number of requests in flight
+    :return: list of FetchResult in the order of the targets
+    """
+    # asyncio and the engine are only imported by the multi-target events
+    from common_dependencies_layer.fetch_engine import AsyncFetchEngine  # pylint: disable=import-outside-toplevel
+    engine = AsyncFetchEngine(lambda target: request_matches(target, options), max_concurrency=max_concurrency)
+    results = {result.target: result async for result in engine.fetch_all(targets)}
+    return [results[target] for target in targets]
 
-    home_conference = away_conference = None
+def target_result(result) -> dict:
+    """
+    Summary of the fetch of one target
 
-    home_conferences = home.get('conferences')
-    if home_conferences and isinstance(home_conferences, list) and home_conferences:
-        home_conference = home_conferences[0].get('conferenceName')
+    :param result: FetchResult whose value is the tuple returned by request_matches
+    :return: dictionary with the target, its status, the number of matches and the error, if any
+    """
+    summary = {
+        'gender': result.target.gender,
+        'division': result.target.division,
+        'target_date': result.target.target_date.isoformat(),
+    }
+    if result.error is not None:
+        summary['statusCode'] = 502
+        summary['matches'] = 0
+        summary['error'] = f"{type(result.error).__name__}: {result.error}"
+        return summary
+
+    status, reason, matches = result.value
+    summary['statusCode'] = status
+    summary['matches'] = len(matches)
+    if status == 204:
+        summary['skipped'] = reason
+    elif status not in (200, 304):
+        summary['error'] = f"{status} {reason}"
+    return summary
+
+def record_results(planner, results: list, cache: ScoreboardCache = None):
+    """
+    Tell the planner which fetched scoreboards had games
 
-    away_conferences = away.get('conferences')
-    if away_conferences and isinstance(away_conferences, list) and away_conferences:
-        away_conference = away_conferences[0].get('conferenceName')
+    With a cache an empty 200 may just be an unchanged scoreboard, so it is only
+    recorded as empty without one.
 
+    :param planner: FetchPlanner
+    :param results: list of FetchResult of request_matches
+    :param cache: ScoreboardCache used for the fetches, if any
+    """
+    for result in results:
+        if result.error is not None:
+            continue
+        status, _, matches = result.value
+        if status == 404 or (status == 200 and (matches or cache is None)):
+            planner.record(result.target, len(matches))
+
+def fetch_options(event: dict) -> FetchOptions:
+    """
+    Cache, archive and connection pool asked for by an event
+
+    With use_cache the requests are conditional. With archive the raw feeds are archived
+    while they are fetched; with from_archive they are served from the archive and
+    nothing is fetched.
+
+    :param event: Lambda event
+    :return: FetchOptions
+    """
+    cache = ScoreboardCache() if event.get('use_cache') else None
+    if not event.get('from_archive') and not event.get('archive'):
+        return FetchOptions(cache)
+
+    # The archive is only imported by the events that use it
+    from common_dependencies_layer.feed_archive import ArchivePool, FeedArchive  # pylint: disable=import-outside-toplevel
+    if event.get('from_archive'):
+        return FetchOptions(cache, pool=ArchivePool(FeedArchive()))
+    return FetchOptions(cache, archive=FeedArchive())
+
+def skip_targets(planner, targets: list) -> dict:
+    """
+    Results of the targets the planner knows not to be worth fetching
+
+    :param planner: FetchPlanner, or None to fetch every target
+    :param targets: list of FetchTarget
+    :return: dictionary of a 204 FetchResult by skipped FetchTarget
+    """
+    if planner is None:
+        return {}
+
+    skipped = {}
+    for target in targets:
+        reason = planner.skip_reason(target)
+        if reason is not None:
+            skipped[target] = FetchResult(target, (204, reason, []))
+    get_metrics().count('skippedTargets', len(skipped))
+    return skipped
+
+def matches_response(status_code: int, matches: list, options: FetchOptions) -> dict:
+    """
+    Response listing the fetched matches, with the counters of the cache and the archive
+
+    :param status_code: HTTP status of the response
+    :param matches: list of Match
+    :param options: FetchOptions the matches were fetched with
+    :return: Lambda response
+    """
+    get_metrics().count('matches', len(matches))
+    with get_metrics().phase('serializeTime'):
+        body = '[' + ', '.join(match.to_json() for match in matches) + ']'
+
+    response = {
+        'statusCode': status_code,
+        'body': body,
+    }
+    if options.cache is not None:
+        response['cache'] = options.cache.stats()
+    if options.archive is not None:
+        response['archive'] = options.archive.stats()
+    return response
+
+def handle_targets(event: dict):
+    """
+    Fetch every target of a multi-target event in this invocation
+
+    One failing target does not fail the others; the response lists the status of
+    every target and is 207 when any of them failed. With use_planner, targets the
+    FetchPlanner knows to be out of season or without games are skipped with a 204.
+
+    :param event: Lambda event
+    :return: Lambda response
+    """
+    # asyncio and the planner are only imported by the multi-target events
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+    from common_dependencies_layer.fetch_planner import FetchPlanner
+
+    metrics = get_metrics()
+    with metrics.phase('parseTime'):
+        targets = parse_targets(event)
+        max_concurrency = min(int(event.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)), MAX_CONCURRENCY)
+        planner = FetchPlanner() if event.get('use_planner') else None
+        options = fetch_options(event)
+    metrics.count('targets', len(targets))
+
+    skipped = skip_targets(planner, targets)
+    with metrics.phase('fetchTime'):
+        fetched = asyncio.run(fetch_targets([target for target in targets if target not in skipped], options,
+                                            max_concurrency))
+
+    if planner is not None:
+        record_results(planner, fetched, options.cache)
+        planner.save()
+
+    fetched = iter(fetched)
+    results = [skipped[target] if target in skipped else next(fetched) for target in targets]
+    summaries = [target_result(result) for result in results]
+    failed = sum(1 for summary in summaries if 'error' in summary)
+    matches = [match for result in results if result.error is None for match in result.value[2]]
+    metrics.count('failedTargets', failed)
+    LOGGER.info("Fetched %d targets", len(targets), matches=len(matches), failed=failed)
+
+    response = matches_response(207 if failed else 200, matches, options)
+    response['results'] = summaries
+    if planner is not None:
+        response['planner'] = {'skipped': len(skipped)}
+    return response
+
+def handle_target(event: dict):
+    """
+    Fetch the single gender, division and target_date of an event
+
+    :param event: Lambda event
+    :return: Lambda response
+    """
+    with get_metrics().phase('parseTime'):
+        target_date = datetime.datetime.strptime(event['target_date'], "%Y-%m-%d").date()
+        target = FetchTarget(generate_url(event['gender'], event['division'], target_date),
+                             event['gender'], event['division'], target_date)
+        options = fetch_options(event)
+
+    # The scoreboard is parsed while it is read, so extraction is part of the fetch phase
+    with get_metrics().phase('fetchTime'):
+        matches = fetch_matches(target, options)
+
+    return matches_response(200, matches, options)
+
+# Status code and message of the errors answered with an error response, a subclass before its base class
+ERROR_RESPONSES = (
+    (KeyError, 400, "Missing key in event"),
+    (json.JSONDecodeError, 502, "JSON decode error"),
+    (ValueError, 400, "Value error"),
+    (http.client.HTTPException, 502, "HTTP error"),
+    (TypeError, 500, "Type error"),
+)
+
+def error_response(error: Exception) -> dict:
+    """
+    Response reporting an error raised while handling an event
+
+    :param error: one of the ERROR_RESPONSES errors
+    :return: Lambda response
+    """
+    status_code, message = next((status_code, message) for error_type, status_code, message in ERROR_RESPONSES
+                                if isinstance(error, error_type))
     return {
-        'id': int(game.get('gameID')),
-        'processTimeEpoch': int(time.time()),
-        'startTimeEpoch': int(game.get('startTimeEpoch')),
-        'matchState': game.get('gameState'),
-        'updatedAt': updated_at,
-        'awayTeam': away_full,
-        'awayScore': away_score,
-        'awayConference': away_conference,
-        'homeTeam': home_full,
-        'homeScore': home_score,
-        'homeConference': home_conference,
+        'statusCode': status_code,
+        'body': json.dumps(f"{message}: {str(error)}")
     }
 
+@instrument('FetchNCAAMatches')
 def lambda_handler(event, context):
     """
     Lambda function to generate URL and fetch matches
 
+    The event names a single gender, division and target_date, or several targets
+    (see parse_targets) that are then fetched concurrently in this invocation.
+
     :param event: Lambda event
     :param context: Lambda context
     :return: List of matches
     """
-    print(f"Received event: {json.dumps(event)}")
-    print(f"Received context: {context}")
+    LOGGER.start_invocation(context)
+    LOGGER.debug("Received event", event=event)
 
     try:
-        gender = event['gender']
-        division = event['division']
-        target_date_str = event['target_date']
-        target_date = datetime.datetime.strptime(target_date_str, "%Y-%m-%d").date()
-
-        target_url = generate_url(gender, division, target_date)
-        matches = fetch_matches(target_url)
-
-        return {
-            'statusCode': 200,
-            'body': json.dumps(matches)
-        }
-    except KeyError as e:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Missing key in event: {str(e)}")
-        }
-    except json.JSONDecodeError as e:
-        return {
-            'statusCode': 502,
-            'body': json.dumps(f"JSON decode error: {str(e)}")
-        }
-    except ValueError as e:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Value error: {str(e)}")
-        }
-    except http.client.HTTPException as e:
-        return {
-            'statusCode': 502,
-            'body': json.dumps(f"HTTP error: {str(e)}")
-        }
-    except TypeError as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Type error: {str(e)}")
-        }
+        if is_multi_target(event):
+            return handle_targets(event)
+        return handle_target(event)
+    except (KeyError, ValueError, http.client.HTTPException, TypeError) as e:
+        return error_response(e)
 
 # Example event to use with this lambda
 example_event = {
     "gender": "male",
     "division": "d1",
-    "target_date": "2023-10-15"
+    "target_date": "2023-10-15",
+    "use_cache": True
+}
+
+# Example event fetching every combination of two days in one invocation
+example_multi_target_event = {
+    "genders": ["male", "female"],
+    "divisions": ["d1", "d2"],
+    "start_date": "2023-10-14",
+    "end_date": "2023-10-15",
+    "use_cache": True
 }
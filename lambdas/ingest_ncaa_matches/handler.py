@@ -1,37 +1,79 @@
+"""
+Lambda function to store the queued matches in DynamoDB
+"""
+
 import json
-import boto3
-from botocore.exceptions import ClientError
+from decimal import Decimal
+
+from common_dependencies_layer import Match, get_logger, get_metrics, get_table, instrument, keep_latest
 
-# Initialize the DynamoDB client
-dynamodb = boto3.resource('dynamodb')
+# The DynamoDB table is created on first use, see get_table
 table_name = 'ncaa_match_data'  # Replace with your DynamoDB table name
-table = dynamodb.Table(table_name)
 
+KEY_ATTRIBUTES = ['id', 'startTimeEpoch']
+
+LOGGER = get_logger('ingest_ncaa_matches')
+
+
+def parse_records(records):
+    """
+    Parse the match data of every SQS record, keeping the latest copy of each match.
+
+    :param records: SQS records
+    :return: tuple of the matches by key (with the message ids they cover) and the ids of unparseable messages
+    """
+    matches = {}
+    failures = []
+
+    for record in records:
+        message_id = record.get('messageId')
+        try:
+            # DynamoDB does not accept floats, so numbers are parsed as Decimal
+            match = Match.from_message(json.loads(record['body'], parse_float=Decimal))
+        except (KeyError, TypeError, ValueError) as e:
+            LOGGER.warning("Invalid record '%s': %s", message_id, e)
+            failures.append(message_id)
+            continue
+
+        keep_latest(matches, match, message_id)
+
+    return matches, failures
+
+
+@instrument('IngestNCAAMatches')
 def lambda_handler(event, context):
     """
-    Lambda function to read match data from the event and insert it into DynamoDB.
+    Lambda function to read match data from every record in the event and insert it into DynamoDB.
+
+    Records that cannot be stored are reported through batchItemFailures so that SQS
+    only redelivers those messages.
     """
+    LOGGER.start_invocation(context)
+    metrics = get_metrics()
+    records = event.get('Records', [])
+    with metrics.phase('parseTime'):
+        matches, failures = parse_records(records)
+    metrics.count('records', len(records))
+    metrics.count('invalid', len(failures))
+
+    table = get_table(table_name)
     try:
-        # Parse the match data from the event
-        match_data = json.loads(event['Records'][0]['body'])
-
-        # Insert the match data into DynamoDB
-        response = table.put_item(Item=match_data)
-        print(f"DynamoDB response: {response}")
-
-        return {
-            'statusCode': 200,
-            'body': json.dumps('Match data inserted successfully!')
-        }
-    except ClientError as e:
-        print(f"ClientError: {e.response['Error']['Message']}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error inserting data into DynamoDB: {e.response['Error']['Message']}")
-        }
+        # batch_writer sends 25 items per request and resends unprocessed items
+        with metrics.phase('dynamoWriteTime'), table.batch_writer(overwrite_by_pkeys=KEY_ATTRIBUTES) as batch:
+            for match, _ in matches.values():
+                batch.put_item(Item=match.to_dynamo_item())
+        metrics.count('written', len(matches))
+        LOGGER.info("Inserted %d matches from %d records", len(matches), len(records))
+    except table.meta.client.exceptions.ClientError as e:
+        LOGGER.error("ClientError: %s", e.response['Error']['Message'])
+        failures.extend(message_id for _, message_ids in matches.values() for message_id in message_ids)
     except Exception as e:
-        print(f"Exception: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"An error occurred: {str(e)}")
-        }
\ No newline at end of file
+        LOGGER.error("Exception: %s", e)
+        failures.extend(message_id for _, message_ids in matches.values() for message_id in message_ids)
+
+    metrics.count('failed', len(failures))
+    return {
+        'statusCode': 200 if not failures else 500,
+        'body': json.dumps(f"Inserted {len(records) - len(failures)} of {len(records)} records"),
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]
+    }
@@ -1,121 +1,197 @@
-import boto3
+"""
+Lambda function to route the queued matches to the update or ingestion queue
+"""
+
 import json
 import time
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('ncaa_match_data')
-sqs = boto3.client('sqs')
+from common_dependencies_layer import (
+    FINGERPRINT_ATTRIBUTE,
+    Match,
+    SQSBatchPublisher,
+    TTLCache,
+    batch_get_items,
+    get_client,
+    get_logger,
+    get_metrics,
+    get_resource,
+    instrument,
+    keep_latest,
+)
+
+TABLE_NAME = 'ncaa_match_data'
+
+LOGGER = get_logger('process_ncaa_matches')
 
 # Define the SQS queue URLs
 INGESTION_QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/194227249447/NCAA-Match-Injestion-Queue'
 UPDATE_QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/194227249447/NCAA-Match-Update-Queue'
 
-def has_match_changed(existing_match, new_match, keys_to_validate):
+# Last known fingerprint of each (id, startTimeEpoch), kept across warm invocations
+MATCH_STATE_CACHE = TTLCache(max_size=10000, ttl=300)
+
+def has_match_changed(existing_match, new_match):
     """
-    Compare all fields of the existing match and the new match.
+    Compare the fingerprints of the existing match and the new match.
+
+    Items stored before fingerprints existed have none and are always treated as changed,
+    which rewrites them with a fingerprint.
 
     :param existing_match: Dictionary representing the existing match
-    :param new_match: Dictionary representing the new match
-    :param keys_to_validate: List of keys to validate
-    :return: Boolean indicating if any field has changed
+    :param new_match: Match representing the new match
+    :return: Boolean indicating if any validated field has changed
     """
-    for key in keys_to_validate:
-        if key not in existing_match or existing_match[key] != new_match[key]:
-            return True
-    return False
-
-KEYS_TO_VALIDATE = [
-    'id',
-    'startTimeEpoch',
-    'matchState',
-    'division',
-    'gender',
-    'awayTeam',
-    'awayScore',
-    'awayConference',
-    'homeTeam',
-    'homeScore',
-    'homeConference'
-]
+    return existing_match.get(FINGERPRINT_ATTRIBUTE) != new_match.fingerprint
 
-def lambda_handler(event, context):
-    print("Context:", context)
+def publish_matches(queue_url, matches):
+    """
+    Send matches to a queue in batches, caching the fingerprint of every match that was sent
 
-    records = event.get('Records', [])
-    processed_count = 0
+    A match is only cached once it reached the queue, so a redelivery of a message
+    that could not be sent processes the match again.
+
+    :param queue_url: URL of the target queue
+    :param matches: list of (match, message ids) tuples
+    :return: list of the message ids of the matches that could not be sent
+    """
+    if not matches:
+        return []
+
+    by_body = {match.to_json(): (match, message_ids) for match, message_ids in matches}
+    result = SQSBatchPublisher(get_client('sqs'), queue_url).publish(by_body)
+    LOGGER.info("Sent %d messages to '%s' in %d batches", result.sent, queue_url, result.batches)
+
+    failed_bodies = set()
+    for failure in result.failed:
+        LOGGER.error("Failed to send message: %s %s", failure['code'], failure['message'])
+        failed_bodies.add(failure['body'])
+
+    failures = []
+    for body, (match, message_ids) in by_body.items():
+        if body in failed_bodies:
+            failures.extend(message_ids)
+        else:
+            MATCH_STATE_CACHE.set(match.key, match.fingerprint)
+    return failures
+
+def parse_match(message_id, body):
+    """
+    Build a match from the body of an SQS message
 
+    :param message_id: SQS message id
+    :param body: JSON encoded message body
+    :return: Match
+    """
+    return Match.from_message(json.loads(body), message_id, process_time=int(time.time()))
+
+def parse_records(records):
+    """
+    Parse the match of every SQS record, keeping only the most recent copy of each match
+
+    :param records: SQS records
+    :return: tuple of the matches by key (with the message ids they cover) and the number of records that could not be parsed
+    """
+    matches = {}
+    invalid_count = 0
     for record in records:
         message_id = record.get("messageId")
         body = record.get("body")
-        print(f"Processing message '{message_id}': {body}")
+        LOGGER.debug("Processing message '%s': %s", message_id, body)
 
         try:
-            # Process each SQS message
-            message_body = json.loads(body)
-
-            match = {
-                'id': int(message_body['id']),
-                'messageId': message_id,
-                'processTimeEpoch': int(time.time()),
-                'startTimeEpoch': int(message_body['startTimeEpoch']),
-                'matchState': message_body['matchState'],
-                'division': message_body['division'],
-                'gender': message_body['gender'],
-                'updatedAt': int(message_body['updatedAt']),
-                'awayTeam': message_body['awayTeam'],
-                'awayScore': message_body['awayScore'],
-                'awayConference': message_body['awayConference'],
-                'homeTeam': message_body['homeTeam'],
-                'homeScore': message_body['homeScore'],
-                'homeConference': message_body['homeConference'],
-            }
-
-            # Extract id and startTimeEpoch from the message body
-            match_id = match.get('id')
-            start_time_epoch = match.get('startTimeEpoch')
-
-            # Fetch the existing item from DynamoDB
-            try:
-                response = table.get_item(
-                    Key={
-                        'id': match_id,
-                        'startTimeEpoch': start_time_epoch
-                    }
-                )
-                existing_item = response.get('Item')
-            except table.meta.client.exceptions.ResourceNotFoundException:
-                existing_item = None
-
-            if existing_item:
-                # Process the existing item
-                print(f"Existing match found '{match_id}'")
-                if has_match_changed(existing_item, match, KEYS_TO_VALIDATE):
-                    print(f"Match has changed '{match_id}'")
-                    processed_count += 1
-
-                    # Send the match to the update queue
-                    sqs.send_message(
-                        QueueUrl=UPDATE_QUEUE_URL,
-                        MessageBody=json.dumps(match)
-                    )
-                else:
-                    print(f"Match has not changed '{match_id}'")
-            else:
-                # Handle the case where the item does not exist
-                print(f"New match found '{match_id}'")
-                sqs.send_message(
-                    QueueUrl=INGESTION_QUEUE_URL,
-                    MessageBody=json.dumps(match)
-                )
-
+            match = parse_match(message_id, body)
         except json.JSONDecodeError as e:
-            print(f"JSONDecodeError: {e}")
-            print(body)
+            LOGGER.warning("JSONDecodeError in message '%s': %s", message_id, e, body=body)
+            invalid_count += 1
+            continue
         except Exception as e:
-            print(f"Error processing record: {e}")
-            print(body)
+            LOGGER.warning("Error processing message '%s': %s", message_id, e, body=body)
+            invalid_count += 1
+            continue
+
+        keep_latest(matches, match, message_id)
+
+    return matches, invalid_count
+
+def classify_matches(matches):
+    """
+    Split the matches into changed, new and unchanged ones
+
+    A cached fingerprint equal to the new one means nothing changed; the other matches
+    are checked against the fingerprints stored in DynamoDB, read in batches. Only the
+    fingerprints DynamoDB confirmed unchanged are cached here, the others once they are
+    sent. A cache hit leaves the expiry alone, so every match is read from DynamoDB again
+    at least once per TTL.
+
+    :param matches: matches by key, with the message ids they cover
+    :return: tuple of the changed and the new (match, message ids) tuples and the number of matches answered from the cache
+    """
+    unchanged_keys = {key for key, (match, _) in matches.items() if MATCH_STATE_CACHE.get(key) == match.fingerprint}
+
+    lookup_keys = [key for key in matches if key not in unchanged_keys]
+    dynamodb = get_resource('dynamodb')
+    with get_metrics().phase('dynamoReadTime'):
+        try:
+            existing_items = batch_get_items(dynamodb, TABLE_NAME, lookup_keys, projection=[FINGERPRINT_ATTRIBUTE])
+        except dynamodb.meta.client.exceptions.ResourceNotFoundException:
+            existing_items = {}
+
+    changed_matches = []
+    new_matches = []
+    for key, (match, message_ids) in matches.items():
+        if key in unchanged_keys:
+            LOGGER.debug("Match has not changed '%s' (cached)", match.id)
+            continue
+
+        existing_item = existing_items.get(key)
+        if existing_item is None:
+            LOGGER.debug("New match found '%s'", match.id)
+            new_matches.append((match, message_ids))
+        elif has_match_changed(existing_item, match):
+            LOGGER.debug("Match has changed '%s'", match.id)
+            changed_matches.append((match, message_ids))
+        else:
+            LOGGER.debug("Match has not changed '%s'", match.id)
+            MATCH_STATE_CACHE.set(key, match.fingerprint)
+
+    return changed_matches, new_matches, len(unchanged_keys)
+
+@instrument('ProcessNCAAMatches')
+def lambda_handler(event, context):
+    """
+    Lambda function to route the matches of an SQS batch to the update or ingestion queue
+
+    Matches whose fingerprint differs from the stored one go to the update queue, matches
+    that are not stored yet to the ingestion queue and unchanged matches are dropped.
+    Messages whose match could not be sent are reported through batchItemFailures so
+    that SQS only redelivers those messages.
+    """
+    LOGGER.start_invocation(context)
+    metrics = get_metrics()
+    records = event.get('Records', [])
+
+    with metrics.phase('parseTime'):
+        matches, invalid_count = parse_records(records)
+
+    MATCH_STATE_CACHE.reset_stats()
+    changed_matches, new_matches, cached_count = classify_matches(matches)
+
+    with metrics.phase('sqsSendTime'):
+        failures = publish_matches(UPDATE_QUEUE_URL, changed_matches) + publish_matches(INGESTION_QUEUE_URL, new_matches)
+
+    metrics.count('records', len(records))
+    metrics.count('invalid', invalid_count)
+    metrics.count('duplicates', len(records) - invalid_count - len(matches))
+    metrics.count('cached', cached_count)
+    metrics.count('changed', len(changed_matches))
+    metrics.count('new', len(new_matches))
+    metrics.count('unchanged', len(matches) - len(changed_matches) - len(new_matches))
+    metrics.count('failed', len(failures))
+
+    LOGGER.info("Match state cache", **MATCH_STATE_CACHE.stats())
 
     return {
-        'statusCode': 200,
-        'body': json.dumps(f"Processed {processed_count} records")
+        'statusCode': 200 if not failures else 500,
+        'body': json.dumps(f"Processed {len(changed_matches)} records"),
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]
     }
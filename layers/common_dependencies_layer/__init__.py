@@ -0,0 +1,84 @@
+"""
+This module exports the code shared by the lambdas through the common dependencies layer
+
+The exports are resolved on first access so a handler only pays the import cost
+of the modules it actually uses. The static imports below are only seen by type
+checkers and linters.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .aws_clients import get_client, get_resource, get_table
+    from .dynamo_batch import UnprocessedKeysError, batch_get_items
+    from .feed_archive import ArchivePool, FeedArchive, RecordingReader
+    from .fetch_engine import AsyncFetchEngine, HostRateLimiter
+    from .fetch_planner import FetchPlanner, SeasonBounds
+    from .fetch_target import FetchResult, FetchTarget
+    from .fingerprint import FINGERPRINT_ATTRIBUTE, FINGERPRINT_FIELDS, match_fingerprint
+    from .http_pool import HTTPConnectionPool, get_pool
+    from .logger import JSONLogger, get_logger
+    from .match import Match, keep_latest
+    from .metrics import NULL_METRICS, Metrics, get_metrics, instrument
+    from .scoreboard_cache import ScoreboardCache
+    from .scoreboard_stream import ScoreboardStream
+    from .sqs_batch import PublishResult, SQSBatchPublisher
+    from .ttl_cache import TTLCache
+
+_EXPORTS = {
+    "FINGERPRINT_ATTRIBUTE": ".fingerprint",
+    "FINGERPRINT_FIELDS": ".fingerprint",
+    "ArchivePool": ".feed_archive",
+    "AsyncFetchEngine": ".fetch_engine",
+    "FeedArchive": ".feed_archive",
+    "FetchPlanner": ".fetch_planner",
+    "FetchResult": ".fetch_target",
+    "FetchTarget": ".fetch_target",
+    "HostRateLimiter": ".fetch_engine",
+    "HTTPConnectionPool": ".http_pool",
+    "JSONLogger": ".logger",
+    "Match": ".match",
+    "Metrics": ".metrics",
+    "NULL_METRICS": ".metrics",
+    "PublishResult": ".sqs_batch",
+    "RecordingReader": ".feed_archive",
+    "SQSBatchPublisher": ".sqs_batch",
+    "ScoreboardCache": ".scoreboard_cache",
+    "ScoreboardStream": ".scoreboard_stream",
+    "SeasonBounds": ".fetch_planner",
+    "TTLCache": ".ttl_cache",
+    "UnprocessedKeysError": ".dynamo_batch",
+    "batch_get_items": ".dynamo_batch",
+    "get_client": ".aws_clients",
+    "get_logger": ".logger",
+    "get_metrics": ".metrics",
+    "get_pool": ".http_pool",
+    "get_resource": ".aws_clients",
+    "get_table": ".aws_clients",
+    "instrument": ".metrics",
+    "keep_latest": ".match",
+    "match_fingerprint": ".fingerprint",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """
+    Import the module defining an export the first time it is accessed
+
+    :param name: exported name
+    :return: exported object
+    """
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
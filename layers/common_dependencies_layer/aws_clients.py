@@ -0,0 +1,71 @@
+"""
+Lazily created, memoized boto3 clients and resources
+
+Importing boto3 and building a resource are among the most expensive steps of a
+cold start, so handlers ask for clients when they first need them instead of at
+import time. Created objects are kept for the lifetime of the container.
+"""
+
+import threading
+
+_CLIENTS = {}
+_RESOURCES = {}
+_TABLES = {}
+_LOCK = threading.Lock()
+
+
+def get_client(service_name: str):
+    """
+    Get the boto3 client for a service, creating it on first use
+
+    :param service_name: AWS service name, e.g. 'sqs'
+    :return: boto3 client
+    """
+    client = _CLIENTS.get(service_name)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(service_name)
+            if client is None:
+                import boto3  # pylint: disable=import-outside-toplevel
+                client = _CLIENTS[service_name] = boto3.client(service_name)
+    return client
+
+
+def get_resource(service_name: str):
+    """
+    Get the boto3 service resource for a service, creating it on first use
+
+    :param service_name: AWS service name, e.g. 'dynamodb'
+    :return: boto3 service resource
+    """
+    resource = _RESOURCES.get(service_name)
+    if resource is None:
+        with _LOCK:
+            resource = _RESOURCES.get(service_name)
+            if resource is None:
+                import boto3  # pylint: disable=import-outside-toplevel
+                resource = _RESOURCES[service_name] = boto3.resource(service_name)
+    return resource
+
+
+def get_table(table_name: str):
+    """
+    Get a DynamoDB Table resource, creating it on first use
+
+    :param table_name: name of the table
+    :return: boto3 DynamoDB Table
+    """
+    table = _TABLES.get(table_name)
+    if table is None:
+        table = _TABLES[table_name] = get_resource('dynamodb').Table(table_name)
+    return table
+
+
+def reset_clients():
+    """
+    Forget every memoized client, resource and table
+    """
+    with _LOCK:
+        _CLIENTS.clear()
+        _RESOURCES.clear()
+        _TABLES.clear()
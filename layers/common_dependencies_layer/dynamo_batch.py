@@ -0,0 +1,75 @@
+"""
+Batched DynamoDB reads with BatchGetItem
+"""
+
+import time
+from typing import Iterable
+
+# BatchGetItem accepts at most 100 keys per call
+MAX_BATCH_GET_KEYS = 100
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_DELAY = 0.05
+
+KEY_ATTRIBUTES = ('id', 'startTimeEpoch')
+
+
+class UnprocessedKeysError(Exception):
+    """
+    Raised when DynamoDB keeps returning unprocessed keys after every retry
+    """
+    def __init__(self, keys: list):
+        super().__init__(f"{len(keys)} keys were left unprocessed")
+        self.keys = keys
+
+
+def batch_get_items(dynamodb, table_name: str, keys: Iterable[tuple], key_attributes: tuple = KEY_ATTRIBUTES,
+                    projection: Iterable[str] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                    retry_delay: float = DEFAULT_RETRY_DELAY) -> dict:
+    """
+    Fetch many items by primary key
+
+    Keys are requested 100 at a time and any UnprocessedKeys are requested again
+    with exponential backoff.
+
+    :param dynamodb: boto3 DynamoDB service resource
+    :param table_name: name of the table
+    :param keys: iterable of key tuples ordered like ``key_attributes``
+    :param key_attributes: names of the key attributes
+    :param projection: attributes to read besides the key, None for the whole item
+    :param max_retries: retries for unprocessed keys per chunk
+    :param retry_delay: base delay between retries in seconds
+    :return: dictionary mapping key tuples to items
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    items = {}
+
+    projection_arguments = {}
+    if projection is not None:
+        # Placeholders keep attribute names clear of DynamoDB reserved words
+        names = list(dict.fromkeys([*key_attributes, *projection]))
+        placeholders = {f"#a{index}": name for index, name in enumerate(names)}
+        projection_arguments = {
+            'ProjectionExpression': ', '.join(placeholders),
+            'ExpressionAttributeNames': placeholders,
+        }
+
+    for start in range(0, len(unique_keys), MAX_BATCH_GET_KEYS):
+        chunk = unique_keys[start:start + MAX_BATCH_GET_KEYS]
+        request = {'Keys': [dict(zip(key_attributes, key)) for key in chunk], **projection_arguments}
+
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                time.sleep(retry_delay * (2 ** (attempt - 1)))
+
+            response = dynamodb.batch_get_item(RequestItems={table_name: request})
+            for item in response.get('Responses', {}).get(table_name, []):
+                items[tuple(item[name] for name in key_attributes)] = item
+
+            request = response.get('UnprocessedKeys', {}).get(table_name)
+            if not request or not request.get('Keys'):
+                break
+        else:
+            raise UnprocessedKeysError(request['Keys'])
+
+    return items
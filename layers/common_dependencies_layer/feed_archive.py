@@ -0,0 +1,271 @@
+"""
+Compressed, content-addressed archive of raw scoreboard feeds, and a pool that serves them back
+"""
+
+import contextlib
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .scoreboard_stream import ScoreboardStream
+
+# /tmp is the only writable location in Lambda and survives between warm invocations
+DEFAULT_ARCHIVE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'feed_archive')
+
+INDEX_FILE = 'index.jsonl'
+COMPRESSION_LEVEL = 6
+
+
+class RecordingReader:
+    """
+    Wraps a response and keeps a copy of every byte read from it
+
+    Everything other than read() is passed through to the response, so it can stand in
+    for the response while the scoreboard is parsed as it arrives.
+    """
+    def __init__(self, fp):
+        """
+        Initialize the reader
+
+        :param fp: binary file-like response
+        """
+        self.fp = fp
+        self.chunks = []
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Read from the response, keeping a copy
+
+        :param size: maximum number of bytes, -1 for everything
+        :return: bytes
+        """
+        chunk = self.fp.read(size)
+        if chunk:
+            self.chunks.append(chunk)
+        return chunk
+
+    def getvalue(self) -> bytes:
+        """
+        Everything read so far
+
+        :return: bytes
+        """
+        return b''.join(self.chunks)
+
+    def __getattr__(self, name):
+        return getattr(self.fp, name)
+
+
+class FeedArchive:
+    """
+    Stores raw scoreboard feeds once per distinct content
+
+    Feeds are gzip-compressed under objects/<first two hex digits>/<sha256>.json.gz, so
+    a scoreboard fetched many times without changing is stored once. index.jsonl gets a
+    line whenever the feed of a URL changes, with the gender, division, date and
+    updated_at of the feed; the last line of a URL is its latest feed.
+    """
+    def __init__(self, directory: str = DEFAULT_ARCHIVE_DIRECTORY, clock=time.time):
+        """
+        Initialize the archive
+
+        :param directory: archive directory
+        :param clock: callable returning the current Unix time in seconds
+        """
+        self.directory = directory
+        self.clock = clock
+        self.stored = 0
+        self.deduplicated = 0
+        self._index = None
+        self._latest = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+    def _object_path(self, digest: str) -> str:
+        """
+        Path of the object holding a feed
+
+        :param digest: SHA-256 of the raw feed
+        :return: file path
+        """
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}.json.gz")
+
+    def _load_index(self) -> list:
+        """
+        Read the index once, skipping a line cut short by an interrupted write
+
+        :return: list of index entries in the order they were added
+        """
+        if self._index is None:
+            self._index = []
+            try:
+                with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        self._index.append(entry)
+                        self._latest[entry['url']] = entry
+            except OSError:
+                pass
+        return self._index
+
+    def put(self, url: str, body: bytes, gender: str = None, division: str = None,
+            target_date: datetime.date = None, updated_at: str = None) -> str:
+        """
+        Archive a raw feed
+
+        :param url: URL the feed was fetched from
+        :param body: raw feed
+        :param gender: Gender of the scoreboard
+        :param division: Division of the scoreboard
+        :param target_date: date of the scoreboard
+        :param updated_at: updated_at value reported by the feed, read off the feed when not given
+        :return: SHA-256 of the feed
+        """
+        if updated_at is None:
+            try:
+                updated_at = ScoreboardStream(io.BytesIO(body)).read_updated_at()
+            except ValueError:
+                pass
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.deduplicated += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written to a temporary file first so readers never see a partial object; mtime
+            # is fixed so the same feed always compresses to the same bytes
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file, gzip.GzipFile(fileobj=file, mode='wb', compresslevel=COMPRESSION_LEVEL, mtime=0) as compressed:
+                compressed.write(body)
+            os.replace(temp_path, path)
+            with self._lock:
+                self.stored += 1
+
+        with self._lock:
+            index = self._load_index()
+            latest = self._latest.get(url)
+            if latest is not None and latest['sha256'] == digest:
+                return digest
+
+            entry = {
+                'url': url,
+                'gender': gender,
+                'division': division,
+                'target_date': target_date.isoformat() if target_date is not None else None,
+                'updated_at': updated_at,
+                'sha256': digest,
+                'size': len(body),
+                'archived_at': int(self.clock()),
+            }
+            with open(os.path.join(self.directory, INDEX_FILE), 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            index.append(entry)
+            self._latest[url] = entry
+        return digest
+
+    def entries(self, gender: str = None, division: str = None, target_date: datetime.date = None) -> list:
+        """
+        Index entries matching a gender, division and date
+
+        :param gender: Gender, None for any
+        :param division: Division, None for any
+        :param target_date: date, None for any
+        :return: list of index entries in the order they were archived
+        """
+        day = target_date.isoformat() if target_date is not None else None
+        with self._lock:
+            index = list(self._load_index())
+        return [
+            entry for entry in index
+            if (gender is None or entry['gender'] == gender)
+            and (division is None or entry['division'] == division)
+            and (day is None or entry['target_date'] == day)
+        ]
+
+    def latest(self, url: str) -> dict:
+        """
+        Index entry of the latest feed archived for a URL
+
+        :param url: scoreboard URL
+        :return: index entry, or None when the URL was never archived
+        """
+        with self._lock:
+            self._load_index()
+            return self._latest.get(url)
+
+    def read(self, digest: str) -> bytes:
+        """
+        Raw feed stored under a hash
+
+        :param digest: SHA-256 of the feed
+        :return: bytes
+        """
+        with gzip.open(self._object_path(digest), 'rb') as file:
+            return file.read()
+
+    def stats(self) -> dict:
+        """
+        Stored and deduplicated counters
+
+        :return: dictionary of counters
+        """
+        return {'stored': self.stored, 'deduplicated': self.deduplicated}
+
+
+class ArchivedResponse(io.BytesIO):
+    """
+    Archived feed answering like an http.client.HTTPResponse
+    """
+    def __init__(self, body: bytes = b'', status: int = 200, reason: str = 'OK'):
+        super().__init__(body)
+        self.status = status
+        self.reason = reason
+
+    def getheader(self, name: str, default=None):  # pylint: disable=unused-argument
+        """
+        Archived feeds have no headers
+        """
+        return default
+
+
+class ArchivePool:
+    """
+    Stand-in for the HTTP connection pool that serves the latest archived feed of a URL
+
+    URLs that were never archived are answered with 404, so nothing touches the network.
+    """
+    def __init__(self, archive: FeedArchive):
+        """
+        Initialize the pool
+
+        :param archive: FeedArchive to serve
+        """
+        self.archive = archive
+
+    @contextlib.contextmanager
+    def request(self, method: str, url: str, headers: dict = None):  # pylint: disable=unused-argument
+        """
+        Answer a request from the archive
+
+        :param method: HTTP method, ignored
+        :param url: scoreboard URL
+        :param headers: request headers, ignored
+        :return: ArchivedResponse
+        """
+        entry = self.archive.latest(url)
+        if entry is None:
+            response = ArchivedResponse(status=404, reason='Not Found')
+        else:
+            response = ArchivedResponse(self.archive.read(entry['sha256']))
+        with response:
+            yield response
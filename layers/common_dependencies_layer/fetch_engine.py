@@ -0,0 +1,115 @@
+"""
+Asynchronous fan-out of scoreboard fetches with bounded concurrency and per-host rate limiting
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import urlparse
+
+from .fetch_target import FetchResult, FetchTarget
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to each host so no host sees more than ``rate`` requests per second
+    """
+    def __init__(self, rate: Optional[float] = None):
+        """
+        Initialize the rate limiter
+
+        :param rate: maximum requests per second per host, None for unlimited
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        """
+        Wait until a request to the host is allowed
+
+        :param host: host name
+        """
+        if not self.interval:
+            return
+
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncFetchEngine:
+    """
+    Runs a blocking fetch function for many targets concurrently
+
+    The fetch function runs on a worker thread so it can keep using the shared
+    keep-alive connection pool; at most ``max_concurrency`` fetches are in flight.
+    """
+    def __init__(self, fetch: Callable[[FetchTarget], Any], max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 requests_per_second: Optional[float] = None):
+        """
+        Initialize the fetch engine
+
+        :param fetch: blocking callable taking a FetchTarget
+        :param max_concurrency: maximum number of fetches in flight
+        :param requests_per_second: per-host rate limit, None for unlimited
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+
+    async def _fetch_one(self, executor, limiter, target: FetchTarget) -> FetchResult:
+        """
+        Fetch a single target on the executor
+
+        :param executor: thread pool running the blocking fetch
+        :param limiter: per-host rate limiter
+        :param target: target to fetch
+        :return: FetchResult
+        """
+        await limiter.wait(urlparse(target.url).hostname)
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so the fetch sees the invocation's metrics
+        context = contextvars.copy_context()
+        try:
+            value = await loop.run_in_executor(executor, context.run, self.fetch, target)
+        except Exception as e:  # pylint: disable=broad-except
+            return FetchResult(target, error=e)
+        return FetchResult(target, value)
+
+    async def fetch_all(self, targets: Iterable[FetchTarget]):
+        """
+        Fetch every target, yielding results in completion order
+
+        Targets are pulled from the iterable lazily, so a season-long range never has
+        more than ``max_concurrency`` fetches scheduled at once.
+
+        :param targets: iterable of FetchTarget
+        :return: async iterator of FetchResult
+        """
+        limiter = HostRateLimiter(self.requests_per_second)
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for target in targets:
+                if len(pending) >= self.max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(self._fetch_one(executor, limiter, target)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
@@ -0,0 +1,187 @@
+"""
+Season-aware planning of scoreboard fetches that skips days known to have no games
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
+# /tmp is the only writable location in Lambda and survives between warm invocations
+DEFAULT_PLANNER_FILE = os.path.join(tempfile.gettempdir(), 'fetch_planner.json')
+
+PLANNER_VERSION = 1
+
+# Games may still be added to recent days, so an empty answer for them is only trusted briefly
+DEFAULT_RECENT_DAYS = 2
+DEFAULT_RECENT_EMPTY_TTL = 6 * 60 * 60
+DEFAULT_EMPTY_TTL = 30 * 24 * 60 * 60
+
+
+class SeasonBounds(NamedTuple):
+    """
+    First and last (month, day) of a season, which lies within one calendar year
+    """
+    start: tuple
+    end: tuple
+
+    def contains(self, target_date: datetime.date) -> bool:
+        """
+        Whether a date falls within the season
+
+        :param target_date: date
+        :return: bool
+        """
+        return self.start <= (target_date.month, target_date.day) <= self.end
+
+
+# College soccer runs from the preseason in August to the championships in December
+DEFAULT_SEASONS = {
+    'female': SeasonBounds((8, 1), (12, 15)),
+    'male': SeasonBounds((8, 1), (12, 20)),
+}
+
+
+class FetchPlanner:
+    """
+    Decides which gender, division and date combinations are worth fetching
+
+    Dates outside the season of a gender are never fetched. Within the season a
+    scoreboard answered with 404 or without games is recorded per URL and skipped
+    until its entry expires: quickly for recent days, which may still get games,
+    and after a long time for older days. The entries are kept in a JSON file.
+    """
+    def __init__(self, path: str = DEFAULT_PLANNER_FILE, seasons: dict = None, recent_days: int = DEFAULT_RECENT_DAYS,
+                 recent_empty_ttl: float = DEFAULT_RECENT_EMPTY_TTL, empty_ttl: float = DEFAULT_EMPTY_TTL,
+                 clock=time.time):
+        """
+        Initialize the planner
+
+        :param path: JSON file the entries are kept in, None to keep them in memory only
+        :param seasons: SeasonBounds by gender, genders without bounds are always in season
+        :param recent_days: days before today whose empty answers use the recent TTL
+        :param recent_empty_ttl: seconds an empty answer for a recent day is trusted
+        :param empty_ttl: seconds an empty answer for an older day is trusted
+        :param clock: callable returning the current Unix time in seconds
+        """
+        self.path = path
+        self.seasons = DEFAULT_SEASONS if seasons is None else seasons
+        self.recent_days = recent_days
+        self.recent_empty_ttl = recent_empty_ttl
+        self.empty_ttl = empty_ttl
+        self.clock = clock
+        self.entries = self._load()
+        self.skipped_out_of_season = 0
+        self.skipped_empty = 0
+        self.planned = 0
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        """
+        Read the entries, starting empty when the file is missing, unreadable or from another version
+
+        :return: entries by URL
+        """
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return data.get('entries', {}) if data.get('version') == PLANNER_VERSION else {}
+
+    def save(self):
+        """
+        Write the entries that have not expired
+        """
+        if self.path is None:
+            return
+
+        now = self.clock()
+        with self._lock:
+            entries = {url: entry for url, entry in self.entries.items() if entry['expires'] > now}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump({'version': PLANNER_VERSION, 'entries': entries}, file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+
+    def in_season(self, gender: str, target_date: datetime.date) -> bool:
+        """
+        Whether a date falls within the season of a gender
+
+        :param gender: Gender (male, female)
+        :param target_date: date
+        :return: bool
+        """
+        season = self.seasons.get(gender)
+        return season is None or season.contains(target_date)
+
+    def skip_reason(self, target) -> str:
+        """
+        Why a target is not worth fetching
+
+        :param target: FetchTarget
+        :return: 'out of season', 'no games' or None when the target should be fetched
+        """
+        if not self.in_season(target.gender, target.target_date):
+            return 'out of season'
+
+        entry = self.entries.get(target.url)
+        if entry is not None and entry['games'] == 0 and entry['expires'] > self.clock():
+            return 'no games'
+        return None
+
+    def plan(self, targets):
+        """
+        Leave out the targets that are not worth fetching
+
+        :param targets: iterable of FetchTarget
+        :return: generator of FetchTarget
+        """
+        for target in targets:
+            reason = self.skip_reason(target)
+            if reason is None:
+                self.planned += 1
+                yield target
+            elif reason == 'out of season':
+                self.skipped_out_of_season += 1
+            else:
+                self.skipped_empty += 1
+
+    def record(self, target, games: int):
+        """
+        Record how many games a fetched scoreboard had, 0 for a 404
+
+        :param target: FetchTarget that was fetched
+        :param games: number of games on the scoreboard
+        """
+        now = self.clock()
+        if games:
+            ttl = self.empty_ttl
+        else:
+            today = datetime.date.fromtimestamp(now)
+            recent = (today - target.target_date).days <= self.recent_days
+            ttl = self.recent_empty_ttl if recent else self.empty_ttl
+
+        with self._lock:
+            self.entries[target.url] = {'games': games, 'expires': now + ttl}
+
+    def stats(self) -> dict:
+        """
+        Planned and skipped counters
+
+        :return: dictionary of counters
+        """
+        return {
+            'planned': self.planned,
+            'skippedOutOfSeason': self.skipped_out_of_season,
+            'skippedEmpty': self.skipped_empty,
+        }
@@ -0,0 +1,27 @@
+"""
+Scoreboard fetch targets and their outcomes
+
+Kept apart from fetch_engine so fetching a single target does not import asyncio.
+"""
+
+import datetime
+from typing import Any, NamedTuple, Optional
+
+
+class FetchTarget(NamedTuple):
+    """
+    A scoreboard URL together with the combination it was generated for
+    """
+    url: str
+    gender: str
+    division: str
+    target_date: datetime.date
+
+
+class FetchResult(NamedTuple):
+    """
+    Outcome of fetching a single target
+    """
+    target: FetchTarget
+    value: Any = None
+    error: Optional[BaseException] = None
@@ -0,0 +1,50 @@
+"""
+Stable content fingerprint of a match used for change detection
+"""
+
+import hashlib
+import json
+
+FINGERPRINT_ATTRIBUTE = 'fingerprint'
+
+# Fields that make a match different; timestamps of when we saw it are left out
+FINGERPRINT_FIELDS = (
+    'id',
+    'startTimeEpoch',
+    'matchState',
+    'division',
+    'gender',
+    'awayTeam',
+    'awayScore',
+    'awayConference',
+    'homeTeam',
+    'homeScore',
+    'homeConference',
+)
+
+# One shared encoder; json.dumps builds a new encoder whenever it is given options
+_CANONICAL_ENCODER = json.JSONEncoder(separators=(',', ':'), sort_keys=True, default=str)
+
+
+def fingerprint_values(values: list) -> str:
+    """
+    Compute the fingerprint of the validated field values, in FINGERPRINT_FIELDS order
+
+    :param values: field values
+    :return: hex digest
+    """
+    canonical = _CANONICAL_ENCODER.encode(values)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def match_fingerprint(match: dict) -> str:
+    """
+    Compute the fingerprint of a match
+
+    The fields are serialized in a fixed order so the same content always
+    produces the same digest.
+
+    :param match: match dictionary
+    :return: hex digest
+    """
+    return fingerprint_values([match.get(field) for field in FINGERPRINT_FIELDS])
@@ -0,0 +1,181 @@
+"""
+Keep-alive HTTP connection pool shared by the lambdas and the local driver
+"""
+
+import contextlib
+import http.client
+import ssl
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_IDLE_TIMEOUT = 30.0
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_TIMEOUT = 10
+
+# Errors raised when a kept-alive connection was closed by the server while it sat idle
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class HTTPConnectionPool:
+    """
+    Pool of keep-alive HTTP(S) connections keyed by (scheme, host, port)
+
+    Connections are returned to the pool once their response has been fully read and
+    are evicted after sitting idle for longer than ``idle_timeout`` seconds.
+    """
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, max_per_host: int = DEFAULT_MAX_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, ssl_context: ssl.SSLContext = None):
+        """
+        Initialize the connection pool
+
+        :param idle_timeout: seconds an idle connection may be kept before it is discarded
+        :param max_per_host: maximum number of idle connections kept per host
+        :param timeout: socket timeout for new connections
+        :param ssl_context: SSL context used for HTTPS connections
+        """
+        self.idle_timeout = idle_timeout
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.ssl_context = ssl_context
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def _new_connection(self, key):
+        """
+        Open a new connection for the given key
+
+        :param key: tuple of scheme, host and port
+        :return: HTTP(S) connection
+        """
+        scheme, host, port = key
+        self.connections_created += 1
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        """
+        Take an idle connection for the given key, evicting expired ones
+
+        :param key: tuple of scheme, host and port
+        :return: a reused connection or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    self.connections_reused += 1
+                    return conn
+                conn.close()
+        return None
+
+    def _release(self, key, conn):
+        """
+        Return a connection to the pool
+
+        :param key: tuple of scheme, host and port
+        :param conn: connection to keep alive
+        """
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    @contextlib.contextmanager
+    def request(self, method: str, url: str, headers: dict = None):
+        """
+        Send a request over a pooled connection
+
+        The response is yielded to the caller; the connection is handed back to the
+        pool on exit when the body was fully consumed and the server allows keep-alive.
+        A reused connection that turns out to be stale is replaced by a new one once.
+
+        :param method: HTTP method
+        :param url: absolute URL
+        :param headers: optional request headers
+        :return: http.client.HTTPResponse
+        """
+        parsed_url = urlparse(url)
+        scheme = parsed_url.scheme or 'https'
+        default_port = 443 if scheme == 'https' else 80
+        key = (scheme, parsed_url.hostname, parsed_url.port or default_port)
+
+        path = parsed_url.path or '/'
+        if parsed_url.query:
+            path = f"{path}?{parsed_url.query}"
+
+        conn = self._acquire(key)
+        reused = conn is not None
+        if conn is None:
+            conn = self._new_connection(key)
+
+        while True:
+            try:
+                conn.request(method, path, headers=headers or {})
+                response = conn.getresponse()
+                break
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                reused = False
+                conn = self._new_connection(key)
+            except Exception:
+                conn.close()
+                raise
+
+        try:
+            yield response
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.isclosed() and not response.will_close:
+            self._release(key, conn)
+        else:
+            conn.close()
+
+    def clear(self):
+        """
+        Close every idle connection
+        """
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> HTTPConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use
+
+    Lambda keeps module state alive between warm invocations, so the pool and its
+    connections survive from one invocation to the next.
+
+    :return: shared HTTPConnectionPool
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = HTTPConnectionPool()
+    return _POOL
@@ -0,0 +1,145 @@
+"""
+Leveled JSON logging with per-invocation sampling of debug output
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+LOG_LEVEL_VARIABLE = 'LOG_LEVEL'
+DEBUG_SAMPLE_RATE_VARIABLE = 'LOG_DEBUG_SAMPLE_RATE'
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'), default=str)
+
+_LOGGERS = {}
+
+
+class JSONLogger:
+    """
+    Writes one JSON object per line to stdout
+
+    Messages use %-style arguments that are only formatted when the level is enabled,
+    so a disabled call costs a method call and a comparison. A share of invocations,
+    chosen by start_invocation(), logs at DEBUG regardless of the configured level.
+    """
+    def __init__(self, name: str, level: int = None, debug_sample_rate: float = None, stream=None,
+                 sampler=random.random):
+        """
+        Initialize the logger
+
+        :param name: logger name, included in every line
+        :param level: minimum level, defaults to LOG_LEVEL or INFO
+        :param debug_sample_rate: share of invocations logged at DEBUG, defaults to LOG_DEBUG_SAMPLE_RATE or 0
+        :param stream: text stream, defaults to sys.stdout at the time of the call
+        :param sampler: callable returning a float in [0, 1)
+        """
+        if level is None:
+            level = LEVELS.get(os.environ.get(LOG_LEVEL_VARIABLE, 'INFO').strip().upper(), INFO)
+        if debug_sample_rate is None:
+            debug_sample_rate = float(os.environ.get(DEBUG_SAMPLE_RATE_VARIABLE, '0'))
+
+        self.name = name
+        self.base_level = level
+        self.level = level
+        self.debug_sample_rate = debug_sample_rate
+        self.stream = stream
+        self.sampler = sampler
+        self.fields = {}
+
+    def start_invocation(self, context=None):
+        """
+        Reset the per-invocation state and decide whether this invocation is sampled
+
+        :param context: Lambda context, its aws_request_id is added to every line
+        :return: True when debug output is sampled in for this invocation
+        """
+        self.fields = {}
+        request_id = getattr(context, 'aws_request_id', None)
+        if request_id is not None:
+            self.fields['requestId'] = request_id
+
+        sampled = self.debug_sample_rate > 0 and self.sampler() < self.debug_sample_rate
+        self.level = DEBUG if sampled else self.base_level
+        return sampled
+
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        Whether messages at a level are written
+
+        :param level: level
+        :return: bool
+        """
+        return level >= self.level
+
+    def log(self, level: int, message: str, *args, **fields):
+        """
+        Write a message if its level is enabled
+
+        :param level: level
+        :param message: message, %-formatted with args only when written
+        :param args: message arguments
+        :param fields: extra values added to the line
+        """
+        if level < self.level:
+            return
+
+        record = {
+            'timestamp': round(time.time(), 3),
+            'level': LEVEL_NAMES.get(level, str(level)),
+            'logger': self.name,
+            'message': message % args if args else message,
+        }
+        record.update(self.fields)
+        record.update(fields)
+        (self.stream or sys.stdout).write(_ENCODER.encode(record) + '\n')
+
+    def debug(self, message: str, *args, **fields):
+        """
+        Write a DEBUG message
+        """
+        if DEBUG >= self.level:
+            self.log(DEBUG, message, *args, **fields)
+
+    def info(self, message: str, *args, **fields):
+        """
+        Write an INFO message
+        """
+        if INFO >= self.level:
+            self.log(INFO, message, *args, **fields)
+
+    def warning(self, message: str, *args, **fields):
+        """
+        Write a WARNING message
+        """
+        if WARNING >= self.level:
+            self.log(WARNING, message, *args, **fields)
+
+    def error(self, message: str, *args, **fields):
+        """
+        Write an ERROR message
+        """
+        if ERROR >= self.level:
+            self.log(ERROR, message, *args, **fields)
+
+
+def get_logger(name: str) -> JSONLogger:
+    """
+    Get the logger with a name, creating it on first use
+
+    :param name: logger name
+    :return: JSONLogger
+    """
+    logger = _LOGGERS.get(name)
+    if logger is None:
+        logger = _LOGGERS[name] = JSONLogger(name)
+    return logger
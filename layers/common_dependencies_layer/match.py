@@ -0,0 +1,283 @@
+"""
+Compact match record shared by the driver and every handler
+"""
+
+import json
+import time
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+from operator import attrgetter
+
+from .fingerprint import fingerprint_values
+
+# Fields in the order they are serialized
+MATCH_FIELDS = (
+    'id',
+    'messageId',
+    'processTimeEpoch',
+    'startTimeEpoch',
+    'matchState',
+    'division',
+    'gender',
+    'updatedAt',
+    'awayTeam',
+    'awayScore',
+    'awayConference',
+    'homeTeam',
+    'homeScore',
+    'homeConference',
+    'fingerprint',
+)
+
+# Reusing one encoder avoids building a new one for every json.dumps(..., default=str) call
+_ENCODER = json.JSONEncoder(default=str)
+
+
+def _json_layout(has_message_id: bool, has_process_time: bool) -> tuple:
+    """
+    Format string and field getter of a serialized match, laid out the way _ENCODER lays out a dictionary
+
+    :param has_message_id: whether messageId is set
+    :param has_process_time: whether processTimeEpoch is set
+    :return: tuple of a format string with one %s per field and a getter returning the field values
+    """
+    left_out = {'messageId': not has_message_id, 'processTimeEpoch': not has_process_time}
+    fields = [field for field in MATCH_FIELDS if not left_out.get(field)]
+    return '{' + ', '.join(f'"{field}": %s' for field in fields) + '}', attrgetter(*fields)
+
+
+def _json_value(value) -> str:
+    """
+    JSON text of one field value; strings, ints and None skip the encoder
+
+    :param value: field value
+    :return: JSON text, the same as _ENCODER.encode(value)
+    """
+    if type(value) is str:  # pylint: disable=unidiomatic-typecheck
+        return encode_basestring_ascii(value)
+    if value is None:
+        return 'null'
+    # bool is an int subclass but is written as true or false, so only exact ints are repr'd
+    if type(value) is int:  # pylint: disable=unidiomatic-typecheck
+        return repr(value)
+    return _ENCODER.encode(value)
+
+
+# Unset optional fields are left out, so there is one layout per combination of them
+_JSON_LAYOUTS = {
+    (has_message_id, has_process_time): _json_layout(has_message_id, has_process_time)
+    for has_message_id in (False, True) for has_process_time in (False, True)
+}
+
+
+def _first_conference(team: dict):
+    """
+    Name of the first conference of a team
+
+    :param team: team data from the feed
+    :return: conference name or None
+    """
+    conferences = team.get('conferences')
+    if conferences and isinstance(conferences, list):
+        return conferences[0].get('conferenceName')
+    return None
+
+
+class Match:
+    """
+    A single match, stored in slots rather than a per-instance dictionary
+    """
+    __slots__ = MATCH_FIELDS
+
+    def __init__(self, id, startTimeEpoch, matchState, division, gender, updatedAt,  # pylint: disable=redefined-builtin,invalid-name
+                 awayTeam, awayScore, awayConference, homeTeam, homeScore, homeConference,
+                 processTimeEpoch=None, messageId=None, fingerprint=None):
+        # pylint: disable=invalid-name,too-many-arguments
+        self.id = id
+        self.messageId = messageId
+        self.processTimeEpoch = processTimeEpoch
+        self.startTimeEpoch = startTimeEpoch
+        self.matchState = matchState
+        self.division = division
+        self.gender = gender
+        self.updatedAt = updatedAt
+        self.awayTeam = awayTeam
+        self.awayScore = awayScore
+        self.awayConference = awayConference
+        self.homeTeam = homeTeam
+        self.homeScore = homeScore
+        self.homeConference = homeConference
+        self.fingerprint = fingerprint if fingerprint is not None else self.compute_fingerprint()
+
+    def __eq__(self, other):
+        if not isinstance(other, Match):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in MATCH_FIELDS)
+
+    def __repr__(self):
+        return f"Match(id={self.id!r}, startTimeEpoch={self.startTimeEpoch!r}, matchState={self.matchState!r})"
+
+    @property
+    def key(self) -> tuple:
+        """
+        Primary key of the match in DynamoDB
+
+        :return: tuple of id and startTimeEpoch
+        """
+        return self.id, self.startTimeEpoch
+
+    def compute_fingerprint(self) -> str:
+        """
+        Fingerprint of the validated fields
+
+        :return: hex digest
+        """
+        # Same order as FINGERPRINT_FIELDS
+        return fingerprint_values([
+            self.id, self.startTimeEpoch, self.matchState, self.division, self.gender,
+            self.awayTeam, self.awayScore, self.awayConference,
+            self.homeTeam, self.homeScore, self.homeConference,
+        ])
+
+    @classmethod
+    def from_feed(cls, game: dict, gender: str, division: str, updated_at: int, process_time: int = None):
+        """
+        Build a match from a scoreboard game
+
+        :param game: game data from the feed
+        :param gender: Gender
+        :param division: Division
+        :param updated_at: updated_at of the scoreboard as a Unix timestamp
+        :param process_time: processing time, defaults to now
+        :return: Match or None if the game has no teams
+        """
+        home = game.get('home')
+        away = game.get('away')
+
+        if home is None or away is None:
+            return None
+
+        home_names = home.get('names')
+        away_names = away.get('names')
+
+        if home_names is None or away_names is None:
+            return None
+
+        # Positional arguments in __init__ order; this runs once per game in the feed
+        return cls(
+            int(game.get('gameID')),
+            int(game.get('startTimeEpoch')),
+            game.get('gameState'),
+            division,
+            gender,
+            updated_at,
+            away_names.get('full'),
+            away.get('score'),
+            _first_conference(away),
+            home_names.get('full'),
+            home.get('score'),
+            _first_conference(home),
+            process_time if process_time is not None else int(time.time()),
+        )
+
+    @classmethod
+    def from_message(cls, body: dict, message_id: str = None, process_time: int = None):
+        """
+        Build a match from a decoded queue message
+
+        :param body: decoded message body
+        :param message_id: SQS message id, defaults to the one in the body
+        :param process_time: processing time, defaults to the one in the body
+        :return: Match
+        :raises KeyError: when a required field is missing
+        """
+        process_time_epoch = body.get('processTimeEpoch') if process_time is None else process_time
+
+        return cls(
+            int(body['id']),
+            int(body['startTimeEpoch']),
+            body['matchState'],
+            body['division'],
+            body['gender'],
+            int(body['updatedAt']),
+            body['awayTeam'],
+            body['awayScore'],
+            body['awayConference'],
+            body['homeTeam'],
+            body['homeScore'],
+            body['homeConference'],
+            int(process_time_epoch) if process_time_epoch is not None else None,
+            message_id if message_id is not None else body.get('messageId'),
+            body.get('fingerprint'),
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Dictionary form of the match, leaving out unset optional fields
+
+        :return: match dictionary
+        """
+        result = {'id': self.id}
+        if self.messageId is not None:
+            result['messageId'] = self.messageId
+        if self.processTimeEpoch is not None:
+            result['processTimeEpoch'] = self.processTimeEpoch
+        result['startTimeEpoch'] = self.startTimeEpoch
+        result['matchState'] = self.matchState
+        result['division'] = self.division
+        result['gender'] = self.gender
+        result['updatedAt'] = self.updatedAt
+        result['awayTeam'] = self.awayTeam
+        result['awayScore'] = self.awayScore
+        result['awayConference'] = self.awayConference
+        result['homeTeam'] = self.homeTeam
+        result['homeScore'] = self.homeScore
+        result['homeConference'] = self.homeConference
+        result['fingerprint'] = self.fingerprint
+        return result
+
+    def to_json(self) -> str:
+        """
+        JSON form of the match, as sent through the queues
+
+        The values are written from the slots into the layout of the match without
+        building a dictionary first, which benchmarks.bench_match measures against
+        encoding to_dict(). The text is the same as _ENCODER.encode(self.to_dict()).
+
+        :return: JSON string
+        """
+        template, values = _JSON_LAYOUTS[self.messageId is not None, self.processTimeEpoch is not None]
+        return template % tuple(map(_json_value, values(self)))
+
+    def to_dynamo_item(self) -> dict:
+        """
+        DynamoDB item for the match; floats become Decimal as DynamoDB requires
+
+        :return: item dictionary
+        """
+        item = self.to_dict()
+        # Every other numeric field is converted to int on the way in
+        if isinstance(self.awayScore, float):
+            item['awayScore'] = Decimal(str(self.awayScore))
+        if isinstance(self.homeScore, float):
+            item['homeScore'] = Decimal(str(self.homeScore))
+        return item
+
+
+def keep_latest(matches: dict, match: Match, message_id: str):
+    """
+    Add a match parsed off a batch of messages, keeping only the most recent copy of each match
+
+    :param matches: (match, message ids) tuples by match key, updated in place
+    :param match: Match
+    :param message_id: id of the message the match came from
+    """
+    current = matches.get(match.key)
+    if current is None:
+        matches[match.key] = (match, [message_id])
+        return
+
+    current_match, message_ids = current
+    message_ids.append(message_id)
+    if match.updatedAt >= current_match.updatedAt:
+        matches[match.key] = (match, message_ids)
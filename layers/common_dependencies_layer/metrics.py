@@ -0,0 +1,229 @@
+"""
+Per-invocation phase timings and counts, emitted in CloudWatch Embedded Metric Format
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_ENABLED_VARIABLE = 'METRICS_ENABLED'
+DEFAULT_NAMESPACE = 'NCAAMatches'
+
+_CURRENT = contextvars.ContextVar('metrics', default=None)
+
+
+class _Phase:
+    """
+    Context manager adding its elapsed time to a phase
+    """
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.add_time(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+class Metrics:
+    """
+    Timings and counts collected during one invocation
+    """
+    enabled = True
+
+    def __init__(self, namespace: str = DEFAULT_NAMESPACE, dimensions: dict = None, properties: dict = None):
+        """
+        Initialize the metrics
+
+        :param namespace: CloudWatch namespace
+        :param dimensions: dimension names and values, e.g. {'FunctionName': 'FetchNCAAMatches'}
+        :param properties: extra values logged with the metrics but not turned into metrics
+        """
+        self.namespace = namespace
+        self.dimensions = dimensions or {}
+        self.properties = properties or {}
+        self.timings = {}
+        self.counts = {}
+        # Fetches of a multi-target invocation record from worker threads
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Time a phase; repeated phases with the same name add up
+
+        :param name: metric name of the phase
+        :return: context manager
+        """
+        return _Phase(self, name)
+
+    def add_time(self, name: str, milliseconds: float):
+        """
+        Add time to a phase
+
+        :param name: metric name of the phase
+        :param milliseconds: elapsed time
+        """
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + milliseconds
+
+    def count(self, name: str, value: int = 1):
+        """
+        Increment a counter
+
+        :param name: metric name of the counter
+        :param value: increment
+        """
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def to_emf(self, timestamp: int = None) -> dict:
+        """
+        Embedded Metric Format document of the collected metrics
+
+        :param timestamp: Unix timestamp in milliseconds, defaults to now
+        :return: EMF dictionary
+        """
+        definitions = [{'Name': name, 'Unit': 'Milliseconds'} for name in self.timings]
+        definitions.extend({'Name': name, 'Unit': 'Count'} for name in self.counts)
+
+        return {
+            '_aws': {
+                'Timestamp': timestamp if timestamp is not None else int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [list(self.dimensions)],
+                    'Metrics': definitions,
+                }],
+            },
+            **self.properties,
+            **self.dimensions,
+            **{name: round(value, 3) for name, value in self.timings.items()},
+            **self.counts,
+        }
+
+    def emit(self):
+        """
+        Write the metrics as a single line to stdout, where CloudWatch picks them up
+        """
+        print(json.dumps(self.to_emf(), separators=(',', ':'), default=str))
+
+
+class _NullPhase:
+    """
+    Context manager that does nothing
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+class NullMetrics:
+    """
+    Stand-in used when metrics are disabled or outside an instrumented handler
+    """
+    enabled = False
+
+    _PHASE = _NullPhase()
+
+    def phase(self, name: str) -> _NullPhase:  # pylint: disable=unused-argument
+        """
+        Skip timing the phase
+
+        :param name: metric name of the phase
+        :return: shared no-op context manager
+        """
+        return self._PHASE
+
+    def add_time(self, name: str, milliseconds: float):
+        """
+        Ignore the time
+        """
+
+    def count(self, name: str, value: int = 1):
+        """
+        Ignore the count
+        """
+
+    def emit(self):
+        """
+        Emit nothing
+        """
+
+
+NULL_METRICS = NullMetrics()
+
+
+def get_metrics():
+    """
+    Metrics of the running invocation
+
+    :return: Metrics, or NULL_METRICS when none are being collected
+    """
+    metrics = _CURRENT.get()
+    return metrics if metrics is not None else NULL_METRICS
+
+
+def metrics_enabled() -> bool:
+    """
+    Whether metrics are collected, controlled by the METRICS_ENABLED environment variable
+
+    :return: True unless METRICS_ENABLED is set to false, 0, no or off
+    """
+    return os.environ.get(METRICS_ENABLED_VARIABLE, 'true').strip().lower() not in ('false', '0', 'no', 'off')
+
+
+def instrument(function_name: str, namespace: str = DEFAULT_NAMESPACE):
+    """
+    Decorate a lambda handler so every invocation emits one metrics line
+
+    The handler and the code it calls record phases and counts through get_metrics().
+    The total duration is recorded as ``invocationTime`` and an exception as ``errors``.
+
+    :param function_name: FunctionName dimension when the context does not provide one
+    :param namespace: CloudWatch namespace
+    :return: decorator
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if not metrics_enabled():
+                return handler(event, context)
+
+            properties = {}
+            request_id = getattr(context, 'aws_request_id', None)
+            if request_id is not None:
+                properties['requestId'] = request_id
+
+            metrics = Metrics(
+                namespace,
+                {'FunctionName': getattr(context, 'function_name', None) or function_name},
+                properties,
+            )
+            token = _CURRENT.set(metrics)
+            start = time.perf_counter()
+            try:
+                return handler(event, context)
+            except Exception:
+                metrics.count('errors')
+                raise
+            finally:
+                metrics.add_time('invocationTime', (time.perf_counter() - start) * 1000)
+                _CURRENT.reset(token)
+                metrics.emit()
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,137 @@
+"""
+On-disk conditional GET cache for scoreboard.json fetches
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# /tmp is the only writable location in Lambda and survives between warm invocations
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'scoreboard_cache')
+
+
+class ScoreboardCache:
+    """
+    Remembers the validators and feed timestamp of every scoreboard URL
+
+    A hit means the scoreboard has not changed since it was last fetched, either
+    because the server answered 304 Not Modified or because the feed reports the
+    same ``updated_at`` as before.
+    """
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY):
+        """
+        Initialize the cache
+
+        :param directory: directory the cache entries are stored in
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """
+        Path of the entry for a URL
+
+        :param url: scoreboard URL
+        :return: file path
+        """
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, url: str) -> dict:
+        """
+        Read the entry for a URL
+
+        :param url: scoreboard URL
+        :return: entry dictionary, empty if there is none
+        """
+        try:
+            with open(self._path(url), encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def request_headers(self, url: str) -> dict:
+        """
+        Conditional request headers for a URL
+
+        :param url: scoreboard URL
+        :return: dictionary of If-None-Match / If-Modified-Since headers
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def not_modified(self):
+        """
+        Record a 304 Not Modified answer; the entry of the URL is already up to date
+        """
+        with self._lock:
+            self.hits += 1
+
+    def changed(self, url: str, updated_at: str) -> bool:
+        """
+        Whether a scoreboard changed since it was last saved, counted as a hit or a miss
+
+        Nothing is stored; call save() once the scoreboard has been read to the end, so a
+        response that breaks off part-way is fetched and parsed again next time.
+
+        :param url: scoreboard URL
+        :param updated_at: updated_at value reported by the feed
+        :return: True if the scoreboard changed since it was last saved
+        """
+        changed = updated_at is None or self.get(url).get('updated_at') != updated_at
+        with self._lock:
+            if changed:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return changed
+
+    def save(self, url: str, etag: str, last_modified: str, updated_at: str):
+        """
+        Store the validators and feed timestamp of a scoreboard that was read completely
+
+        :param url: scoreboard URL
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :param updated_at: updated_at value reported by the feed
+        """
+        new_entry = {'url': url, 'etag': etag, 'last_modified': last_modified, 'updated_at': updated_at}
+        if new_entry != self.get(url):
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            path = self._path(url)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(new_entry, file)
+            os.replace(temp_path, path)
+
+    def update(self, url: str, etag: str, last_modified: str, updated_at: str) -> bool:
+        """
+        Record a scoreboard that was read completely and report whether it changed
+
+        :param url: scoreboard URL
+        :param etag: ETag response header
+        :param last_modified: Last-Modified response header
+        :param updated_at: updated_at value reported by the feed
+        :return: True if the scoreboard changed since it was last seen
+        """
+        changed = self.changed(url, updated_at)
+        self.save(url, etag, last_modified, updated_at)
+        return changed
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters
+
+        :return: dictionary of counters
+        """
+        return {'hits': self.hits, 'misses': self.misses}
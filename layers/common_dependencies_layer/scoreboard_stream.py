@@ -0,0 +1,188 @@
+"""
+Incremental parser that reads scoreboard games off a response one at a time
+"""
+
+import codecs
+import json
+from collections import deque
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+
+
+class ScoreboardStream:
+    """
+    Streams the entries of a scoreboard's ``games`` array without building the whole document
+
+    Only one game is decoded at a time, so peak memory is proportional to the largest
+    game instead of the whole feed. Top-level values other than ``games`` are decoded
+    and discarded, except for ``updated_at`` which is kept.
+    """
+    def __init__(self, fp, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the stream
+
+        :param fp: binary file-like object, such as an http.client.HTTPResponse
+        :param chunk_size: number of bytes read at a time
+        """
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.updated_at = None
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._pending = deque()
+        self._events = self._parse()
+        self._updated_at_seen = False
+
+    def _fill(self) -> bool:
+        """
+        Read the next chunk into the buffer
+
+        :return: False once the input is exhausted
+        """
+        if self._eof:
+            return False
+
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(b'', final=True)
+        else:
+            self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def _error(self, message: str):
+        """
+        Build a decode error at the current position
+
+        :param message: error message
+        :return: json.JSONDecodeError
+        """
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it
+
+        :return: next character, empty at the end of the input
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, characters: str) -> str:
+        """
+        Consume the next character, which must be one of ``characters``
+
+        :param characters: allowed characters
+        :return: the consumed character
+        """
+        character = self._peek()
+        if not character or character not in characters:
+            raise self._error(f"Expecting one of {characters!r}")
+        self._pos += 1
+        return character
+
+    def _value(self):
+        """
+        Decode the next complete JSON value, reading more input as needed
+
+        :return: decoded value
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A value ending exactly at the buffer end may be a truncated number
+            if end == len(self._buffer) and self._fill():
+                continue
+
+            self._pos = end
+            return value
+
+    def _parse(self):
+        """
+        Walk the top-level object
+
+        :return: generator of ('updated_at', value) and ('game', item) events
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise self._error("Expecting property name")
+            self._expect(':')
+
+            if key == 'games' and self._peek() == '[':
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield 'game', self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                value = self._value()
+                if key == 'updated_at':
+                    yield 'updated_at', value
+
+            if self._expect(',}') == '}':
+                return
+
+    def read_updated_at(self):
+        """
+        Parse forward until ``updated_at`` is known
+
+        Games that appear before ``updated_at`` are held back for games().
+
+        :return: updated_at value, None if the feed has none
+        """
+        if not self._updated_at_seen:
+            for kind, value in self._events:
+                if kind == 'updated_at':
+                    self.updated_at = value
+                    break
+                self._pending.append(value)
+            self._updated_at_seen = True
+        return self.updated_at
+
+    def games(self):
+        """
+        Iterate over the entries of the ``games`` array
+
+        :return: generator of game entries
+        """
+        self.read_updated_at()
+        while self._pending:
+            yield self._pending.popleft()
+
+        for kind, value in self._events:
+            if kind == 'game':
+                yield value
+
+    def drain(self):
+        """
+        Read and discard the rest of the input so the connection can be reused
+        """
+        while not self._eof:
+            if not self.fp.read(self.chunk_size):
+                self._eof = True
@@ -0,0 +1,153 @@
+"""
+Batched SQS publishing with send_message_batch
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple
+
+# Limits imposed by SQS on a single send_message_batch call
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 0.1
+
+
+def pack_batches(bodies: Iterable[str], max_entries: int = MAX_BATCH_ENTRIES, max_bytes: int = MAX_BATCH_BYTES):
+    """
+    Group message bodies into batches that fit within the SQS batch limits
+
+    :param bodies: message bodies
+    :param max_entries: maximum messages per batch
+    :param max_bytes: maximum total payload size per batch
+    :return: generator of lists of message bodies
+    """
+    batch = []
+    batch_bytes = 0
+    for body in bodies:
+        size = len(body.encode('utf-8'))
+        if batch and (len(batch) >= max_entries or batch_bytes + size > max_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(body)
+        batch_bytes += size
+
+    if batch:
+        yield batch
+
+
+class PublishResult(NamedTuple):
+    """
+    Outcome of publishing a set of messages
+    """
+    sent: int
+    failed: list
+    batches: int
+    elapsed: float
+    message_ids: tuple = ()
+
+    @property
+    def throughput(self) -> float:
+        """
+        Messages sent per second
+
+        :return: throughput
+        """
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class SQSBatchPublisher:
+    """
+    Publishes messages to a queue with send_message_batch
+
+    Batches are sent concurrently from a thread pool and only the entries SQS
+    reports as failed are retried.
+    """
+    def __init__(self, client, queue_url: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Initialize the publisher
+
+        :param client: boto3 SQS client
+        :param queue_url: URL of the target queue
+        :param max_workers: number of batches sent concurrently
+        :param max_retries: attempts for entries that failed with a server fault
+        :param retry_delay: base delay between retries in seconds
+        """
+        self.client = client
+        self.queue_url = queue_url
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def _send_batch(self, bodies: list[str]):
+        """
+        Send one batch, retrying failed entries
+
+        :param bodies: message bodies that fit in a single batch
+        :return: tuple of the message ids of the sent entries and list of failed entries
+        """
+        pending = {str(index): body for index, body in enumerate(bodies)}
+        message_ids = []
+        failed = []
+
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+
+            response = self.client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': entry_id, 'MessageBody': body} for entry_id, body in pending.items()]
+            )
+            message_ids.extend(success.get('MessageId') for success in response.get('Successful', []))
+
+            retry = {}
+            for failure in response.get('Failed', []):
+                entry_id = failure['Id']
+                if failure.get('SenderFault'):
+                    # The message itself is invalid, sending it again will not help
+                    failed.append({'body': pending[entry_id], 'code': failure.get('Code'), 'message': failure.get('Message')})
+                else:
+                    retry[entry_id] = pending[entry_id]
+
+            pending = retry
+            if not pending:
+                break
+
+        for body in pending.values():
+            failed.append({'body': body, 'code': 'RetriesExhausted', 'message': 'Retries exhausted'})
+
+        return message_ids, failed
+
+    def publish(self, bodies: Iterable[str]) -> PublishResult:
+        """
+        Publish every message body
+
+        :param bodies: message bodies
+        :return: PublishResult
+        """
+        start = time.perf_counter()
+        message_ids = []
+        failed = []
+        batches = 0
+
+        oversized = []
+
+        def sendable():
+            for body in bodies:
+                if len(body.encode('utf-8')) > MAX_BATCH_BYTES:
+                    oversized.append({'body': body, 'code': 'MessageTooLong', 'message': 'Message exceeds 256 KB'})
+                else:
+                    yield body
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch_message_ids, batch_failed in executor.map(self._send_batch, pack_batches(sendable())):
+                message_ids.extend(batch_message_ids)
+                failed.extend(batch_failed)
+                batches += 1
+
+        failed.extend(oversized)
+        return PublishResult(len(message_ids), failed, batches, time.perf_counter() - start, tuple(message_ids))
@@ -0,0 +1,99 @@
+"""
+Bounded LRU cache with per-entry expiry for state kept in warm Lambda containers
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_TTL = 300.0
+
+
+class TTLCache:
+    """
+    Least recently used cache whose entries expire ``ttl`` seconds after they were set
+    """
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL, clock=time.monotonic):
+        """
+        Initialize the cache
+
+        :param max_size: maximum number of entries
+        :param ttl: seconds an entry stays valid
+        :param clock: callable returning the current time in seconds
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Get a value, counting a miss when it is absent or expired
+
+        :param key: cache key
+        :param default: value returned on a miss
+        :return: cached value or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if self.clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Set a value, evicting the least recently used entry when full
+
+        :param key: cache key
+        :param value: value to cache
+        """
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self):
+        """
+        Reset the hit and miss counters
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters along with the hit rate
+
+        :return: dictionary of counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+        }
@@ -1,20 +1,46 @@
+"""
+Invoke tasks to lint, test, package and profile the lambdas and layers
+"""
+
+import logging
 import os
 import shutil
-import tempfile
-import zipfile
-
-from invoke import task
-
-def create_zip_from_directory(c, source_dir, zip_file):
-    """Create a ZIP file from a directory."""
-    c.run(f"echo 'Creating ZIP file {zip_file} from directory {source_dir} ...'")
-    with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as archive:
-        for root, _, files in os.walk(source_dir):
-            for file in files:
-                file_path = str(os.path.join(root, file))
-                archive_name = os.path.relpath(file_path, source_dir)
-                c.run(f"echo 'Adding {file_path} as {archive_name} ...'")
-                archive.write(file_path, archive_name)
+import statistics
+import sys
+
+from invoke import Exit, task
+
+from utils.packaging import (
+    DEFAULT_SIZE_BUDGET,
+    DIST_DIR,
+    PACKAGE_ROOTS,
+    BuildOptions,
+    PackageSizeError,
+    PackageTarget,
+    build_package,
+    build_package_graph,
+    package_sizes,
+)
+from utils.build_graph import discover_build_graph
+from utils.step_function import (
+    DEFAULT_CONFIG_FILE,
+    DEFAULT_DEFINITION_FILE,
+    generate_definition,
+    load_config,
+    render_definition,
+    validate_definition,
+)
+
+# Packaging reports progress through logging; per-file detail is logged at DEBUG
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+# Budget for importing a handler module in a fresh interpreter and invoking it once, in milliseconds.
+# The first invocation of a handler using AWS imports boto3 and builds its clients, about 300 ms
+# of the cold start on a laptop.
+COLD_START_BUDGET_MS = 500
+
+# Packages benchmarks.cold_start imports to stand in for AWS and data.ncaa.com, left out of the import profile
+COLD_START_HARNESS_PACKAGES = ('runpy', 'benchmarks', 'unittest', 'botocore.stub')
 
 @task
 def clean(c):
@@ -62,107 +88,231 @@ def deploy(c):
     """Deploy the project"""
     c.run("echo 'Deploying the project'")
 
-@task
-def pack(c, name):
+def package_target(kind, name):
+    """Return the PackageTarget of a lambda or layer, or None when its directory does not exist."""
+    source_dir = os.path.join(PACKAGE_ROOTS[kind], name)
+    if not os.path.isdir(source_dir):
+        print(f"{kind.capitalize()} directory {source_dir} does not exist.")
+        return None
+    return PackageTarget(kind, name, source_dir)
+
+PACK_HELP = {
+    'force': "Rebuild even when the build manifest shows the package is up to date",
+    'prune': "Strip runtime-provided packages, tests, stubs and dist-info from dependencies (default on)",
+    'compile': "Precompile .pyc files with this interpreter",
+    'runtime': "Lambda runtime the .pyc files are for, e.g. python3.12; must match this interpreter",
+    'budget_mb': f"Maximum zipped package size in MB, 0 to disable (default {DEFAULT_SIZE_BUDGET // (1024 * 1024)})",
+}
+
+PACK_ALL_HELP = {
+    **PACK_HELP,
+    'jobs': "Number of parallel build processes (default: number of CPUs)",
+}
+
+def build_options(prune, compile, runtime, budget_mb):  # pylint: disable=redefined-builtin
+    """Return the BuildOptions for the command line options of the pack tasks."""
+    return BuildOptions(
+        prune=prune,
+        compile_bytecode=compile,
+        runtime=runtime,
+        size_budget=int(float(budget_mb) * 1024 * 1024),
+    )
+
+def run_build(function, *args, **kwargs):
+    """Run a build function, turning a blown size budget into a failed task."""
+    try:
+        return function(*args, **kwargs)
+    except PackageSizeError as e:
+        raise Exit(str(e), code=1) from e
+
+@task(help=PACK_HELP)
+def pack(c, name, force=False, prune=True, compile=False, runtime=None,  # pylint: disable=redefined-builtin
+         budget_mb=DEFAULT_SIZE_BUDGET // (1024 * 1024)):
     """Package a Lambda function by name"""
-    lambda_dir = f"lambdas/{name}"
-    zip_file = f"dist/{name}.zip"
-
-    if not os.path.exists(lambda_dir):
-        c.run(f"echo 'Lambda directory {lambda_dir} does not exist.'")
-        return
-
-    if not os.path.exists('dist'):
-        os.makedirs('dist')
-
-    with tempfile.TemporaryDirectory() as staging_dir:
-        for root, dirs, files in os.walk(lambda_dir):
-            for current_dir in dirs:
-                src_dir = os.path.join(root, current_dir)
-                dst_dir = os.path.join(staging_dir, os.path.relpath(src_dir, lambda_dir))
-
-                if '__pycache__' in dst_dir:
-                    continue
-
-                if not os.path.exists(dst_dir):
-                    c.run(f"echo 'Creating directory {dst_dir} ...'")
-                    os.makedirs(dst_dir)
-
-            for current_file in files:
-                if current_file == 'requirements.txt':
-                    continue
-
-                src_file = os.path.join(root, current_file)
-                dst_file = os.path.join(staging_dir, os.path.relpath(src_file, lambda_dir))
-
-                c.run(f"echo 'Copying {src_file} to {dst_file} ...'")
-                shutil.copy2(src_file, dst_file)
-
-        requirements_path = os.path.join(lambda_dir, 'requirements.txt')
-        if os.path.exists(requirements_path):
-            c.run(f"pip install --target {staging_dir} --upgrade -r {requirements_path} -v")
-
-        create_zip_from_directory(c, staging_dir, zip_file)
+    target = package_target('lambda', name)
+    if target is not None:
+        run_build(build_package, target, force=force, options=build_options(prune, compile, runtime, budget_mb))
 
-@task
-def pack_layer(c, name):
+@task(help=PACK_HELP)
+def pack_layer(c, name, force=False, prune=True, compile=False, runtime=None,  # pylint: disable=redefined-builtin
+               budget_mb=DEFAULT_SIZE_BUDGET // (1024 * 1024)):
     """Package a Lambda layer by name"""
-    layer_dir = f"layers/{name}"
-    zip_file = f"dist/{name}.zip"
-
-    if not os.path.exists(layer_dir):
-        c.run(f"echo 'Layer directory {layer_dir} does not exist.'")
-        return
-
-    if not os.path.exists('dist'):
-        os.makedirs('dist')
-
-    with tempfile.TemporaryDirectory() as staging_dir:
-        for root, dirs, files in os.walk(layer_dir):
-            for current_file in files:
-                src_file = os.path.join(root, current_file)
-                dst_file = os.path.join(staging_dir, os.path.relpath(src_file, layer_dir))
-
-                c.run(f"echo 'Copying {src_file} to {dst_file} ...'")
-                shutil.copy2(src_file, dst_file)
-
-        requirements_path = os.path.join(layer_dir, 'requirements.txt')
-        if os.path.exists(requirements_path):
-            c.run(f"pip install --target {staging_dir} --upgrade -r {requirements_path} -v")
-
-        create_zip_from_directory(c, staging_dir, zip_file)
-
-@task(pre=[clean])
-def pack_all(c):
-    """Package all Lambda functions"""
-    lambdas_dir = 'lambdas'
-
-    if not os.path.exists(lambdas_dir):
-        print(f"Lambdas directory '{lambdas_dir}' does not exist.")
+    target = package_target('layer', name)
+    if target is not None:
+        run_build(build_package, target, force=force, options=build_options(prune, compile, runtime, budget_mb))
+
+def pack_graph(kind, jobs, force, options):
+    """Build the packages of one kind whose inputs changed, after the layers they import."""
+    graph = discover_build_graph()
+    if not graph.packages(kind):
+        print(f"No {kind} directories found.")
         return
 
-    for name in os.listdir(lambdas_dir):
-        c.run(f"echo 'Packaging {name} ...'")
-        lambda_dir = os.path.join(lambdas_dir, name)
-        if os.path.isdir(lambda_dir):
-            pack(c, name)
-
-@task(pre=[clean])
-def pack_all_layers(c):
+    dependencies = graph.subgraph(kind)
+    for target, requires in sorted(dependencies.items()):
+        if requires:
+            print(f"{target.name} depends on {', '.join(layer.name for layer in requires)}")
+    run_build(build_package_graph, dependencies, jobs=int(jobs) or None, force=force, options=options)
+
+# Archives in dist/ are kept between runs so unchanged packages can be skipped; run clean to start over
+@task(help=PACK_ALL_HELP)
+def pack_all(c, jobs=0, force=False, prune=True, compile=False, runtime=None,  # pylint: disable=redefined-builtin
+             budget_mb=DEFAULT_SIZE_BUDGET // (1024 * 1024)):
+    """Package all Lambda functions and the layers they import"""
+    pack_graph('lambda', jobs, force, build_options(prune, compile, runtime, budget_mb))
+
+@task(help=PACK_ALL_HELP)
+def pack_all_layers(c, jobs=0, force=False, prune=True, compile=False, runtime=None,  # pylint: disable=redefined-builtin
+                    budget_mb=DEFAULT_SIZE_BUDGET // (1024 * 1024)):
     """Package all Lambda layers"""
-    layers_dir = 'layers'
+    pack_graph('layer', jobs, force, build_options(prune, compile, runtime, budget_mb))
+
+@task(help={'top': "Number of packages to show per archive"})
+def size_report(c, top=10):
+    """Show how much each package contributes to the archives in dist/"""
+    zip_files = sorted(name for name in os.listdir(DIST_DIR) if name.endswith('.zip')) if os.path.isdir(DIST_DIR) else []
+    if not zip_files:
+        print(f"No archives in '{DIST_DIR}', run the pack tasks first.")
+        return
 
-    if not os.path.exists(layers_dir):
-        print(f"Layers directory '{layers_dir}' does not exist.")
+    for name in zip_files:
+        zip_file = os.path.join(DIST_DIR, name)
+        sizes = package_sizes(zip_file)
+        total_compressed = sum(compressed for _, compressed, _ in sizes) or 1
+        print(f"{name}: {os.path.getsize(zip_file) / 1024:.1f} KB")
+        for package, compressed, uncompressed in sizes[:int(top)]:
+            print(f"    {compressed / 1024:10.1f} KB {uncompressed / 1024:10.1f} KB unzipped "
+                  f"{compressed / total_compressed:6.1%}  {package}")
+
+def parse_importtime(output, excluded=()):
+    """Parse the stderr of python -X importtime into (self_us, cumulative_us, module) tuples.
+
+    Imports made while the interpreter starts up, up to and including site, are left out,
+    as are the top-level imports of an excluded package and everything they import.
+    """
+    entries = []
+    # Nested imports are reported before the top-level import they belong to
+    pending = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        if module.rstrip() == ' site':
+            entries = []
+            pending = []
+            continue
+        pending.append((int(self_us), int(cumulative_us), module.rstrip()))
+        if not module.startswith('  '):
+            name = module.strip()
+            if not any(name == package or name.startswith(f"{package}.") for package in excluded):
+                entries.extend(pending)
+            pending = []
+    return entries
+
+def time_cold_start(c, name, env, repeat):
+    """Median cold start, import and first invocation times of a lambda over fresh interpreters, in milliseconds"""
+    runs = [
+        [float(value) for value in c.run(f'"{sys.executable}" -m benchmarks.cold_start {name}', env=env, hide=True).stdout.split()]
+        for _ in range(repeat)
+    ]
+    return (
+        statistics.median(import_ms + invocation_ms for import_ms, invocation_ms in runs),
+        statistics.median(import_ms for import_ms, _ in runs),
+        statistics.median(invocation_ms for _, invocation_ms in runs),
+    )
+
+@task(help={
+    'budget': f"Maximum handler import plus first invocation time in milliseconds (default {COLD_START_BUDGET_MS})",
+    'top': "Number of slowest imports to show per handler",
+    'repeat': "Number of fresh interpreters used to time each handler",
+})
+def cold_start(c, budget=COLD_START_BUDGET_MS, top=10, repeat=5):
+    """Profile the cold start of every Lambda handler and fail when one exceeds the budget
+
+    A cold start is the import of the handler plus its first invocation, with SQS, DynamoDB
+    and data.ncaa.com replaced by the local stand-ins in benchmarks/.
+    """
+    env = {'PYTHONPATH': os.pathsep.join(['.', 'layers'])}
+    over_budget = []
+
+    for name in sorted(os.listdir(PACKAGE_ROOTS['lambda'])):
+        if not os.path.exists(os.path.join(PACKAGE_ROOTS['lambda'], name, 'handler.py')):
+            continue
+
+        # -X importtime slows imports down, so the breakdown and the wall time come from separate runs
+        profile = c.run(f'"{sys.executable}" -X importtime -m benchmarks.cold_start {name}', env=env, hide=True, warn=True)
+        if profile.failed:
+            print(f"{name}: cold start failed\n{profile.stderr}")
+            over_budget.append(name)
+            continue
+
+        cold_start_ms, import_ms, invocation_ms = time_cold_start(c, name, env, int(repeat))
+        status = 'OK' if cold_start_ms <= float(budget) else 'OVER BUDGET'
+        print(f"{name}: {cold_start_ms:.1f} ms cold start, {import_ms:.1f} ms import and {invocation_ms:.1f} ms first invocation "
+              f"(budget {float(budget):.0f} ms) {status}")
+        for self_us, cumulative_us, module in sorted(parse_importtime(profile.stderr, COLD_START_HARNESS_PACKAGES), key=lambda e: -e[1])[:int(top)]:
+            print(f"    {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {module.strip()}")
+
+        if cold_start_ms > float(budget):
+            over_budget.append(name)
+
+    if over_budget:
+        raise Exit(f"Cold start budget exceeded by: {', '.join(over_budget)}", code=1)
+
+@task(help={
+    'games': "Games on every synthetic scoreboard",
+    'days': "Number of dates to fetch, six scoreboards each",
+    'rounds': "Times every scoreboard is fetched",
+    'latency': "Latency of the fake scoreboard server in seconds",
+    'aws_latency': "Latency of the fake SQS and DynamoDB calls in seconds",
+    'not_found_rate': "Share of scoreboard requests answered with 404",
+    'throttle_rate': "Share of scoreboard requests answered with 429",
+    'micro': "Also run the connection pool and Match micro-benchmarks",
+})
+def bench(c, games=100, days=7, rounds=2, latency=0.0, aws_latency=0.0, not_found_rate=0.0, throttle_rate=0.0,
+          micro=False):
+    """Benchmark the fetch, process and ingest lambdas end to end against local stand-ins"""
+    c.run(
+        f'"{sys.executable}" -m benchmarks.bench_pipeline --games {games} --days {days} --rounds {rounds} '
+        f'--latency {latency} --aws-latency {aws_latency} '
+        f'--not-found-rate {not_found_rate} --throttle-rate {throttle_rate}'
+    )
+
+    if micro:
+        c.run(f'"{sys.executable}" -m benchmarks.bench_http_pool')
+        c.run(f'"{sys.executable}" -m benchmarks.bench_match')
+
+@task(help={
+    'config': f"Generator configuration (default {DEFAULT_CONFIG_FILE})",
+    'output': f"Definition file to write (default {DEFAULT_DEFINITION_FILE})",
+    'check': "Only check that the definition file is valid and up to date with the configuration",
+})
+def step_function(c, config=DEFAULT_CONFIG_FILE, output=DEFAULT_DEFINITION_FILE, check=False):
+    """Generate the Step Functions definition from its configuration and validate it"""
+    generator_config = load_config(config)
+    definition = generate_definition(generator_config)
+
+    problems = validate_definition(definition, generator_config)
+    if problems:
+        raise Exit("Invalid state machine definition:\n  " + "\n  ".join(problems), code=1)
+
+    batches = definition['States']['PlanTargets']['Result']
+    targets = sum(len(batch['targets']) for batch in batches)
+    print(f"{targets} targets in {len(batches)} invocations, at most {generator_config.max_concurrency} at a time")
+
+    rendered = render_definition(definition)
+    if check:
+        with open(output, encoding='utf-8') as file:
+            if file.read() != rendered:
+                raise Exit(f"{output} is out of date, run 'invoke step-function'", code=1)
+        print(f"{output} is up to date")
         return
 
-    for name in os.listdir(layers_dir):
-        c.run(f"echo 'Packaging {name} ...'")
-        layer_dir = os.path.join(layers_dir, name)
-        if os.path.isdir(layer_dir):
-            pack_layer(c, name)
+    with open(output, 'w', encoding='utf-8') as file:
+        file.write(rendered)
+    print(f"Wrote {output}")
 
 @task(default=True, pre=[build])
 def default(c):
     """Default task"""
-    c.run("echo 'Running the default task'")
\ No newline at end of file
+    c.run("echo 'Running the default task'")
@@ -0,0 +1,57 @@
+"""
+This module contains the fixtures shared by the unit tests.
+"""
+
+import pytest
+
+import driver
+from benchmarks.servers import ScoreboardServer
+from lambdas.fetch_ncaa_matches import handler
+
+
+@pytest.fixture(name="match_data")
+def fixture_match_data():
+    """
+    Dictionary form of a final match, without its fingerprint
+    """
+    return {
+        'id': 5398675,
+        'processTimeEpoch': 1727622904,
+        'startTimeEpoch': 1725206400,
+        'matchState': 'final',
+        'division': 'd1',
+        'gender': 'female',
+        'updatedAt': 1727558443,
+        'awayTeam': 'Eastern Illinois University',
+        'awayScore': 2,
+        'awayConference': 'OVC',
+        'homeTeam': 'Eastern Kentucky University',
+        'homeScore': 2,
+        'homeConference': 'ASUN',
+    }
+
+
+@pytest.fixture(name="driver_server")
+def fixture_driver_server(mocker):
+    """
+    Serve synthetic scoreboards to the driver in place of data.ncaa.com
+    """
+    with ScoreboardServer(games=3) as server:
+        original_generate_url = driver.generate_url
+        mocker.patch.object(
+            driver, "generate_url",
+            lambda gender, division, target_date: original_generate_url(gender, division, target_date).replace(
+                "https://data.ncaa.com", server.base_url),
+        )
+        yield server
+
+
+@pytest.fixture(name="handler_server")
+def fixture_handler_server(mocker):
+    """
+    Serve synthetic scoreboards to the fetch_ncaa_matches lambda in place of data.ncaa.com
+    """
+    with ScoreboardServer(games=3) as server:
+        mocker.patch.object(handler, "generate_url",
+                            lambda gender, division, target_date: f"{server.base_url}/{gender}/{division}/{target_date}")
+        yield server
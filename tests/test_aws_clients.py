@@ -0,0 +1,68 @@
+"""
+This module contains the unit tests for the lazy boto3 clients.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from common_dependencies_layer import aws_clients
+
+
+@pytest.fixture(autouse=True)
+def region(monkeypatch):
+    """
+    Give boto3 a region and start every test without memoized clients
+    """
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    aws_clients.reset_clients()
+    yield
+    aws_clients.reset_clients()
+
+
+def test_clients_are_memoized():
+    """
+    The same client is returned for repeated calls
+    """
+    # Act
+    first = aws_clients.get_client('sqs')
+    second = aws_clients.get_client('sqs')
+
+    # Assert
+    assert first is second
+
+
+def test_tables_share_one_resource():
+    """
+    Tables are memoized and built from the memoized DynamoDB resource
+    """
+    # Act
+    table = aws_clients.get_table('ncaa_match_data')
+
+    # Assert
+    assert aws_clients.get_table('ncaa_match_data') is table
+    assert table.meta.client is aws_clients.get_resource('dynamodb').meta.client
+
+
+test_cases = [
+    "lambdas.fetch_ncaa_matches.handler",
+    "lambdas.process_ncaa_matches.handler",
+    "lambdas.ingest_ncaa_matches.handler",
+]
+
+
+@pytest.mark.parametrize("module", test_cases)
+def test_handler_import_does_not_import_boto3(module):
+    """
+    Importing a handler leaves boto3 unimported until a client is needed
+    """
+    # Arrange
+    code = f"import sys, {module}; print('boto3' in sys.modules)"
+
+    # Act
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            env={'PYTHONPATH': '.:layers'})
+
+    # Assert
+    assert result.stdout.strip() == 'False'
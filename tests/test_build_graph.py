@@ -0,0 +1,143 @@
+"""
+This module contains the unit tests for the build graph.
+"""
+
+import os
+
+import pytest
+
+from utils import discover_build_graph
+from utils import packaging
+from utils.packaging import PackageTarget, build_order, build_package_graph
+
+
+def write(path, content=""):
+    """
+    Write a file, creating its directory
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def make_repository(root):
+    """
+    Create two lambdas, one importing a layer, and two layers
+    """
+    write(os.path.join(root, "lambdas", "fetch", "handler.py"), "from common import Match\nimport json\n")
+    write(os.path.join(root, "lambdas", "hello", "handler.py"), "import requests\n")
+    write(os.path.join(root, "lambdas", "hello", "requirements.txt"), "requests\n")
+    write(os.path.join(root, "layers", "common", "__init__.py"), "from .match import Match\n")
+    write(os.path.join(root, "layers", "common", "match.py"), "class Match:\n    pass\n")
+    write(os.path.join(root, "layers", "unused", "__init__.py"))
+
+
+def names(dependencies):
+    """
+    Package names mapped to the names of their dependencies
+    """
+    return {target.name: [layer.name for layer in requires] for target, requires in dependencies.items()}
+
+
+def test_discover_build_graph(tmp_path):
+    """
+    The observers find the lambdas and layers, their requirements and the layers each imports
+    """
+    # Arrange
+    make_repository(str(tmp_path))
+
+    # Act
+    graph = discover_build_graph(str(tmp_path), cache_file=None)
+
+    # Assert
+    assert [(target.kind, target.name) for target in graph.packages()] == [
+        ("lambda", "fetch"), ("lambda", "hello"), ("layer", "common"), ("layer", "unused"),
+    ]
+    assert names(graph.dependencies) == {"fetch": ["common"], "hello": [], "common": [], "unused": []}
+    hello = graph.targets[("lambda", "hello")]
+    assert graph.requirements(hello) == hello.requirements_path
+    assert graph.requirements(graph.targets[("lambda", "fetch")]) is None
+
+
+def test_packages_outside_the_package_roots_are_ignored(tmp_path):
+    """
+    Handlers in a virtualenv and vendored packages with a layers directory are not taken for packages
+    """
+    # Arrange
+    make_repository(str(tmp_path))
+    write(str(tmp_path / "venv" / "lib" / "python3.11" / "site-packages" / "somepkg" / "handler.py"))
+    write(str(tmp_path / ".tox" / "py311" / "lambdas" / "other" / "handler.py"))
+    write(str(tmp_path / "build" / "layers" / "stale" / "__init__.py"))
+    write(str(tmp_path / "layers" / "common" / "python" / "keras" / "layers" / "core" / "__init__.py"))
+    write(str(tmp_path / "lambdas" / "fetch" / "vendor" / "lambdas" / "nested" / "handler.py"))
+
+    # Act
+    graph = discover_build_graph(str(tmp_path), cache_file=None)
+
+    # Assert
+    assert [(target.kind, target.name) for target in graph.packages()] == [
+        ("lambda", "fetch"), ("lambda", "hello"), ("layer", "common"), ("layer", "unused"),
+    ]
+
+
+@pytest.mark.parametrize("kind, expected", [
+    ("lambda", {"fetch": ["common"], "hello": [], "common": []}),
+    ("layer", {"common": [], "unused": []}),
+])
+def test_subgraph(tmp_path, kind, expected):
+    """
+    A subgraph holds the packages of one kind and the layers they import
+    """
+    # Arrange
+    make_repository(str(tmp_path))
+    graph = discover_build_graph(str(tmp_path), cache_file=None)
+
+    # Act
+    dependencies = graph.subgraph(kind)
+
+    # Assert
+    assert names(dependencies) == expected
+
+
+def test_build_order_and_cycles():
+    """
+    Packages come after their dependencies and a cycle is an error
+    """
+    # Arrange
+    common = PackageTarget("layer", "common", "layers/common")
+    base = PackageTarget("layer", "base", "layers/base")
+    fetch = PackageTarget("lambda", "fetch", "lambdas/fetch")
+
+    # Act
+    generations = build_order({fetch: (common,), common: (base,), base: ()})
+
+    # Assert
+    assert generations == [[base], [common], [fetch]]
+    with pytest.raises(ValueError, match="cycle"):
+        build_order({common: (base,), base: (common,)})
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_only_changed_packages_are_built_in_order(tmp_path, mocker, jobs):
+    """
+    Unchanged packages are not built again and a changed layer is built before the lambdas
+    """
+    # Arrange
+    make_repository(str(tmp_path))
+    os.remove(str(tmp_path / "lambdas" / "hello" / "requirements.txt"))
+    dependencies = discover_build_graph(str(tmp_path), cache_file=None).subgraph("lambda")
+    dist_dir = str(tmp_path / "dist")
+    first = build_package_graph(dependencies, jobs=jobs, dist_dir=dist_dir)
+
+    write(str(tmp_path / "layers" / "common" / "match.py"), "class Match:\n    home = None\n")
+    build_package = mocker.spy(packaging, "build_package")
+
+    # Act
+    second = build_package_graph(dependencies, jobs=1, dist_dir=dist_dir)
+
+    # Assert
+    assert sorted(os.path.basename(zip_file) for zip_file in first.values()) == [
+        "common.zip", "fetch.zip", "hello.zip",
+    ]
+    assert second == first
+    assert [call.args[0].name for call in build_package.call_args_list] == ["common"]
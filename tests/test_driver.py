@@ -0,0 +1,129 @@
+"""
+This module contains the unit tests for the resumable backfill and the scoreboard cache of the driver.
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+import driver
+from benchmarks.aws import FakeSQS
+from driver import BackfillCheckpoint, PendingScoreboardCache, URLIterator, backfill
+
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/000000000000/test-queue"
+
+
+@pytest.fixture(name="scoreboards")
+def fixture_scoreboards(mocker, driver_server):
+    """
+    Serve synthetic scoreboards and send the matches to an in-memory queue
+    """
+    sqs = FakeSQS()
+    mocker.patch.object(driver, "get_client", lambda name: sqs)
+    return driver_server, sqs
+
+
+def targets():
+    """
+    Two genders, one division and three days
+    """
+    return URLIterator(["male", "female"], ["d1"], datetime.date(2024, 9, 1), datetime.date(2024, 9, 3)).targets()
+
+
+def run(checkpoint):
+    """
+    Run a backfill to completion
+    """
+    return asyncio.run(backfill(targets(), QUEUE_URL, checkpoint, total=6, progress_every=2))
+
+
+def test_backfill_sends_and_checkpoints_every_url(tmp_path, scoreboards, capsys):
+    """
+    Every URL is sent and checkpointed with its message ids, and progress is printed as it goes
+    """
+    # Arrange
+    _, sqs = scoreboards
+    checkpoint = BackfillCheckpoint(str(tmp_path / "checkpoint.jsonl"))
+
+    # Act
+    counters = run(checkpoint)
+
+    # Assert
+    assert counters == {"resumed": 0, "completed": 6, "failed": 0, "matches": 18, "sent": 18}
+    assert len(sqs.queues[QUEUE_URL]) == 18
+    assert BackfillCheckpoint(checkpoint.path).sent == 18
+    assert capsys.readouterr().out.count("Progress:") == 3
+
+
+def test_backfill_resumes_after_the_last_completed_url(tmp_path, scoreboards):
+    """
+    A second run skips the URLs the first completed and fetches only the rest
+    """
+    # Arrange
+    server, sqs = scoreboards
+    path = str(tmp_path / "checkpoint.jsonl")
+    first_three = list(targets())[:3]
+    asyncio.run(backfill(iter(first_three), QUEUE_URL, BackfillCheckpoint(path)))
+    fetched = server.statuses[200]
+
+    # Act
+    counters = run(BackfillCheckpoint(path))
+
+    # Assert
+    assert counters["resumed"] == 3
+    assert counters["completed"] == 3
+    assert server.statuses[200] - fetched == 3
+    assert len(sqs.queues[QUEUE_URL]) == 18
+
+
+def test_checkpoint_tolerates_a_cut_off_line(tmp_path):
+    """
+    A line cut short by a killed run is ignored and the next record starts on its own line
+    """
+    # Arrange
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text('{"url":"a","message_ids":["1"]}\n{"url":"b","mess')
+
+    # Act
+    checkpoint = BackfillCheckpoint(str(path))
+    checkpoint.record("c", ["2", "3"])
+    reloaded = BackfillCheckpoint(str(path))
+
+    # Assert
+    assert checkpoint.completed == {"a", "c"}
+    assert reloaded.completed == {"a", "c"}
+    assert reloaded.sent == 3
+
+
+class RejectingSQS(FakeSQS):
+    """
+    SQS client rejecting every message as the sender's fault, so nothing is retried
+    """
+    def send_message_batch(self, QueueUrl, Entries):  # pylint: disable=invalid-name
+        return {
+            'Successful': [],
+            'Failed': [{'Id': entry['Id'], 'SenderFault': True, 'Code': 'AccessDenied', 'Message': 'denied'}
+                       for entry in Entries],
+        }
+
+
+def test_scoreboards_of_a_failed_send_are_fetched_again(tmp_path, mocker, driver_server):
+    """
+    The cache is only written once every match was sent, so the next run sends them all again
+    """
+    # Arrange
+    clients = [RejectingSQS(), FakeSQS()]
+    mocker.patch.object(driver, "get_client", lambda name: clients[0])
+    mocker.patch.object(driver, "FetchPlanner", lambda: None)
+    mocker.patch.object(driver, "PendingScoreboardCache", lambda: PendingScoreboardCache(str(tmp_path / "cache")))
+    argv = ["--genders", "female", "--divisions", "d1", "--start-date", "2024-09-01", "--end-date", "2024-09-03"]
+    driver.main(argv)
+    clients.pop(0)
+
+    # Act
+    driver.main(argv)
+
+    # Assert
+    assert driver_server.statuses[200] == 6
+    assert len(clients[0].queues[driver.QUEUE_URL]) == 9
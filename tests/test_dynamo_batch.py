@@ -0,0 +1,146 @@
+"""
+This module contains the unit tests for the batched DynamoDB reads.
+"""
+
+import pytest
+
+from common_dependencies_layer.dynamo_batch import UnprocessedKeysError, batch_get_items
+
+TABLE_NAME = "ncaa_match_data"
+
+
+class FakeDynamoDB:
+    """
+    Serves batch_get_item from a dictionary, leaving some keys unprocessed
+    """
+    def __init__(self, items, unprocessed_rounds=0):
+        self.items = items
+        self.unprocessed_rounds = unprocessed_rounds
+        self.calls = []
+
+    def batch_get_item(self, RequestItems):  # pylint: disable=invalid-name
+        """
+        Return the requested items, holding back the last key while rounds remain
+        """
+        request = RequestItems[TABLE_NAME]
+        keys = request['Keys']
+        self.calls.append(len(keys))
+
+        unprocessed = []
+        if self.unprocessed_rounds > 0 and len(keys) > 0:
+            self.unprocessed_rounds -= 1
+            unprocessed = keys[-1:]
+            keys = keys[:-1]
+
+        found = [self.items[(key['id'], key['startTimeEpoch'])] for key in keys if (key['id'], key['startTimeEpoch']) in self.items]
+        response = {'Responses': {TABLE_NAME: found}, 'UnprocessedKeys': {}}
+        if unprocessed:
+            response['UnprocessedKeys'] = {TABLE_NAME: {'Keys': unprocessed}}
+        return response
+
+
+def make_items(count):
+    """
+    Build items keyed by (id, startTimeEpoch)
+    """
+    return {(i, 1000 + i): {'id': i, 'startTimeEpoch': 1000 + i, 'matchState': 'final'} for i in range(count)}
+
+
+def test_keys_are_chunked_by_one_hundred():
+    """
+    250 keys are read in three calls
+    """
+    # Arrange
+    items = make_items(250)
+    dynamodb = FakeDynamoDB(items)
+
+    # Act
+    result = batch_get_items(dynamodb, TABLE_NAME, items.keys())
+
+    # Assert
+    assert dynamodb.calls == [100, 100, 50]
+    assert result == items
+
+
+def test_duplicate_keys_are_requested_once():
+    """
+    Repeated keys only appear once in the request
+    """
+    # Arrange
+    items = make_items(3)
+    dynamodb = FakeDynamoDB(items)
+
+    # Act
+    result = batch_get_items(dynamodb, TABLE_NAME, list(items.keys()) * 2)
+
+    # Assert
+    assert dynamodb.calls == [3]
+    assert result == items
+
+
+def test_missing_items_are_absent():
+    """
+    Keys without an item are not in the result
+    """
+    # Arrange
+    dynamodb = FakeDynamoDB(make_items(1))
+
+    # Act
+    result = batch_get_items(dynamodb, TABLE_NAME, [(0, 1000), (5, 1005)])
+
+    # Assert
+    assert list(result.keys()) == [(0, 1000)]
+
+
+def test_unprocessed_keys_are_retried():
+    """
+    Unprocessed keys are requested again until they are served
+    """
+    # Arrange
+    items = make_items(5)
+    dynamodb = FakeDynamoDB(items, unprocessed_rounds=2)
+
+    # Act
+    result = batch_get_items(dynamodb, TABLE_NAME, items.keys(), retry_delay=0)
+
+    # Assert
+    assert dynamodb.calls == [5, 1, 1]
+    assert result == items
+
+
+def test_unprocessed_keys_exhaust_retries():
+    """
+    Keys that stay unprocessed after every retry raise an error
+    """
+    # Arrange
+    items = make_items(2)
+    dynamodb = FakeDynamoDB(items, unprocessed_rounds=10)
+
+    # Act / Assert
+    with pytest.raises(UnprocessedKeysError):
+        batch_get_items(dynamodb, TABLE_NAME, items.keys(), max_retries=2, retry_delay=0)
+
+
+def test_projection_reads_key_and_requested_attributes():
+    """
+    A projection always includes the key attributes and uses placeholders
+    """
+    # Arrange
+    items = make_items(1)
+    requests = []
+
+    class RecordingDynamoDB(FakeDynamoDB):
+        """
+        Keeps the raw requests
+        """
+        def batch_get_item(self, RequestItems):  # pylint: disable=invalid-name
+            requests.append(RequestItems[TABLE_NAME])
+            return super().batch_get_item(RequestItems)
+
+    # Act
+    batch_get_items(RecordingDynamoDB(items), TABLE_NAME, items.keys(), projection=['fingerprint'])
+
+    # Assert
+    request = requests[0]
+    assert sorted(request['ExpressionAttributeNames'].values()) == ['fingerprint', 'id', 'startTimeEpoch']
+    assert request['ProjectionExpression'] == ', '.join(request['ExpressionAttributeNames'])
@@ -0,0 +1,172 @@
+"""
+This module contains the unit tests for the raw feed archive.
+"""
+
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import os
+
+from common_dependencies_layer.feed_archive import INDEX_FILE, ArchivePool, FeedArchive, RecordingReader
+from common_dependencies_layer.fetch_engine import FetchTarget
+
+from benchmarks.servers import SCOREBOARD_UPDATED_AT, synthetic_scoreboard
+from driver import URLIterator, collect_matches
+from lambdas.fetch_ncaa_matches import handler
+
+URL = "https://data.ncaa.com/casablanca/scoreboard/soccer-women/d1/2024/09/01/scoreboard.json"
+TARGET_DATE = datetime.date(2024, 9, 1)
+
+
+def test_unchanged_feed_is_stored_once(tmp_path):
+    """
+    Fetching a feed again stores nothing new and adds no index line until the feed changes
+    """
+    # Arrange
+    archive = FeedArchive(str(tmp_path), clock=lambda: 1727490000)
+    first = synthetic_scoreboard("/first", 3)
+    changed = synthetic_scoreboard("/changed", 3)
+
+    # Act
+    digests = [archive.put(URL, body, "female", "d1", TARGET_DATE) for body in (first, first, changed)]
+
+    # Assert
+    assert digests[0] == digests[1] != digests[2]
+    assert archive.stats() == {"stored": 2, "deduplicated": 1}
+    entries = archive.entries("female", "d1", TARGET_DATE)
+    assert [entry["sha256"] for entry in entries] == [digests[0], digests[2]]
+    assert entries[0]["updated_at"] == SCOREBOARD_UPDATED_AT
+    assert entries[0]["size"] == len(first)
+    assert archive.latest(URL)["sha256"] == digests[2]
+
+
+def test_objects_are_compressed_and_reproducible(tmp_path):
+    """
+    Objects are gzip files named after the hash, and the same feed always compresses to the same bytes
+    """
+    # Arrange
+    body = synthetic_scoreboard("/scoreboard", 50)
+    first = FeedArchive(str(tmp_path / "first"))
+    second = FeedArchive(str(tmp_path / "second"))
+
+    # Act
+    digest = first.put(URL, body)
+    second.put(URL, body)
+
+    # Assert
+    path = os.path.join("objects", digest[:2], f"{digest}.json.gz")
+    with open(tmp_path / "first" / path, "rb") as file:
+        compressed = file.read()
+    with open(tmp_path / "second" / path, "rb") as file:
+        assert file.read() == compressed
+    assert len(compressed) < len(body)
+    assert gzip.decompress(compressed) == body
+    assert first.read(digest) == body
+
+
+def test_index_is_reloaded_and_tolerates_a_cut_off_line(tmp_path):
+    """
+    A new archive picks up the index of an earlier run, ignoring a line cut short by a killed run
+    """
+    # Arrange
+    body = synthetic_scoreboard("/scoreboard", 3)
+    digest = FeedArchive(str(tmp_path)).put(URL, body, "female", "d1", TARGET_DATE)
+    with open(tmp_path / INDEX_FILE, "a", encoding="utf-8") as file:
+        file.write('{"url": "https://data.ncaa.com/cut')
+
+    # Act
+    archive = FeedArchive(str(tmp_path))
+    archive.put(URL, body, "female", "d1", TARGET_DATE)
+
+    # Assert
+    assert archive.latest(URL)["sha256"] == digest
+    assert len(archive.entries()) == 1
+    assert archive.stats() == {"stored": 0, "deduplicated": 1}
+
+
+def test_recording_reader_keeps_what_was_read():
+    """
+    The reader hands out the response and keeps a copy of everything read through it
+    """
+    # Arrange
+    reader = RecordingReader(io.BytesIO(b'{"games": []}'))
+
+    # Act
+    chunks = [reader.read(4), reader.read()]
+
+    # Assert
+    assert b"".join(chunks) == reader.getvalue() == b'{"games": []}'
+    assert reader.tell() == 13
+
+
+def test_archive_pool_serves_archived_feeds_only(tmp_path):
+    """
+    Archived URLs are answered with their latest feed and any other URL with a 404
+    """
+    # Arrange
+    archive = FeedArchive(str(tmp_path))
+    archive.put(URL, synthetic_scoreboard("/scoreboard", 3), "female", "d1", TARGET_DATE)
+    options = handler.FetchOptions(pool=ArchivePool(archive))
+    missing_target = FetchTarget(URL.replace("2024/09/01", "2024/09/02"), "female", "d1", datetime.date(2024, 9, 2))
+
+    # Act
+    matches = handler.fetch_matches(FetchTarget(URL, "female", "d1", TARGET_DATE), options)
+    status, _, missing = handler.request_matches(missing_target, options)
+
+    # Assert
+    assert len(matches) == 3
+    assert {match.gender for match in matches} == {"female"}
+    assert (status, missing) == (404, [])
+
+
+def replayed_match(match) -> str:
+    """
+    JSON of a match without the fields that depend on when it was parsed
+    """
+    return json.dumps({key: value for key, value in match.to_dict().items() if key != "processTimeEpoch"}, sort_keys=True)
+
+
+def test_driver_replays_an_archived_run_without_the_network(tmp_path, driver_server):
+    """
+    Feeds archived during a live run give back the same matches without another request to the server
+    """
+    # Arrange
+    def targets():
+        return URLIterator(["male", "female"], ["d1"], datetime.date(2024, 9, 1), datetime.date(2024, 9, 2)).targets()
+
+    archive = FeedArchive(str(tmp_path))
+    live = asyncio.run(collect_matches(targets(), archive=archive))
+    requests = sum(driver_server.statuses.values())
+
+    # Act
+    replayed = asyncio.run(collect_matches(targets(), pool=ArchivePool(FeedArchive(str(tmp_path)))))
+
+    # Assert
+    assert sum(driver_server.statuses.values()) == requests
+    assert archive.stats() == {"stored": 4, "deduplicated": 0}
+    assert len(live) == 12
+    # processTimeEpoch is the time of parsing, which differs between the runs
+    assert sorted(replayed_match(match) for match in replayed) == sorted(replayed_match(match) for match in live)
+    assert {entry["target_date"] for entry in archive.entries(gender="male")} == {"2024-09-01", "2024-09-02"}
+
+
+def test_lambda_archives_the_feeds_it_fetches(tmp_path, mocker, handler_server):  # pylint: disable=unused-argument
+    """
+    An archive event stores every distinct feed it fetches and reports the counters in the response
+    """
+    # Arrange
+    mocker.patch("common_dependencies_layer.feed_archive.FeedArchive", lambda: FeedArchive(str(tmp_path)))
+    event = {"genders": ["male", "female"], "divisions": ["d1"], "dates": ["2024-09-01"], "archive": True}
+
+    # Act
+    first = handler.lambda_handler(event, {})
+    second = handler.lambda_handler(event, {})
+
+    # Assert
+    assert first["archive"] == {"stored": 2, "deduplicated": 0}
+    assert second["archive"] == {"stored": 0, "deduplicated": 2}
+    assert len(json.loads(second["body"])) == 6
+    entries = FeedArchive(str(tmp_path)).entries(target_date=TARGET_DATE)
+    assert [entry["updated_at"] for entry in entries] == [SCOREBOARD_UPDATED_AT] * 2
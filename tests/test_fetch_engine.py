@@ -0,0 +1,137 @@
+"""
+This module contains the unit tests for the asynchronous fetch engine.
+"""
+
+import asyncio
+import contextvars
+import datetime
+import threading
+import time
+
+import pytest
+
+from common_dependencies_layer.fetch_engine import AsyncFetchEngine, FetchTarget
+
+
+def make_targets(count, host="data.ncaa.com"):
+    """
+    Build a list of distinct targets
+    """
+    day = datetime.date(2024, 9, 1)
+    return [FetchTarget(f"https://{host}/{i}/scoreboard.json", "female", "d1", day) for i in range(count)]
+
+
+def collect(engine, targets):
+    """
+    Run the engine to completion and return its results
+    """
+    async def run():
+        return [result async for result in engine.fetch_all(targets)]
+    return asyncio.run(run())
+
+
+def test_results_carry_their_target():
+    """
+    Every result is paired with the target it was fetched for
+    """
+    # Arrange
+    targets = make_targets(10)
+    engine = AsyncFetchEngine(lambda target: target.url, max_concurrency=3)
+
+    # Act
+    results = collect(engine, targets)
+
+    # Assert
+    assert sorted(result.target for result in results) == sorted(targets)
+    assert all(result.value == result.target.url for result in results)
+
+
+def test_concurrency_is_bounded():
+    """
+    No more than max_concurrency fetches run at the same time
+    """
+    # Arrange
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fetch(_):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.01)
+        with lock:
+            state["active"] -= 1
+
+    engine = AsyncFetchEngine(fetch, max_concurrency=3)
+
+    # Act
+    collect(engine, make_targets(12))
+
+    # Assert
+    assert state["peak"] == 3
+
+
+def test_per_host_rate_limit():
+    """
+    Requests to one host are spaced according to the rate limit
+    """
+    # Arrange
+    engine = AsyncFetchEngine(lambda target: None, max_concurrency=5, requests_per_second=50)
+
+    # Act
+    start = time.monotonic()
+    collect(engine, make_targets(5))
+    elapsed = time.monotonic() - start
+
+    # Assert
+    assert elapsed >= 4 / 50
+
+
+def test_errors_are_reported_per_target():
+    """
+    A failing fetch is returned as an error without stopping the others
+    """
+    # Arrange
+    targets = make_targets(4)
+
+    def fetch(target):
+        if target is targets[1]:
+            raise ValueError("boom")
+        return []
+
+    engine = AsyncFetchEngine(fetch)
+
+    # Act
+    results = collect(engine, targets)
+
+    # Assert
+    errors = [result for result in results if result.error is not None]
+    assert len(results) == 4
+    assert [result.target for result in errors] == [targets[1]]
+
+
+def test_invalid_concurrency():
+    """
+    The concurrency limit must be positive
+    """
+    with pytest.raises(ValueError):
+        AsyncFetchEngine(lambda target: None, max_concurrency=0)
+
+
+def test_fetch_runs_in_the_callers_context():
+    """
+    Context variables set by the caller, such as the invocation's metrics, are visible to the fetch
+    """
+    # Arrange
+    variable = contextvars.ContextVar("variable", default=None)
+    engine = AsyncFetchEngine(lambda target: variable.get(), max_concurrency=2)
+
+    async def run():
+        variable.set("invocation")
+        return [result async for result in engine.fetch_all(make_targets(3))]
+
+    # Act
+    results = asyncio.run(run())
+
+    # Assert
+    assert [result.value for result in results] == ["invocation"] * 3
@@ -2,12 +2,23 @@
 This module contains the unit tests for the fetch_ncaa_matches lambda function.
 """
 
+import http.client
 import json
+import subprocess
+import sys
+import time
 import pytest
 
-from lambdas.fetch_ncaa_matches.handler import lambda_handler
+from common_dependencies_layer import FetchPlanner, get_pool
 
-# Define test cases
+from benchmarks.servers import SCOREBOARD_UPDATED_AT
+from lambdas.fetch_ncaa_matches import handler
+from lambdas.fetch_ncaa_matches.handler import generate_url, lambda_handler, parse_targets
+
+# The feed reports updated_at in local time
+UPDATED_AT = int(time.mktime(time.strptime(SCOREBOARD_UPDATED_AT, "%m-%d-%Y %H:%M:%S")))
+
+# Define test cases, served by the synthetic scoreboard of the handler_server fixture
 test_cases = [
     {
         "name": "Female DI 09/01/2024",
@@ -19,19 +30,34 @@ test_cases = [
         "context": {},
         "expected": {
             "statusCode": 200,
-            "count": 132,
+            "count": 3,
             "matches": [
                 {
-                    "id": 5398675,
-                    "processTimeEpoch": 1727622904,
+                    "id": 635671000,
                     "startTimeEpoch": 1725206400,
+                    "matchState": "live",
+                    "division": "d1",
+                    "gender": "female",
+                    "updatedAt": UPDATED_AT,
+                    "awayTeam": "Away University 0",
+                    "awayScore": "0",
+                    "awayConference": "OVC",
+                    "homeTeam": "Home University 0",
+                    "homeScore": "0",
+                    "homeConference": "ASUN"
+                },
+                {
+                    "id": 635671001,
+                    "startTimeEpoch": 1725206460,
                     "matchState": "final",
-                    "updatedAt": 1727558443,
-                    "awayTeam": "Eastern Illinois University",
-                    "awayScore": 2,
+                    "division": "d1",
+                    "gender": "female",
+                    "updatedAt": UPDATED_AT,
+                    "awayTeam": "Away University 1",
+                    "awayScore": "1",
                     "awayConference": "OVC",
-                    "homeTeam": "Eastern Kentucky University",
-                    "homeScore": 2,
+                    "homeTeam": "Home University 1",
+                    "homeScore": "1",
                     "homeConference": "ASUN"
                 }
             ]
@@ -42,9 +68,9 @@ test_cases = [
 
 
 @pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
-def test_lambda_handler(test_case):
+def test_lambda_handler(test_case, handler_server):  # pylint: disable=unused-argument
     """
-    Test the lambda_handler function
+    Test the lambda_handler function against the synthetic scoreboard
 
     :param test_case:
     :return:
@@ -67,21 +93,163 @@ def test_lambda_handler(test_case):
     actual_count = len(data)
     expected_count = expected.get("count")
 
-    expected_matches = expected.get("matches")
-
     assert actual_status == expected_status, f"Expected status {expected_status} got {actual_status}"
     assert actual_count == expected_count, f"Expected count {expected_count} got {actual_count}"
 
-    for i, match in enumerate(expected_matches):
-        expected_match = expected_matches[i]
-        assert match.get("id") == expected_match.get("id"), f"Expected id {expected_match.get('id')} got {match.get('id')}"
-        assert match.get("processTimeEpoch") == expected_match.get("processTimeEpoch"), f"Expected processTimeEpoch {expected_match.get('processTimeEpoch')} got {match.get('processTimeEpoch')}"
-        assert match.get("startTimeEpoch") == expected_match.get("startTimeEpoch"), f"Expected startTimeEpoch {expected_match.get('startTimeEpoch')} got {match.get('startTimeEpoch')}"
-        assert match.get("matchState") == expected_match.get("matchState"), f"Expected matchState {expected_match.get('matchState')} got {match.get('matchState')}"
-        assert match.get("updatedAt") == expected_match.get("updatedAt"), f"Expected updatedAt {expected_match.get('updatedAt')} got {match.get('updatedAt')}"
-        assert match.get("awayTeam") == expected_match.get("awayTeam"), f"Expected awayTeam {expected_match.get('awayTeam')} got {match.get('awayTeam')}"
-        assert match.get("awayScore") == expected_match.get("awayScore"), f"Expected awayScore {expected_match.get('awayScore')} got {match.get('awayScore')}"
-        assert match.get("awayConference") == expected_match.get("awayConference"), f"Expected awayConference {expected_match.get('awayConference')} got {match.get('awayConference')}"
-        assert match.get("homeTeam") == expected_match.get("homeTeam"), f"Expected homeTeam {expected_match.get('homeTeam')} got {match.get('homeTeam')}"
-        assert match.get("homeScore") == expected_match.get("homeScore"), f"Expected homeScore {expected_match.get('homeScore')} got {match.get('homeScore')}"
-        assert match.get("homeConference") == expected_match.get("homeConference"), f"Expected homeConference {expected_match.get('homeConference')} got {match.get('homeConference')}"
+    for match, expected_match in zip(data, expected.get("matches")):
+        assert {key: match.get(key) for key in expected_match} == expected_match
+        assert match.get("processTimeEpoch") is not None
+
+
+@pytest.mark.parametrize("event, expected", [
+    (
+        {"targets": [{"gender": "female", "division": "d1", "target_date": "2024-09-01"}]},
+        [("female", "d1", "2024-09-01")],
+    ),
+    (
+        {"genders": ["male", "female"], "divisions": ["d1"], "start_date": "2024-09-01", "end_date": "2024-09-02"},
+        [("male", "d1", "2024-09-01"), ("female", "d1", "2024-09-01"),
+         ("male", "d1", "2024-09-02"), ("female", "d1", "2024-09-02")],
+    ),
+    (
+        {"genders": ["female"], "divisions": ["d1", "d2"], "dates": ["2024-09-02"]},
+        [("female", "d1", "2024-09-02"), ("female", "d2", "2024-09-02")],
+    ),
+    (
+        {"reference_date": "2024-09-02", "targets": [{"gender": "male", "division": "d2", "day_offset": 1}]},
+        [("male", "d2", "2024-09-01")],
+    ),
+])
+def test_parse_targets(event, expected):
+    """
+    Listed targets and gender, division and date specs give targets in driver order
+    """
+    # Act
+    targets = parse_targets(event)
+
+    # Assert
+    assert [(target.gender, target.division, target.target_date.isoformat()) for target in targets] == expected
+    assert targets[0].url == generate_url(*expected[0][:2], targets[0].target_date)
+
+
+@pytest.mark.parametrize("event", [
+    {"targets": []},
+    {"genders": ["female"], "divisions": ["d4"], "dates": ["2024-09-01"]},
+    {"genders": ["female"], "divisions": ["d1"], "start_date": "2024-09-02", "end_date": "2024-09-01"},
+    {"genders": ["male", "female"], "divisions": ["d1", "d2", "d3"], "start_date": "2024-08-01", "end_date": "2024-12-01"},
+])
+def test_invalid_multi_target_events_are_rejected(event):
+    """
+    Invalid specs and too many targets fail the whole invocation with a 400
+    """
+    # Act
+    response = lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 400
+
+
+def test_multi_target_invocation_shares_the_connection(handler_server):  # pylint: disable=unused-argument
+    """
+    Every target is fetched from one server over the shared keep-alive connections
+    """
+    # Arrange
+    pool = get_pool()
+    pool.clear()
+    created = pool.connections_created
+    event = {"genders": ["male", "female"], "divisions": ["d1", "d2"], "dates": ["2024-09-01", "2024-09-02"],
+             "max_concurrency": 2}
+
+    # Act
+    response = lambda_handler(event, {})
+
+    # Assert
+    results = response["results"]
+    assert response["statusCode"] == 200
+    assert [(result["gender"], result["division"]) for result in results[:4]] == [
+        ("male", "d1"), ("male", "d2"), ("female", "d1"), ("female", "d2"),
+    ]
+    assert all(result["statusCode"] == 200 for result in results)
+    assert len(json.loads(response["body"])) == sum(result["matches"] for result in results) > 0
+    assert pool.connections_created - created <= 2
+
+
+def test_failing_targets_are_reported_per_target(mocker):
+    """
+    A target that fails leaves the others alone and turns the response into a 207
+    """
+    # Arrange
+    def request(target, options):  # pylint: disable=unused-argument
+        if target.division == "d2":
+            raise http.client.RemoteDisconnected("closed")
+        if target.gender == "male":
+            return 404, "Not Found", []
+        return 200, "OK", []
+
+    mocker.patch.object(handler, "request_matches", side_effect=request)
+    event = {"genders": ["female", "male"], "divisions": ["d1", "d2"], "dates": ["2024-09-01"]}
+
+    # Act
+    response = lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 207
+    assert [(result["statusCode"], result.get("error")) for result in response["results"]] == [
+        (200, None),
+        (502, "RemoteDisconnected: closed"),
+        (404, "404 Not Found"),
+        (502, "RemoteDisconnected: closed"),
+    ]
+
+
+def test_planner_skips_empty_and_off_season_targets(tmp_path, mocker):
+    """
+    A scoreboard answered with 404 is skipped by the next invocation, as are off-season dates
+    """
+    # Arrange
+    match = mocker.Mock(to_json=lambda: "{}")
+    request = mocker.patch.object(
+        handler, "request_matches",
+        side_effect=lambda target, options: (404, "Not Found", []) if target.gender == "male" else (200, "OK", [match]),
+    )
+    mocker.patch("common_dependencies_layer.fetch_planner.FetchPlanner",
+                 lambda: FetchPlanner(path=str(tmp_path / "planner.json")))
+    event = {"genders": ["female", "male"], "divisions": ["d1"], "dates": ["2024-10-15", "2024-03-01"], "use_planner": True}
+    lambda_handler(event, {})
+
+    # Act
+    response = lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 200
+    assert [(result["gender"], result["statusCode"], result.get("skipped")) for result in response["results"]] == [
+        ("female", 200, None),
+        ("male", 204, "no games"),
+        ("female", 204, "out of season"),
+        ("male", 204, "out of season"),
+    ]
+    assert request.call_count == 3
+
+
+def test_single_target_invocation_does_not_import_asyncio():
+    """
+    asyncio, the fetch engine and the planner are left to the multi-target events
+    """
+    # Arrange
+    code = (
+        "import sys\n"
+        "from lambdas.fetch_ncaa_matches import handler\n"
+        "from benchmarks.servers import ScoreboardServer\n"
+        "with ScoreboardServer(games=3) as server:\n"
+        "    handler.generate_url = lambda gender, division, target_date: f'{server.base_url}/{gender}/{division}'\n"
+        "    response = handler.lambda_handler({'gender': 'female', 'division': 'd1', 'target_date': '2024-09-01'}, {})\n"
+        "print(response['statusCode'], sorted({'asyncio', 'common_dependencies_layer.fetch_engine',\n"
+        "                                     'common_dependencies_layer.fetch_planner'} & set(sys.modules)))\n"
+    )
+
+    # Act
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            env={'PYTHONPATH': '.:layers'})
+
+    # Assert
+    assert result.stdout.splitlines()[-1] == '200 []'
@@ -0,0 +1,128 @@
+"""
+This module contains the unit tests for the season-aware fetch planner.
+"""
+
+import datetime
+
+import pytest
+
+from common_dependencies_layer.fetch_engine import FetchTarget
+from common_dependencies_layer.fetch_planner import FetchPlanner, SeasonBounds
+
+# Noon on 2024-10-15, in the middle of the season
+NOW = datetime.datetime(2024, 10, 15, 12).timestamp()
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def target(gender="female", division="d1", target_date=datetime.date(2024, 10, 15)):
+    """
+    Build a target with a URL unique to its combination
+    """
+    return FetchTarget(f"https://data.ncaa.com/{gender}/{division}/{target_date}", gender, division, target_date)
+
+
+class Clock:
+    """
+    Clock that only moves when told to
+    """
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("gender, target_date, expected", [
+    ("female", datetime.date(2024, 10, 15), True),
+    ("female", datetime.date(2024, 12, 18), False),
+    ("male", datetime.date(2024, 12, 18), True),
+    ("male", datetime.date(2024, 3, 1), False),
+    ("coed", datetime.date(2024, 3, 1), True),
+])
+def test_in_season(gender, target_date, expected):
+    """
+    Dates outside the season of a gender are not in season; unknown genders always are
+    """
+    # Arrange
+    planner = FetchPlanner(path=None)
+
+    # Act / Assert
+    assert planner.in_season(gender, target_date) is expected
+
+
+def test_plan_skips_off_season_and_empty_days():
+    """
+    Only targets in season and not known to be empty are planned
+    """
+    # Arrange
+    planner = FetchPlanner(path=None, clock=Clock())
+    empty = target(division="d2")
+    planner.record(empty, 0)
+    planner.record(target(division="d3"), 12)
+    targets = [target(), empty, target(division="d3"), target(target_date=datetime.date(2024, 2, 1))]
+
+    # Act
+    planned = list(planner.plan(targets))
+
+    # Assert
+    assert planned == [target(), target(division="d3")]
+    assert planner.stats() == {"planned": 2, "skippedOutOfSeason": 1, "skippedEmpty": 1}
+
+
+@pytest.mark.parametrize("target_date, elapsed, expected", [
+    (datetime.date(2024, 10, 14), 5 * HOUR, "no games"),
+    (datetime.date(2024, 10, 14), 7 * HOUR, None),
+    (datetime.date(2024, 9, 1), 29 * DAY, "no games"),
+    (datetime.date(2024, 9, 1), 31 * DAY, None),
+])
+def test_empty_days_expire(target_date, elapsed, expected):
+    """
+    Empty recent days are fetched again after hours, older ones after a month
+    """
+    # Arrange
+    clock = Clock()
+    planner = FetchPlanner(path=None, clock=clock)
+    empty = target(target_date=target_date)
+    planner.record(empty, 0)
+
+    # Act
+    clock.now += elapsed
+
+    # Assert
+    assert planner.skip_reason(empty) == expected
+
+
+def test_entries_survive_a_new_planner(tmp_path):
+    """
+    Saved entries are loaded by the next planner and expired ones are dropped
+    """
+    # Arrange
+    clock = Clock()
+    path = str(tmp_path / "planner.json")
+    planner = FetchPlanner(path=path, clock=clock)
+    old = target(target_date=datetime.date(2024, 9, 1))
+    recent = target(target_date=datetime.date(2024, 10, 14))
+    planner.record(old, 0)
+    planner.record(recent, 0)
+    clock.now += 7 * HOUR
+
+    # Act
+    planner.save()
+    reloaded = FetchPlanner(path=path, clock=clock)
+
+    # Assert
+    assert list(reloaded.entries) == [old.url]
+    assert reloaded.skip_reason(old) == "no games"
+
+
+def test_custom_seasons():
+    """
+    Season bounds can be given per gender
+    """
+    # Arrange
+    planner = FetchPlanner(path=None, seasons={"female": SeasonBounds((3, 1), (4, 30))})
+
+    # Act / Assert
+    assert planner.skip_reason(target(target_date=datetime.date(2024, 3, 15))) is None
+    assert planner.skip_reason(target(target_date=datetime.date(2024, 10, 15))) == "out of season"
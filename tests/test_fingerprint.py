@@ -0,0 +1,64 @@
+"""
+This module contains the unit tests for the match fingerprint.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from common_dependencies_layer.fingerprint import match_fingerprint
+
+
+# Define test cases
+test_cases = [
+    {"name": "Process time ignored", "changes": {'processTimeEpoch': 1}, "same": True},
+    {"name": "Updated at ignored", "changes": {'updatedAt': 1}, "same": True},
+    {"name": "Extra field ignored", "changes": {'messageId': 'abc'}, "same": True},
+    {"name": "Score change", "changes": {'homeScore': 3}, "same": False},
+    {"name": "State change", "changes": {'matchState': 'live'}, "same": False},
+    {"name": "Conference removed", "changes": {'awayConference': None}, "same": False},
+]
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_match_fingerprint(match_data, test_case):
+    """
+    Only validated fields change the fingerprint
+    """
+    # Arrange
+    changed = {**match_data, **test_case["changes"]}
+
+    # Act
+    same = match_fingerprint(changed) == match_fingerprint(match_data)
+
+    # Assert
+    assert same == test_case["same"]
+
+
+def test_fingerprint_ignores_key_order(match_data):
+    """
+    The fingerprint does not depend on the order of the dictionary keys
+    """
+    # Arrange
+    reordered = dict(reversed(list(match_data.items())))
+
+    # Act / Assert
+    assert match_fingerprint(reordered) == match_fingerprint(match_data)
+
+
+stable_cases = [
+    {"name": "Plain match", "changes": {}, "digest": "b3a12285e7bd17efc2d548ed8dc23705"},
+    {
+        "name": "Decimal, escaped and null values",
+        "changes": {'homeScore': Decimal('1.5'), 'awayTeam': 'Universidad Autónoma "A"', 'awayConference': None},
+        "digest": "325f01cfd099d8faaf92bfa0a082c40f",
+    },
+]
+
+
+@pytest.mark.parametrize("test_case", stable_cases, ids=[tc["name"] for tc in stable_cases])
+def test_fingerprint_is_stable(match_data, test_case):
+    """
+    Fingerprints stored in DynamoDB stay valid, so the digest of a match never changes
+    """
+    assert match_fingerprint({**match_data, **test_case["changes"]}) == test_case["digest"]
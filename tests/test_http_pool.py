@@ -0,0 +1,107 @@
+"""
+This module contains the unit tests for the shared HTTP connection pool.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from common_dependencies_layer.http_pool import HTTPConnectionPool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """
+    Handler that keeps connections open and echoes the request path
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Echo the path
+        """
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        # Drop the connection without announcing it, like a server-side idle timeout
+        if self.path.startswith('/close'):
+            self.close_connection = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence the access log
+        """
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    """
+    Run a keep-alive HTTP server for the duration of a test
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(pool, server, path):
+    """
+    Perform a GET and return the status and body
+    """
+    host, port = server.server_address[:2]
+    with pool.request("GET", f"http://{host}:{port}{path}") as response:
+        return response.status, response.read()
+
+
+def test_connection_is_reused(server):
+    """
+    Sequential requests to the same host share a single connection
+    """
+    # Arrange
+    pool = HTTPConnectionPool()
+
+    # Act
+    results = [get(pool, server, f"/{i}") for i in range(3)]
+
+    # Assert
+    assert results == [(200, b"/0"), (200, b"/1"), (200, b"/2")]
+    assert pool.connections_created == 1
+    assert pool.connections_reused == 2
+
+
+def test_idle_connection_is_evicted(server):
+    """
+    Connections idle for longer than the idle timeout are not reused
+    """
+    # Arrange
+    pool = HTTPConnectionPool(idle_timeout=-1)
+
+    # Act
+    get(pool, server, "/a")
+    get(pool, server, "/b")
+
+    # Assert
+    assert pool.connections_created == 2
+    assert pool.connections_reused == 0
+
+
+def test_stale_connection_is_replaced(server):
+    """
+    A pooled connection closed underneath the pool is transparently reopened
+    """
+    # Arrange
+    pool = HTTPConnectionPool()
+    get(pool, server, "/close")
+
+    # Act
+    status, body = get(pool, server, "/b")
+
+    # Assert
+    assert (status, body) == (200, b"/b")
+    assert pool.connections_created == 2
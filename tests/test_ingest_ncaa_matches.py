@@ -0,0 +1,95 @@
+"""
+This module contains the unit tests for the ingest_ncaa_matches lambda.
+"""
+
+import json
+
+import pytest
+
+from benchmarks.aws import ClientError, FakeDynamoDB, sqs_event
+from lambdas.ingest_ncaa_matches import handler
+
+
+def message(match_id: int, updated_at: int = 1727558443, home_score: int = 1) -> str:
+    """
+    Body of a queued match
+    """
+    return json.dumps({
+        "id": match_id, "startTimeEpoch": 1725206400, "updatedAt": updated_at, "matchState": "final",
+        "gender": "male", "division": "d2", "homeTeam": "Home", "homeScore": home_score, "homeConference": "GLIAC",
+        "awayTeam": "Away", "awayScore": 0, "awayConference": "GLVC",
+    })
+
+
+@pytest.fixture(name="table")
+def fixture_table(mocker):
+    """
+    Patch in an empty in-memory match table
+    """
+    table = FakeDynamoDB().Table(handler.table_name)
+    mocker.patch.object(handler, "get_table", lambda name: table)
+    return table
+
+
+def test_duplicate_records_collapse_to_one_write(table):
+    """
+    Several copies of a match are written once, with the most recent copy
+    """
+    # Arrange
+    event = sqs_event([
+        ("m1", message(1, updated_at=1727558443, home_score=1)),
+        ("m2", message(1, updated_at=1727559000, home_score=2)),
+        ("m3", message(1, updated_at=1727558000, home_score=3)),
+        ("m4", message(2)),
+    ])
+
+    # Act
+    response = handler.lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 200
+    assert not response["batchItemFailures"]
+    assert table.dynamodb.calls == 1
+    assert sorted(table.items) == [(1, 1725206400), (2, 1725206400)]
+    assert table.items[(1, 1725206400)]["homeScore"] == 2
+
+
+def test_malformed_record_is_reported_while_the_rest_is_written(table):
+    """
+    A record that cannot be parsed is the only one reported in batchItemFailures
+    """
+    # Arrange
+    event = sqs_event([("m1", message(1)), ("m2", "{not json"), ("m3", json.dumps({"id": 3})), ("m4", message(4))])
+
+    # Act
+    response = handler.lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 500
+    assert response["batchItemFailures"] == [{"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}]
+    assert sorted(table.items) == [(1, 1725206400), (4, 1725206400)]
+    assert json.loads(response["body"]) == "Inserted 2 of 4 records"
+
+
+test_cases = [
+    {"name": "Client error", "error": ClientError("Requested resource not found")},
+    {"name": "Unexpected error", "error": RuntimeError("Connection pool is full")},
+]
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[test_case["name"] for test_case in test_cases])
+def test_failed_write_reports_every_message(table, mocker, test_case):
+    """
+    When the batch cannot be written, every message of every parsed match is reported
+    """
+    # Arrange
+    mocker.patch.object(table, "batch_writer", side_effect=test_case["error"])
+    event = sqs_event([("m1", message(1)), ("m2", message(1)), ("m3", "{not json"), ("m4", message(2))])
+
+    # Act
+    response = handler.lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 500
+    assert sorted(failure["itemIdentifier"] for failure in response["batchItemFailures"]) == ["m1", "m2", "m3", "m4"]
+    assert not table.items
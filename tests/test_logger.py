@@ -0,0 +1,134 @@
+"""
+This module contains the unit tests for the JSON logger.
+"""
+
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from common_dependencies_layer.logger import DEBUG, ERROR, INFO, WARNING, JSONLogger
+
+
+class CountingValue:
+    """
+    Counts how often it is formatted
+    """
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "value"
+
+
+def make_logger(**kwargs):
+    """
+    Logger writing to a buffer
+    """
+    stream = io.StringIO()
+    return JSONLogger("test", stream=stream, **kwargs), stream
+
+
+def lines(stream):
+    """
+    Decode the lines written to a buffer
+    """
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_lines_are_json_with_fields():
+    """
+    A line carries the level, logger name, formatted message, request id and extra fields
+    """
+    # Arrange
+    logger, stream = make_logger(level=INFO, debug_sample_rate=0)
+    logger.start_invocation(SimpleNamespace(aws_request_id="abc"))
+
+    # Act
+    logger.info("Inserted %d matches", 3, table="ncaa_match_data")
+
+    # Assert
+    line = lines(stream)[0]
+    assert line["level"] == "INFO"
+    assert line["logger"] == "test"
+    assert line["message"] == "Inserted 3 matches"
+    assert line["requestId"] == "abc"
+    assert line["table"] == "ncaa_match_data"
+
+
+def test_disabled_messages_are_not_formatted():
+    """
+    Arguments of a message below the level are never formatted
+    """
+    # Arrange
+    logger, stream = make_logger(level=INFO, debug_sample_rate=0)
+    value = CountingValue()
+
+    # Act
+    logger.debug("Processing %s", value)
+
+    # Assert
+    assert value.formatted == 0
+    assert stream.getvalue() == ""
+
+
+test_cases = [
+    {"name": "Debug", "level": DEBUG, "expected": ["DEBUG", "INFO", "WARNING", "ERROR"]},
+    {"name": "Info", "level": INFO, "expected": ["INFO", "WARNING", "ERROR"]},
+    {"name": "Warning", "level": WARNING, "expected": ["WARNING", "ERROR"]},
+    {"name": "Error", "level": ERROR, "expected": ["ERROR"]},
+]
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_level_gates_messages(test_case):
+    """
+    Only messages at or above the level are written
+    """
+    # Arrange
+    logger, stream = make_logger(level=test_case["level"], debug_sample_rate=0)
+
+    # Act
+    logger.debug("debug")
+    logger.info("info")
+    logger.warning("warning")
+    logger.error("error")
+
+    # Assert
+    assert [line["level"] for line in lines(stream)] == test_case["expected"]
+
+
+def test_sampled_invocation_logs_debug():
+    """
+    A sampled invocation logs at DEBUG and the next one goes back to the configured level
+    """
+    # Arrange
+    samples = iter([0.05, 0.5])
+    logger, stream = make_logger(level=INFO, debug_sample_rate=0.1, sampler=lambda: next(samples))
+
+    # Act
+    sampled = logger.start_invocation()
+    logger.debug("first")
+    not_sampled = logger.start_invocation()
+    logger.debug("second")
+
+    # Assert
+    assert (sampled, not_sampled) == (True, False)
+    assert [line["message"] for line in lines(stream)] == ["first"]
+
+
+def test_level_from_environment(monkeypatch):
+    """
+    LOG_LEVEL sets the default level
+    """
+    # Arrange
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+
+    # Act
+    logger = JSONLogger("test")
+
+    # Assert
+    assert not logger.is_enabled_for(INFO)
+    assert logger.is_enabled_for(WARNING)
@@ -0,0 +1,151 @@
+"""
+This module contains the unit tests for the shared Match record.
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from common_dependencies_layer.fingerprint import match_fingerprint
+from common_dependencies_layer.match import Match
+
+GAME = {
+    "gameID": "5398675",
+    "startTimeEpoch": "1725206400",
+    "gameState": "final",
+    "away": {"score": 2, "names": {"full": "Eastern Illinois University"}, "conferences": [{"conferenceName": "OVC"}]},
+    "home": {"score": 2, "names": {"full": "Eastern Kentucky University"}, "conferences": [{"conferenceName": "ASUN"}]},
+}
+
+# Define test cases
+test_cases = [
+    {"name": "Missing home", "game": {**GAME, "home": None}},
+    {"name": "Missing away", "game": {**GAME, "away": None}},
+    {"name": "Missing names", "game": {**GAME, "home": {"score": 1}}},
+]
+
+
+def test_from_feed(match_data):
+    """
+    A feed game is turned into a match with every field populated
+    """
+    # Act
+    match = Match.from_feed(GAME, "female", "d1", 1727558443, process_time=1727622904)
+
+    # Assert
+    assert match.to_dict() == {**match_data, 'fingerprint': match.fingerprint}
+    assert match.key == (5398675, 1725206400)
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_from_feed_incomplete_game(test_case):
+    """
+    Games without both teams are skipped
+    """
+    assert Match.from_feed(test_case["game"], "female", "d1", 0) is None
+
+
+def test_fingerprint_matches_dictionary_fingerprint():
+    """
+    The record and its dictionary form have the same fingerprint
+    """
+    # Arrange
+    match = Match.from_feed(GAME, "female", "d1", 1727558443)
+
+    # Act / Assert
+    assert match.fingerprint == match_fingerprint(match.to_dict())
+
+
+def test_json_round_trip():
+    """
+    A match survives being sent through a queue
+    """
+    # Arrange
+    match = Match.from_feed(GAME, "female", "d1", 1727558443, process_time=1727622904)
+
+    # Act
+    received = Match.from_message(json.loads(match.to_json()))
+
+    # Assert
+    assert received == match
+
+
+json_cases = [
+    {"name": "From the feed", "message_id": None, "process_time": 1727622904, "changes": {}},
+    {"name": "From a message", "message_id": "message-1", "process_time": 1727622904, "changes": {}},
+    {"name": "No optional fields", "message_id": None, "process_time": None, "changes": {}},
+    {"name": "String score", "message_id": None, "process_time": 1, "changes": {"homeScore": "2"}},
+    {"name": "Float score", "message_id": None, "process_time": 1, "changes": {"awayScore": 1.5}},
+    {"name": "Decimal score", "message_id": None, "process_time": 1, "changes": {"awayScore": Decimal("1.5")}},
+    {"name": "Boolean score", "message_id": None, "process_time": 1, "changes": {"awayScore": True}},
+    {"name": "Escaped team", "message_id": None, "process_time": 1, "changes": {"homeTeam": 'Universidad Autónoma "A"\n'}},
+    {"name": "Missing values", "message_id": None, "process_time": 1, "changes": {"matchState": None, "homeScore": None}},
+]
+
+
+@pytest.mark.parametrize("test_case", json_cases, ids=[tc["name"] for tc in json_cases])
+def test_to_json_matches_the_encoded_dictionary(test_case):
+    """
+    Serializing from the slots gives the same text as encoding the dictionary form
+    """
+    # Arrange
+    body = {**Match.from_feed(GAME, "female", "d1", 1727558443).to_dict(), **test_case["changes"]}
+    match = Match.from_message(body, test_case["message_id"])
+    match.processTimeEpoch = test_case["process_time"]
+
+    # Act
+    text = match.to_json()
+
+    # Assert
+    assert text == json.dumps(match.to_dict(), default=str)
+
+
+def test_from_message_overrides():
+    """
+    The SQS message id and processing time replace the ones in the body
+    """
+    # Arrange
+    body = json.loads(Match.from_feed(GAME, "female", "d1", 1727558443, process_time=1).to_json())
+
+    # Act
+    match = Match.from_message(body, "message-1", process_time=2)
+
+    # Assert
+    assert (match.messageId, match.processTimeEpoch) == ("message-1", 2)
+
+
+def test_from_message_missing_field():
+    """
+    A message without a required field is rejected
+    """
+    # Arrange
+    body = json.loads(Match.from_feed(GAME, "female", "d1", 1727558443).to_json())
+    del body['homeTeam']
+
+    # Act / Assert
+    with pytest.raises(KeyError):
+        Match.from_message(body)
+
+
+def test_to_dynamo_item_converts_floats():
+    """
+    Floats are stored as Decimal
+    """
+    # Arrange
+    match = Match.from_feed({**GAME, "home": {**GAME["home"], "score": 1.5}}, "female", "d1", 0)
+
+    # Act
+    item = match.to_dynamo_item()
+
+    # Assert
+    assert item['homeScore'] == Decimal('1.5')
+    assert 'messageId' not in item
+
+
+def test_match_has_no_instance_dictionary():
+    """
+    Matches are stored in slots
+    """
+    match = Match.from_feed(GAME, "female", "d1", 0)
+    assert not hasattr(match, '__dict__')
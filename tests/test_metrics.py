@@ -0,0 +1,132 @@
+"""
+This module contains the unit tests for the Embedded Metric Format instrumentation.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from common_dependencies_layer.metrics import NULL_METRICS, Metrics, get_metrics, instrument
+
+
+def emitted_lines(capsys):
+    """
+    Decode the metrics lines written to stdout
+    """
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_emf_document():
+    """
+    Timings and counts are declared with their units and logged at the top level
+    """
+    # Arrange
+    metrics = Metrics('NCAAMatches', {'FunctionName': 'FetchNCAAMatches'})
+    metrics.add_time('fetchTime', 1.5)
+    metrics.add_time('fetchTime', 2.0)
+    metrics.count('matches', 3)
+
+    # Act
+    document = metrics.to_emf(timestamp=1000)
+
+    # Assert
+    assert document == {
+        '_aws': {
+            'Timestamp': 1000,
+            'CloudWatchMetrics': [{
+                'Namespace': 'NCAAMatches',
+                'Dimensions': [['FunctionName']],
+                'Metrics': [{'Name': 'fetchTime', 'Unit': 'Milliseconds'}, {'Name': 'matches', 'Unit': 'Count'}],
+            }],
+        },
+        'FunctionName': 'FetchNCAAMatches',
+        'fetchTime': 3.5,
+        'matches': 3,
+    }
+
+
+test_cases = [
+    {
+        "name": "Function name from the context",
+        "context": SimpleNamespace(function_name="prod-fetch", aws_request_id="abc"),
+        "expected": {"FunctionName": "prod-fetch", "requestId": "abc"},
+    },
+    {
+        "name": "Default function name",
+        "context": {},
+        "expected": {"FunctionName": "FetchNCAAMatches"},
+    },
+]
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_instrument_emits_one_line(test_case, capsys):
+    """
+    An instrumented handler emits a single metrics line with the phases it recorded
+    """
+    # Arrange
+    @instrument('FetchNCAAMatches')
+    def handler(event, context):  # pylint: disable=unused-argument
+        metrics = get_metrics()
+        with metrics.phase('parseTime'):
+            metrics.count('matches', len(event))
+        return 'done'
+
+    # Act
+    result = handler([1, 2], test_case["context"])
+
+    # Assert
+    lines = emitted_lines(capsys)
+    assert result == 'done'
+    assert len(lines) == 1
+    assert lines[0]['matches'] == 2
+    assert {'parseTime', 'invocationTime'} <= set(lines[0])
+    assert test_case["expected"].items() <= lines[0].items()
+
+
+def test_instrument_counts_errors(capsys):
+    """
+    An exception is counted and the metrics are still emitted
+    """
+    # Arrange
+    @instrument('ProcessNCAAMatches')
+    def handler(event, context):
+        raise RuntimeError("boom")
+
+    # Act
+    with pytest.raises(RuntimeError):
+        handler({}, {})
+
+    # Assert
+    assert emitted_lines(capsys)[0]['errors'] == 1
+
+
+def test_disabled_metrics_emit_nothing(monkeypatch, capsys):
+    """
+    With METRICS_ENABLED=false the handler sees the no-op metrics and nothing is written
+    """
+    # Arrange
+    monkeypatch.setenv('METRICS_ENABLED', 'false')
+    seen = []
+
+    @instrument('IngestNCAAMatches')
+    def handler(event, context):  # pylint: disable=unused-argument
+        seen.append(get_metrics())
+        with get_metrics().phase('parseTime'):
+            pass
+
+    # Act
+    handler({}, {})
+
+    # Assert
+    assert seen == [NULL_METRICS]
+    assert not emitted_lines(capsys)
+
+
+def test_metrics_outside_a_handler_are_ignored():
+    """
+    Code called outside an instrumented handler gets the no-op metrics
+    """
+    # Act / Assert
+    assert get_metrics() is NULL_METRICS
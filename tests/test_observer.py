@@ -0,0 +1,173 @@
+"""
+This module contains the unit tests for the filtered observer dispatch.
+"""
+
+import threading
+
+from utils.observer import Observable, Observer
+from utils.scanner import DirectoryEvent
+
+
+class RecordingObserver(Observer):
+    """
+    Keeps the paths of the events it gets
+    """
+    def __init__(self, path_patterns=None, required_filenames=None, slow=False):
+        self.path_patterns = path_patterns
+        self.required_filenames = required_filenames
+        self.slow = slow
+        self.paths = []
+        self.batches = 0
+        self.threads = set()
+
+    def update(self, event):
+        self.threads.add(threading.current_thread().name)
+        self.paths.append(event.dirpath)
+
+    def update_many(self, events):
+        self.batches += 1
+        super().update_many(events)
+
+
+EVENTS = [
+    DirectoryEvent("./lambdas/hello", [], ["handler.py", "requirements.txt"]),
+    DirectoryEvent("./lambdas/format_dates", [], ["handler.py"]),
+    DirectoryEvent("./layers/common", [], ["__init__.py", "requirements.txt"]),
+    DirectoryEvent("./tests", [], ["test_hello.py"]),
+]
+
+test_cases = [
+    {
+        "name": "No declaration",
+        "observer": {},
+        "expected": ["./lambdas/hello", "./lambdas/format_dates", "./layers/common", "./tests"],
+    },
+    {
+        "name": "Required filename",
+        "observer": {"required_filenames": frozenset({"handler.py"})},
+        "expected": ["./lambdas/hello", "./lambdas/format_dates"],
+    },
+    {
+        "name": "All required filenames",
+        "observer": {"required_filenames": frozenset({"handler.py", "requirements.txt"})},
+        "expected": ["./lambdas/hello"],
+    },
+    {
+        "name": "Path pattern",
+        "observer": {"path_patterns": ("*/layers/*",)},
+        "expected": ["./layers/common"],
+    },
+    {
+        "name": "Path pattern and filename",
+        "observer": {"path_patterns": ("*/layers/*", "*/lambdas/*"), "required_filenames": frozenset({"requirements.txt"})},
+        "expected": ["./lambdas/hello", "./layers/common"],
+    },
+]
+
+
+def test_dispatch_follows_declared_interest():
+    """
+    Each observer only gets the events matching its declarations
+    """
+    for test_case in test_cases:
+        # Arrange
+        observable = Observable()
+        observer = RecordingObserver(**test_case["observer"])
+        observable.add_observer(observer)
+
+        # Act
+        for event in EVENTS:
+            observable.notify_observers(event)
+
+        # Assert
+        assert observer.paths == test_case["expected"], test_case["name"]
+
+
+def test_dispatch_keeps_registration_order():
+    """
+    Indexed and unindexed observers are updated in the order they were added
+    """
+    # Arrange
+    order = []
+
+    class Named(Observer):
+        """
+        Records its name when updated
+        """
+        def __init__(self, name, required_filenames=None):
+            self.name = name
+            self.required_filenames = required_filenames
+
+        def update(self, event):
+            order.append(self.name)
+
+    observable = Observable()
+    observable.add_observer(Named("first", frozenset({"handler.py"})))
+    observable.add_observer(Named("second"))
+    observable.add_observer(Named("third", frozenset({"handler.py"})))
+
+    # Act
+    observable.notify_observers(EVENTS[0])
+
+    # Assert
+    assert order == ["first", "second", "third"]
+
+
+def test_interested_predicate():
+    """
+    interested() filters after the declarations
+    """
+    # Arrange
+    class TestsOnly(RecordingObserver):
+        """
+        Only wants directories with test modules
+        """
+        def interested(self, event):
+            return any(name.startswith("test_") for name in event.filenames)
+
+    observable = Observable()
+    observer = TestsOnly()
+    observable.add_observer(observer)
+
+    # Act
+    for event in EVENTS:
+        observable.notify_observers(event)
+
+    # Assert
+    assert observer.paths == ["./tests"]
+
+
+def test_notify_many_batches_per_observer():
+    """
+    notify_many hands each observer its events in one update_many call
+    """
+    # Arrange
+    observable = Observable()
+    observer = RecordingObserver(required_filenames=frozenset({"handler.py"}))
+    observable.add_observer(observer)
+
+    # Act
+    observable.notify_many(EVENTS)
+
+    # Assert
+    assert observer.batches == 1
+    assert observer.paths == ["./lambdas/hello", "./lambdas/format_dates"]
+
+
+def test_slow_observers_run_on_the_thread_pool():
+    """
+    Slow observers are updated off the calling thread and wait_for_observers joins them
+    """
+    # Arrange
+    observable = Observable(max_workers=2)
+    observer = RecordingObserver(slow=True)
+    observable.add_observer(observer)
+
+    # Act
+    for event in EVENTS:
+        observable.notify_observers(event)
+    observable.wait_for_observers()
+
+    # Assert
+    assert sorted(observer.paths) == sorted(event.dirpath for event in EVENTS)
+    assert threading.current_thread().name not in observer.threads
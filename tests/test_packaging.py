@@ -0,0 +1,224 @@
+"""
+This module contains the unit tests for building the deployment packages.
+"""
+
+import os
+import zipfile
+
+import pytest
+
+from utils import packaging
+from utils.packaging import (
+    BuildOptions,
+    PackageSizeError,
+    PackageTarget,
+    build_package,
+    build_package_graph,
+    install_requirements,
+    read_manifest,
+    requirements_cache_key,
+)
+
+
+def write(path, content=""):
+    """
+    Write a file, creating its directory
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+@pytest.fixture(name="fake_pip")
+def fixture_fake_pip(mocker):
+    """
+    Replace the pip subprocess with one that writes a single module into the target
+    """
+    def run(command, check):  # pylint: disable=unused-argument
+        write(os.path.join(command[command.index('--target') + 1], "vendored.py"), "VERSION = 1\n")
+
+    return mocker.patch.object(packaging.subprocess, "run", side_effect=run)
+
+
+def test_cache_key_follows_requirements(tmp_path):
+    """
+    The cache key changes when the requirements change
+    """
+    # Arrange
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests\n")
+    first = requirements_cache_key(str(requirements))
+
+    # Act
+    requirements.write_text("requests==2.32.3\n")
+    second = requirements_cache_key(str(requirements))
+
+    # Assert
+    assert first != second
+
+
+def test_second_install_comes_from_the_cache(tmp_path, fake_pip):
+    """
+    The same requirements are only installed with pip once
+    """
+    # Arrange
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests\n")
+    cache_dir = str(tmp_path / "cache")
+
+    # Act
+    hits = [install_requirements(str(requirements), str(tmp_path / f"target{i}"), cache_dir) for i in range(2)]
+
+    # Assert
+    assert hits == [False, True]
+    assert fake_pip.call_count == 1
+    assert (tmp_path / "target1" / "vendored.py").exists()
+
+
+def test_build_packages_in_parallel(tmp_path, fake_pip):  # pylint: disable=unused-argument
+    """
+    Lambdas are archived at the root and layers under python/<name>, without caches or requirements
+    """
+    # Arrange
+    write(str(tmp_path / "lambdas" / "hello" / "handler.py"))
+    write(str(tmp_path / "lambdas" / "hello" / "__pycache__" / "handler.cpython-311.pyc"))
+    write(str(tmp_path / "layers" / "common" / "__init__.py"))
+    write(str(tmp_path / "layers" / "common" / "requirements.txt"), "requests\n")
+    targets = [
+        PackageTarget("lambda", "hello", str(tmp_path / "lambdas" / "hello")),
+        PackageTarget("layer", "common", str(tmp_path / "layers" / "common")),
+    ]
+
+    # Act
+    zip_files = build_package_graph({target: [] for target in targets}, jobs=2, dist_dir=str(tmp_path / "dist"),
+                                    cache_dir=str(tmp_path / "cache"))
+
+    # Assert
+    names = []
+    for target in targets:
+        with zipfile.ZipFile(zip_files[target]) as archive:
+            names.append(sorted(archive.namelist()))
+    assert names == [
+        ["handler.py"],
+        ["python/common/__init__.py", "python/vendored.py"],
+    ]
+
+
+def make_lambda(tmp_path):
+    """
+    Create a small lambda and return its target
+    """
+    write(str(tmp_path / "lambdas" / "hello" / "handler.py"), "def lambda_handler(event, context):\n    return event\n")
+    write(str(tmp_path / "lambdas" / "hello" / "assets" / "logo.png"), "not really a png")
+    return PackageTarget("lambda", "hello", str(tmp_path / "lambdas" / "hello"))
+
+
+def test_archives_are_reproducible(tmp_path):
+    """
+    Building the same inputs twice gives byte-identical archives
+    """
+    # Arrange
+    target = make_lambda(tmp_path)
+
+    # Act
+    first = build_package(target, dist_dir=str(tmp_path / "first"))
+    os.utime(os.path.join(target.source_dir, "handler.py"), (0, 0))
+    second = build_package(target, dist_dir=str(tmp_path / "second"))
+
+    # Assert
+    with open(first, "rb") as first_file, open(second, "rb") as second_file:
+        assert first_file.read() == second_file.read()
+
+
+def test_compressed_files_are_stored(tmp_path):
+    """
+    Already-compressed file types are stored rather than deflated again
+    """
+    # Arrange
+    target = make_lambda(tmp_path)
+
+    # Act
+    zip_file = build_package(target, dist_dir=str(tmp_path / "dist"))
+
+    # Assert
+    with zipfile.ZipFile(zip_file) as archive:
+        assert archive.getinfo("assets/logo.png").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("handler.py").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_unchanged_package_is_skipped(tmp_path, mocker):
+    """
+    A package whose inputs match its manifest is not staged again until a source changes
+    """
+    # Arrange
+    target = make_lambda(tmp_path)
+    dist_dir = str(tmp_path / "dist")
+    build_package(target, dist_dir=dist_dir)
+    stage = mocker.spy(packaging, "stage_package")
+
+    # Act
+    build_package(target, dist_dir=dist_dir)
+    skipped_calls = stage.call_count
+    write(os.path.join(target.source_dir, "handler.py"), "def lambda_handler(event, context):\n    return None\n")
+    build_package(target, dist_dir=dist_dir)
+
+    # Assert
+    assert skipped_calls == 0
+    assert stage.call_count == 1
+    assert read_manifest(os.path.join(dist_dir, "hello.zip"))["entries"].keys() == {"assets/logo.png", "handler.py"}
+
+
+def test_prune_dependencies(tmp_path):
+    """
+    Runtime-provided packages, tests, stubs and dist-info files other than METADATA are removed
+    """
+    # Arrange
+    for path in [
+        "boto3/__init__.py",
+        "boto3-1.35.0.dist-info/METADATA",
+        "requests/__init__.py",
+        "requests/api.pyi",
+        "requests/tests/test_api.py",
+        "requests/__pycache__/api.cpython-311.pyc",
+        "requests-2.32.3.dist-info/METADATA",
+        "requests-2.32.3.dist-info/RECORD",
+        "requests-2.32.3.dist-info/licenses/LICENSE",
+        "bin/normalizer",
+    ]:
+        write(str(tmp_path / path), "x" * 10)
+
+    # Act
+    removed = packaging.prune_dependencies(str(tmp_path))
+
+    # Assert
+    remaining = sorted(
+        os.path.relpath(os.path.join(root, file), tmp_path).replace(os.sep, "/")
+        for root, _, files in os.walk(tmp_path) for file in files
+    )
+    assert remaining == ["requests-2.32.3.dist-info/METADATA", "requests/__init__.py"]
+    assert removed == 80
+
+
+def test_size_budget_is_enforced(tmp_path):
+    """
+    An archive larger than its budget fails the build
+    """
+    # Arrange
+    target = make_lambda(tmp_path)
+
+    # Act / Assert
+    with pytest.raises(PackageSizeError):
+        build_package(target, dist_dir=str(tmp_path / "dist"), options=BuildOptions(size_budget=10))
+
+
+def test_bytecode_for_another_runtime_is_refused(tmp_path):
+    """
+    Bytecode can only be compiled for the runtime matching the build interpreter
+    """
+    # Arrange
+    target = make_lambda(tmp_path)
+
+    # Act / Assert
+    with pytest.raises(ValueError):
+        build_package(target, dist_dir=str(tmp_path / "dist"),
+                      options=BuildOptions(compile_bytecode=True, runtime="python2.7"))
@@ -0,0 +1,153 @@
+"""
+This module contains the unit tests for the process_ncaa_matches lambda.
+"""
+
+import json
+
+import pytest
+
+from common_dependencies_layer.ttl_cache import TTLCache
+
+from benchmarks.aws import FakeDynamoDB, FakeSQS, sqs_event
+from lambdas.process_ncaa_matches import handler
+
+
+class FailingSQS(FakeSQS):
+    """
+    SQS client that raises on the first calls and then rejects the bodies of one match
+    """
+    def __init__(self, raises: int = 0, rejected_id: int = None):
+        super().__init__()
+        self.raises = raises
+        self.rejected_id = rejected_id
+
+    def send_message_batch(self, QueueUrl, Entries):  # pylint: disable=invalid-name
+        """
+        Raise while raises remain, otherwise enqueue every entry but the rejected ones
+        """
+        if self.raises:
+            self.raises -= 1
+            raise ConnectionError("Could not connect to the endpoint URL")
+
+        rejected = [entry for entry in Entries if json.loads(entry['MessageBody'])['id'] == self.rejected_id]
+        response = super().send_message_batch(QueueUrl, [entry for entry in Entries if entry not in rejected])
+        response['Failed'] = [
+            {'Id': entry['Id'], 'SenderFault': True, 'Code': 'InvalidParameterValue', 'Message': 'Rejected'}
+            for entry in rejected
+        ]
+        return response
+
+
+def message(match_id: int, home_score: int = 1) -> str:
+    """
+    Body of a queued match
+    """
+    return json.dumps({
+        "id": match_id, "startTimeEpoch": 1725206400, "updatedAt": 1727558443, "matchState": "final",
+        "gender": "female", "division": "d1", "homeTeam": "Home", "homeScore": home_score, "homeConference": "ASUN",
+        "awayTeam": "Away", "awayScore": 0, "awayConference": "OVC",
+    })
+
+
+@pytest.fixture(name="aws")
+def fixture_aws(mocker):
+    """
+    Patch in an empty match table and start without cached fingerprints
+    """
+    dynamodb = FakeDynamoDB()
+    dynamodb.Table(handler.TABLE_NAME)
+    mocker.patch.object(handler, "get_resource", lambda name: dynamodb)
+    handler.MATCH_STATE_CACHE.clear()
+    yield dynamodb
+    handler.MATCH_STATE_CACHE.clear()
+
+
+def queued_ids(sqs, queue_url):
+    """
+    Match ids sent to a queue
+    """
+    return sorted(json.loads(body)['id'] for _, body in sqs.queues.get(queue_url, []))
+
+
+def test_matches_are_routed_by_their_stored_fingerprint(aws, mocker):
+    """
+    New matches go to the ingestion queue, changed ones to the update queue and unchanged ones nowhere
+    """
+    # Arrange
+    sqs = FakeSQS()
+    mocker.patch.object(handler, "get_client", lambda name: sqs)
+    table = aws.Table(handler.TABLE_NAME)
+    for match_id in (2, 3):
+        item = handler.parse_match(None, message(match_id)).to_dynamo_item()
+        table.items[(match_id, 1725206400)] = item
+    event = sqs_event([("m1", message(1)), ("m2", message(2)), ("m3", message(3, home_score=2)), ("m4", message(1))])
+
+    # Act
+    response = handler.lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 200
+    assert not response["batchItemFailures"]
+    assert queued_ids(sqs, handler.INGESTION_QUEUE_URL) == [1]
+    assert queued_ids(sqs, handler.UPDATE_QUEUE_URL) == [3]
+
+
+def test_redelivery_after_a_failed_publish_sends_the_match(aws, mocker):  # pylint: disable=unused-argument
+    """
+    A publish that raises caches nothing, so the redelivered batch sends its matches
+    """
+    # Arrange
+    sqs = FailingSQS(raises=1)
+    mocker.patch.object(handler, "get_client", lambda name: sqs)
+    event = sqs_event([("m1", message(1))])
+
+    # Act
+    with pytest.raises(ConnectionError):
+        handler.lambda_handler(event, {})
+    response = handler.lambda_handler(event, {})
+
+    # Assert
+    assert response["statusCode"] == 200
+    assert queued_ids(sqs, handler.INGESTION_QUEUE_URL) == [1]
+
+
+def test_rejected_messages_are_reported_and_retried(aws, mocker):  # pylint: disable=unused-argument
+    """
+    Messages whose match could not be sent are reported in batchItemFailures and sent on redelivery
+    """
+    # Arrange
+    sqs = FailingSQS(rejected_id=2)
+    mocker.patch.object(handler, "get_client", lambda name: sqs)
+    event = sqs_event([("m1", message(1)), ("m2", message(2)), ("m3", message(2))])
+
+    # Act
+    first = handler.lambda_handler(event, {})
+    sqs.rejected_id = None
+    retry = handler.lambda_handler(sqs_event([("m2", message(2)), ("m3", message(2))]), {})
+
+    # Assert
+    assert first["statusCode"] == 500
+    assert first["batchItemFailures"] == [{"itemIdentifier": "m2"}, {"itemIdentifier": "m3"}]
+    assert not retry["batchItemFailures"]
+    assert queued_ids(sqs, handler.INGESTION_QUEUE_URL) == [1, 2]
+
+
+def test_cached_fingerprint_expires_although_the_match_is_polled_more_often(aws, mocker):
+    """
+    Cache hits do not extend the expiry, so an unchanged match is read from DynamoDB again after the TTL
+    """
+    # Arrange
+    now = [0.0]
+    mocker.patch.object(handler, "MATCH_STATE_CACHE", TTLCache(ttl=300, clock=lambda: now[0]))
+    mocker.patch.object(handler, "get_client", lambda name: FakeSQS())
+    aws.Table(handler.TABLE_NAME).items[(1, 1725206400)] = handler.parse_match(None, message(1)).to_dynamo_item()
+    event = sqs_event([("m1", message(1))])
+
+    # Act
+    reads = []
+    for now[0] in (0.0, 100.0, 200.0, 290.0, 310.0):
+        handler.lambda_handler(event, {})
+        reads.append(aws.calls)
+
+    # Assert
+    assert reads == [1, 1, 1, 1, 2]
@@ -0,0 +1,164 @@
+"""
+This module contains the unit tests for the directory scanner.
+"""
+
+import os
+
+import pytest
+
+from utils import DirectoryScanner, LambdaObserver, Observer
+
+
+class RecordingObserver(Observer):
+    """
+    Keeps every event
+    """
+    def __init__(self):
+        self.events = []
+
+    def update(self, event):
+        self.events.append(event)
+
+
+def make_tree(root):
+    """
+    Create a small repository layout
+    """
+    for path in [
+        "lambdas/hello/handler.py",
+        "lambdas/hello/__pycache__/handler.cpython-311.pyc",
+        "layers/common/__init__.py",
+        "node_modules/left-pad/index.js",
+        ".git/HEAD",
+        "dist/hello.zip",
+    ]:
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as file:
+            file.write("")
+
+
+def scanned_directories(observer, root):
+    """
+    Relative paths of the directories an observer saw
+    """
+    return [os.path.relpath(event.dirpath, root) for event in observer.events]
+
+
+def test_ignored_directories_are_not_descended(tmp_path):
+    """
+    Ignored directories are pruned and the rest are visited top-down in name order
+    """
+    # Arrange
+    make_tree(tmp_path)
+    scanner = DirectoryScanner()
+    observer = RecordingObserver()
+    scanner.add_observer(observer)
+
+    # Act
+    scanner.scan(str(tmp_path))
+
+    # Assert
+    assert scanned_directories(observer, tmp_path) == [".", "lambdas", "lambdas/hello", "layers", "layers/common"]
+
+
+def test_events_carry_the_entries(tmp_path):
+    """
+    Observers get the filenames and directory entries of every directory
+    """
+    # Arrange
+    make_tree(tmp_path)
+    scanner = DirectoryScanner()
+    observer = RecordingObserver()
+    scanner.add_observer(observer)
+
+    # Act
+    scanner.scan(str(tmp_path / "lambdas"))
+
+    # Assert
+    hello = observer.events[1]
+    assert hello.filenames == ["handler.py"]
+    assert [entry.name for entry in hello.entries] == ["__pycache__", "handler.py"]
+    assert hello.entries[0].is_dir()
+
+
+def test_observers_can_prune(tmp_path):
+    """
+    Removing a name from dirnames keeps the scanner out of that directory
+    """
+    # Arrange
+    make_tree(tmp_path)
+
+    class SkipLayers(RecordingObserver):
+        """
+        Prunes the layers directory
+        """
+        def update(self, event):
+            super().update(event)
+            if "layers" in event.dirnames:
+                event.dirnames.remove("layers")
+
+    scanner = DirectoryScanner()
+    observer = SkipLayers()
+    scanner.add_observer(observer)
+
+    # Act
+    scanner.scan(str(tmp_path))
+
+    # Assert
+    assert "layers" not in scanned_directories(observer, tmp_path)
+
+
+def test_repeat_scans_use_the_cache(tmp_path):
+    """
+    Unchanged directories come from the cache and a changed directory is listed again
+    """
+    # Arrange
+    make_tree(tmp_path / "repo")
+    root = str(tmp_path / "repo")
+    cache_file = str(tmp_path / "scan_cache.json")
+    DirectoryScanner(cache_file=cache_file).scan(root)
+
+    # Act
+    scanner = DirectoryScanner(cache_file=cache_file)
+    observer = RecordingObserver()
+    scanner.add_observer(observer)
+    scanner.scan(root)
+    unchanged = (scanner.cache_hits, scanner.cache_misses)
+
+    with open(os.path.join(root, "lambdas", "hello", "util.py"), "w", encoding="utf-8") as file:
+        file.write("")
+    os.utime(os.path.join(root, "lambdas", "hello"), ns=(0, 1))
+    scanner.scan(root)
+
+    # Assert
+    assert unchanged == (5, 0)
+    assert (scanner.cache_hits, scanner.cache_misses) == (4, 1)
+    assert observer.events[-3].filenames == ["handler.py", "util.py"]
+
+
+def test_lambda_observer_does_not_list_again(tmp_path, mocker, capsys):
+    """
+    The lambda observer uses the filenames of the event instead of listing the directory
+    """
+    # Arrange
+    make_tree(tmp_path)
+    scanner = DirectoryScanner()
+    scanner.add_observer(LambdaObserver())
+    listdir = mocker.patch("os.listdir", side_effect=AssertionError("listed again"))
+
+    # Act
+    scanner.scan(str(tmp_path))
+
+    # Assert
+    assert listdir.call_count == 0
+    assert "lambdas/hello" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("name, expected", [(".git", True), ("node_modules", True), ("lambdas", False)])
+def test_is_ignored(name, expected):
+    """
+    Default ignore patterns
+    """
+    # Act / Assert
+    assert DirectoryScanner().is_ignored(name) is expected
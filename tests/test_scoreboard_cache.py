@@ -0,0 +1,229 @@
+"""
+This module contains the unit tests for the conditional GET scoreboard cache.
+"""
+
+import contextlib
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from common_dependencies_layer.fetch_engine import FetchTarget
+from common_dependencies_layer.scoreboard_cache import ScoreboardCache
+
+import driver
+from lambdas.fetch_ncaa_matches.handler import FetchOptions, fetch_matches
+
+SCOREBOARD = {
+    "updated_at": "09-28-2024 02:24:34",
+    "games": [
+        {
+            "game": {
+                "gameID": "5398675",
+                "startTimeEpoch": "1725206400",
+                "gameState": "final",
+                "home": {"names": {"full": "Eastern Kentucky University"}, "score": 2},
+                "away": {"names": {"full": "Eastern Illinois University"}, "score": 2},
+            }
+        }
+    ]
+}
+
+URL = "https://data.ncaa.com/casablanca/scoreboard/soccer-women/d1/2024/09/01/scoreboard.json"
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """
+    Serves the scoreboard with an ETag and honours If-None-Match
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Serve the scoreboard or 304
+        """
+        etag = self.server.etag
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps(SCOREBOARD).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence the access log
+        """
+
+
+class BreakingResponse(io.BytesIO):
+    """
+    Scoreboard response whose connection is reset after part of the body was read
+    """
+    status = 200
+    reason = 'OK'
+
+    def __init__(self, body: bytes, limit: int = None):
+        super().__init__(body)
+        self.limit = limit
+
+    def read(self, size=-1):
+        """
+        Read up to the limit, then fail as a reset connection does
+        """
+        if self.limit is not None and self.tell() >= self.limit:
+            raise ConnectionResetError("Connection reset by peer")
+        if self.limit is not None:
+            size = self.limit - self.tell() if size is None or size < 0 else min(size, self.limit - self.tell())
+        return super().read(size)
+
+    def getheader(self, name, default=None):
+        """
+        Answer the ETag header
+        """
+        return '"v1"' if name == 'ETag' else default
+
+
+class BreakingPool:
+    """
+    Connection pool stand-in that resets the first response half-way through the body
+    """
+    def __init__(self):
+        self.requests = 0
+
+    @contextlib.contextmanager
+    def request(self, method, url, headers=None):  # pylint: disable=unused-argument
+        """
+        Yield the scoreboard, broken off on the first request
+        """
+        body = json.dumps(SCOREBOARD).encode()
+        self.requests += 1
+        yield BreakingResponse(body, len(body) // 2 if self.requests == 1 else None)
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    """
+    Run a scoreboard server that supports ETags
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    server.daemon_threads = True
+    server.etag = '"v1"'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/casablanca/scoreboard/soccer-women/d1/2024/09/01/scoreboard.json"
+    server.shutdown()
+    server.server_close()
+
+
+def test_request_headers_are_conditional(tmp_path):
+    """
+    Stored validators are sent back as conditional request headers
+    """
+    # Arrange
+    cache = ScoreboardCache(str(tmp_path))
+
+    # Act
+    before = cache.request_headers(URL)
+    cache.update(URL, '"abc"', 'Sat, 28 Sep 2024 02:24:34 GMT', SCOREBOARD['updated_at'])
+    after = cache.request_headers(URL)
+
+    # Assert
+    assert not before
+    assert after == {'If-None-Match': '"abc"', 'If-Modified-Since': 'Sat, 28 Sep 2024 02:24:34 GMT'}
+
+
+def test_unchanged_updated_at_is_a_hit(tmp_path):
+    """
+    A scoreboard reporting the same updated_at twice counts as a hit
+    """
+    # Arrange
+    cache = ScoreboardCache(str(tmp_path))
+
+    # Act
+    first = cache.update(URL, None, None, "09-28-2024 02:24:34")
+    second = cache.update(URL, None, None, "09-28-2024 02:24:34")
+    third = cache.update(URL, None, None, "09-28-2024 03:00:00")
+
+    # Assert
+    assert (first, second, third) == (True, False, True)
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+
+
+def test_entries_survive_a_new_cache_instance(tmp_path):
+    """
+    Entries are persisted on disk between cache instances
+    """
+    # Arrange
+    ScoreboardCache(str(tmp_path)).update(URL, '"abc"', None, "09-28-2024 02:24:34")
+
+    # Act
+    entry = ScoreboardCache(str(tmp_path)).get(URL)
+
+    # Assert
+    assert entry['etag'] == '"abc"'
+
+
+def test_fetch_matches_short_circuits_on_not_modified(tmp_path, server_url):
+    """
+    The second fetch of an unchanged scoreboard is answered with 304 and returns no matches
+    """
+    # Arrange
+    cache = ScoreboardCache(str(tmp_path))
+    target = FetchTarget(server_url, None, None, None)
+
+    # Act
+    first = fetch_matches(target, FetchOptions(cache))
+    second = fetch_matches(target, FetchOptions(cache))
+
+    # Assert
+    assert len(first) == 1
+    assert not second
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_broken_response_is_not_cached(tmp_path):
+    """
+    A scoreboard reset part-way is not cached, so the next fetch still returns its matches
+    """
+    # Arrange
+    cache = ScoreboardCache(str(tmp_path))
+    target = FetchTarget(URL, None, None, None)
+    options = FetchOptions(cache, pool=BreakingPool())
+
+    # Act
+    with pytest.raises(ConnectionResetError):
+        fetch_matches(target, options)
+    retried = fetch_matches(target, options)
+
+    # Assert
+    assert len(retried) == 1
+    assert cache.get(URL)['etag'] == '"v1"'
+
+
+def test_driver_retry_after_a_broken_response_returns_the_matches(tmp_path, mocker):
+    """
+    The driver retries a scoreboard reset part-way and the retry is not mistaken for an unchanged one
+    """
+    # Arrange
+    mocker.patch.object(driver, "RETRY_BACKOFF_FACTOR", 0)
+    cache = ScoreboardCache(str(tmp_path))
+    pool = BreakingPool()
+    target = FetchTarget(URL, "female", "d1", None)
+
+    # Act
+    matches = driver.fetch_target(target, cache, pool=pool)
+
+    # Assert
+    assert pool.requests == 2
+    assert len(matches) == 1
+    assert cache.stats() == {'hits': 0, 'misses': 2}
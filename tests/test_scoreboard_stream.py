@@ -0,0 +1,102 @@
+"""
+This module contains the unit tests for the incremental scoreboard parser.
+"""
+
+import io
+import json
+
+import pytest
+
+from common_dependencies_layer.scoreboard_stream import ScoreboardStream
+
+GAMES = [
+    {"game": {"gameID": "5398675", "startTimeEpoch": "1725206400", "home": {"score": 12, "names": {"full": "Université de Montréal"}}}},
+    {"game": {"gameID": "5398676", "startTimeEpoch": "1725210000", "away": {"score": 0.5, "conferences": [{"conferenceName": "OVC"}]}}},
+    {"notAGame": None},
+]
+
+# Define test cases
+test_cases = [
+    {
+        "name": "updated_at first",
+        "document": {"inputMD5Sum": "abc", "updated_at": "09-28-2024 02:24:34", "games": GAMES, "hideRank": False},
+        "updated_at": "09-28-2024 02:24:34",
+        "games": GAMES,
+    },
+    {
+        "name": "updated_at last",
+        "document": {"games": GAMES, "updated_at": "09-28-2024 02:24:34"},
+        "updated_at": "09-28-2024 02:24:34",
+        "games": GAMES,
+    },
+    {
+        "name": "No games",
+        "document": {"updated_at": "09-28-2024 02:24:34", "games": []},
+        "updated_at": "09-28-2024 02:24:34",
+        "games": [],
+    },
+    {
+        "name": "No updated_at",
+        "document": {"games": GAMES[:1], "total": 12345},
+        "updated_at": None,
+        "games": GAMES[:1],
+    },
+    {
+        "name": "Empty document",
+        "document": {},
+        "updated_at": None,
+        "games": [],
+    },
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_scoreboard_stream(test_case, chunk_size):
+    """
+    The stream yields the same games and updated_at as json.loads, whatever the chunk size
+    """
+    # Arrange
+    body = json.dumps(test_case["document"], indent=1, ensure_ascii=False).encode('utf-8')
+    fp = io.BytesIO(body)
+    stream = ScoreboardStream(fp, chunk_size=chunk_size)
+
+    # Act
+    updated_at = stream.read_updated_at()
+    games = list(stream.games())
+    stream.drain()
+
+    # Assert
+    assert updated_at == test_case["updated_at"]
+    assert games == test_case["games"]
+    assert fp.read() == b''
+
+
+def test_games_are_read_incrementally():
+    """
+    The first game is available before the rest of the document has been read
+    """
+    # Arrange
+    document = {"updated_at": "09-28-2024 02:24:34", "games": GAMES * 100}
+    fp = io.BytesIO(json.dumps(document).encode('utf-8'))
+    stream = ScoreboardStream(fp, chunk_size=256)
+
+    # Act
+    first = next(stream.games())
+
+    # Assert
+    assert first == GAMES[0]
+    assert fp.tell() < len(fp.getvalue()) // 10
+
+
+@pytest.mark.parametrize("body", [b'', b'[]', b'{"games": [1, 2', b'{"games": [1 2]}', b'{"a": 1 "b": 2}'])
+def test_malformed_document(body):
+    """
+    Malformed or truncated documents raise a JSON decode error
+    """
+    # Arrange
+    stream = ScoreboardStream(io.BytesIO(body), chunk_size=4)
+
+    # Act / Assert
+    with pytest.raises(json.JSONDecodeError):
+        list(stream.games())
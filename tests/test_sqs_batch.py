@@ -0,0 +1,134 @@
+"""
+This module contains the unit tests for the batched SQS publisher.
+"""
+
+import threading
+
+import pytest
+
+from common_dependencies_layer.sqs_batch import MAX_BATCH_BYTES, SQSBatchPublisher, pack_batches
+
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/000000000000/test-queue"
+
+
+class FakeSQS:
+    """
+    Records send_message_batch calls and fails the configured bodies once
+    """
+    def __init__(self, fail_once=(), sender_fault=()):
+        self.fail_once = set(fail_once)
+        self.sender_fault = set(sender_fault)
+        self.calls = []
+        self.received = []
+        self._lock = threading.Lock()
+
+    def send_message_batch(self, QueueUrl, Entries):  # pylint: disable=invalid-name
+        """
+        Accept a batch, failing some entries
+        """
+        successful = []
+        failed = []
+        with self._lock:
+            self.calls.append((QueueUrl, [entry['MessageBody'] for entry in Entries]))
+            for entry in Entries:
+                body = entry['MessageBody']
+                if body in self.sender_fault:
+                    failed.append({'Id': entry['Id'], 'SenderFault': True, 'Code': 'InvalidMessageContents', 'Message': 'bad'})
+                elif body in self.fail_once:
+                    self.fail_once.discard(body)
+                    failed.append({'Id': entry['Id'], 'SenderFault': False, 'Code': 'InternalError', 'Message': 'retry'})
+                else:
+                    self.received.append(body)
+                    successful.append({'Id': entry['Id'], 'MessageId': body})
+        return {'Successful': successful, 'Failed': failed}
+
+
+test_cases = [
+    {"name": "Empty", "sizes": [], "expected": []},
+    {"name": "Ten per batch", "sizes": [1] * 25, "expected": [10, 10, 5]},
+    {"name": "Byte limit", "sizes": [100 * 1024] * 5, "expected": [2, 2, 1]},
+]
+
+
+@pytest.mark.parametrize("test_case", test_cases, ids=[tc["name"] for tc in test_cases])
+def test_pack_batches(test_case):
+    """
+    Batches respect the entry and byte limits
+    """
+    # Arrange
+    bodies = ["x" * size for size in test_case["sizes"]]
+
+    # Act
+    batches = list(pack_batches(bodies))
+
+    # Assert
+    assert [len(batch) for batch in batches] == test_case["expected"]
+    assert all(sum(len(body) for body in batch) <= MAX_BATCH_BYTES for batch in batches)
+
+
+def test_publish_sends_everything_in_batches():
+    """
+    All messages are delivered with one call per batch
+    """
+    # Arrange
+    client = FakeSQS()
+    bodies = [str(i) for i in range(23)]
+
+    # Act
+    result = SQSBatchPublisher(client, QUEUE_URL).publish(bodies)
+
+    # Assert
+    assert result.sent == 23
+    assert result.batches == 3
+    assert not result.failed
+    assert len(client.calls) == 3
+    assert sorted(client.received) == sorted(bodies)
+    assert sorted(result.message_ids) == sorted(bodies)
+
+
+def test_only_failed_entries_are_retried():
+    """
+    Entries that failed with a server fault are resent on their own
+    """
+    # Arrange
+    client = FakeSQS(fail_once={"3", "7"})
+    bodies = [str(i) for i in range(10)]
+
+    # Act
+    result = SQSBatchPublisher(client, QUEUE_URL, retry_delay=0).publish(bodies)
+
+    # Assert
+    assert result.sent == 10
+    assert not result.failed
+    assert [sorted(call[1]) for call in client.calls] == [sorted(bodies), ["3", "7"]]
+
+
+def test_sender_faults_are_not_retried():
+    """
+    Entries rejected because of the message itself are reported as failed
+    """
+    # Arrange
+    client = FakeSQS(sender_fault={"bad"})
+
+    # Act
+    result = SQSBatchPublisher(client, QUEUE_URL, retry_delay=0).publish(["ok", "bad"])
+
+    # Assert
+    assert result.sent == 1
+    assert [failure['body'] for failure in result.failed] == ["bad"]
+    assert len(client.calls) == 1
+
+
+def test_oversized_messages_are_rejected():
+    """
+    A message larger than the batch limit is reported instead of sent
+    """
+    # Arrange
+    client = FakeSQS()
+
+    # Act
+    result = SQSBatchPublisher(client, QUEUE_URL).publish(["x" * (MAX_BATCH_BYTES + 1), "ok"])
+
+    # Assert
+    assert result.sent == 1
+    assert [failure['code'] for failure in result.failed] == ["MessageTooLong"]
@@ -0,0 +1,157 @@
+"""
+This module contains the unit tests for the Step Functions definition generator.
+"""
+
+import copy
+import json
+import os
+
+import pytest
+
+from utils.step_function import (
+    DEFAULT_CONFIG_FILE,
+    DEFAULT_DEFINITION_FILE,
+    StepFunctionConfig,
+    generate_definition,
+    load_config,
+    plan_batches,
+    render_definition,
+    validate_definition,
+)
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+CONFIG = StepFunctionConfig(
+    format_dates_arn="arn:aws:lambda:us-east-1:123456789012:function:FormatDates",
+    fetch_matches_arn="arn:aws:lambda:us-east-1:123456789012:function:FetchNCAAMatches",
+    genders=("female", "male"),
+    divisions=("d1", "d2", "d3"),
+    day_offsets=(0, 1),
+    targets_per_iteration=5,
+)
+
+
+def test_batches_cover_every_target_in_day_order():
+    """
+    Every combination is in exactly one batch and today's targets come first
+    """
+    # Act
+    batches = plan_batches(CONFIG)
+
+    # Assert
+    assert [len(batch["targets"]) for batch in batches] == [5, 5, 2]
+    targets = [target for batch in batches for target in batch["targets"]]
+    assert len(targets) == 12
+    assert [target["day_offset"] for target in targets] == [0] * 6 + [1] * 6
+
+
+def test_generated_definition_is_valid():
+    """
+    The definition fans out with a Map state bounded by MaxConcurrency
+    """
+    # Act
+    definition = generate_definition(CONFIG)
+
+    # Assert
+    assert not validate_definition(definition, CONFIG)
+    fetch = definition["States"]["FetchMatches"]
+    assert fetch["Type"] == "Map"
+    assert fetch["MaxConcurrency"] == CONFIG.max_concurrency
+    assert fetch["ItemSelector"]["reference_date.$"] == "$.dates.today"
+
+
+def break_next(definition):
+    """
+    Point GetDates at a missing state
+    """
+    definition["States"]["GetDates"]["Next"] = "Missing"
+
+
+def break_concurrency(definition):
+    """
+    Remove the concurrency bound
+    """
+    definition["States"]["FetchMatches"]["MaxConcurrency"] = 0
+
+
+def break_batches(definition):
+    """
+    Fetch one target twice
+    """
+    batches = definition["States"]["PlanTargets"]["Result"]
+    batches[0]["targets"].append(batches[1]["targets"][0])
+
+
+def break_processor(definition):
+    """
+    Drop the Resource of the Map task
+    """
+    definition["States"]["FetchMatches"]["ItemProcessor"]["States"]["FetchNCAAMatches"]["Resource"] = ""
+
+
+@pytest.mark.parametrize("break_definition, expected", [
+    (break_next, "GetDates goes to missing state 'Missing'"),
+    (break_concurrency, "FetchMatches: MaxConcurrency must be a positive integer, got 0"),
+    (break_batches, "PlanTargets: the batches do not cover every target exactly once"),
+    (break_processor, "FetchMatches: FetchNCAAMatches has no Resource ARN"),
+])
+def test_validation_finds_problems(break_definition, expected):
+    """
+    Broken wiring, concurrency and batches are reported
+    """
+    # Arrange
+    definition = copy.deepcopy(generate_definition(CONFIG))
+    break_definition(definition)
+
+    # Act
+    problems = validate_definition(definition, CONFIG)
+
+    # Assert
+    assert any(expected in problem for problem in problems), problems
+
+
+def test_invalid_config_is_reported():
+    """
+    Unknown divisions and zero concurrency are problems of the config
+    """
+    # Arrange
+    config = CONFIG._replace(divisions=("d1", "d4"), max_concurrency=0)
+
+    # Act
+    problems = validate_definition(generate_definition(config), config)
+
+    # Assert
+    assert "config: invalid divisions d4" in problems
+    assert "config: max_concurrency must be at least 1" in problems
+
+
+def test_load_config_rejects_unknown_fields(tmp_path):
+    """
+    A misspelled field is an error instead of silently falling back to the default
+    """
+    # Arrange
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "format_dates_arn": CONFIG.format_dates_arn,
+        "fetch_matches_arn": CONFIG.fetch_matches_arn,
+        "max_concurency": 8,
+    }))
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="max_concurency"):
+        load_config(str(config_file))
+
+
+def test_committed_definition_is_up_to_date():
+    """
+    The definition in the repository is the one generated from its config
+    """
+    # Arrange
+    config = load_config(os.path.join(ROOT, DEFAULT_CONFIG_FILE))
+
+    # Act
+    rendered = render_definition(generate_definition(config))
+
+    # Assert
+    with open(os.path.join(ROOT, DEFAULT_DEFINITION_FILE), encoding="utf-8") as file:
+        assert file.read() == rendered
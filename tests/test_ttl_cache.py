@@ -0,0 +1,98 @@
+"""
+This module contains the unit tests for the TTL cache.
+"""
+
+import pytest
+
+from common_dependencies_layer.ttl_cache import TTLCache
+
+
+class FakeClock:
+    """
+    Manually advanced clock
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss_counters():
+    """
+    Lookups are counted as hits or misses
+    """
+    # Arrange
+    cache = TTLCache(clock=FakeClock())
+    cache.set((1, 2), "abc")
+
+    # Act
+    hit = cache.get((1, 2))
+    miss = cache.get((3, 4))
+
+    # Assert
+    assert (hit, miss) == ("abc", None)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hitRate': 0.5, 'size': 1}
+
+
+def test_entries_expire():
+    """
+    An entry older than the ttl is a miss and is dropped
+    """
+    # Arrange
+    clock = FakeClock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.set("key", "value")
+
+    # Act
+    clock.now = 9.9
+    fresh = cache.get("key")
+    clock.now = 10.0
+    expired = cache.get("key")
+
+    # Assert
+    assert (fresh, expired) == ("value", None)
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    """
+    The least recently used entry is evicted when the cache is full
+    """
+    # Arrange
+    cache = TTLCache(max_size=2, clock=FakeClock())
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    # Act
+    cache.set("c", 3)
+
+    # Assert
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_reset_stats():
+    """
+    Resetting the counters keeps the entries
+    """
+    # Arrange
+    cache = TTLCache(clock=FakeClock())
+    cache.set("a", 1)
+    cache.get("a")
+
+    # Act
+    cache.reset_stats()
+
+    # Assert
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hitRate': 0.0, 'size': 1}
+
+
+def test_invalid_size():
+    """
+    The cache must hold at least one entry
+    """
+    with pytest.raises(ValueError):
+        TTLCache(max_size=0)
@@ -2,9 +2,19 @@
 This module exports classes from the utils packages
 """
 
+from .build_graph import BuildGraph, discover_build_graph
 from .layer_observer import LayerObserver
 from .lambda_observer import LambdaObserver
 from .observer import Observable, Observer
-from .scanner import DirectoryScanner
+from .scanner import DirectoryEvent, DirectoryScanner
 
-__all__ = ["Observable", "Observer", "DirectoryScanner", "LambdaObserver", "LayerObserver"]
+__all__ = [
+    "BuildGraph",
+    "discover_build_graph",
+    "Observable",
+    "Observer",
+    "DirectoryEvent",
+    "DirectoryScanner",
+    "LambdaObserver",
+    "LayerObserver",
+]
@@ -0,0 +1,145 @@
+# utils/build_graph.py
+"""
+This module contains the BuildGraph class, the packages of the repository and their dependencies
+"""
+import ast
+import os
+
+from utils.lambda_observer import LambdaObserver
+from utils.layer_observer import LayerObserver
+from utils.packaging import BUILD_CACHE_DIR, PACKAGE_ROOTS, PackageTarget, iter_source_files
+from utils.scanner import DirectoryScanner
+
+SCAN_CACHE_FILE = os.path.join(BUILD_CACHE_DIR, 'scan.json')
+
+
+def imported_modules(source_dir: str) -> set:
+    """
+    Top-level names of the modules imported by the Python files of a package
+
+    Relative imports are left out, they stay inside the package.
+
+    :param source_dir: package directory
+    :return: set of module names
+    """
+    modules = set()
+    for _, path in iter_source_files(source_dir):
+        if not path.endswith('.py'):
+            continue
+        with open(path, 'rb') as file:
+            try:
+                tree = ast.parse(file.read(), path)
+            except SyntaxError:
+                continue
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name.split('.')[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules.add(node.module.split('.')[0])
+    return modules
+
+
+class BuildGraph:
+    """
+    Lambdas and layers found by the scanner observers
+
+    A package depends on the layers it imports; a lambda is packaged without them and
+    Lambda adds them at run time, so layers are built first.
+    """
+    def __init__(self):
+        """
+        Initialize an empty graph
+        """
+        self.targets = {}
+        self._dependencies = None
+
+    def add(self, kind: str, source_dir: str) -> PackageTarget:
+        """
+        Add a package directory
+
+        :param kind: 'lambda' or 'layer'
+        :param source_dir: package directory, named after the package
+        :return: PackageTarget
+        :raises ValueError: when another directory already holds a package of that kind and name
+        """
+        target = PackageTarget(kind, os.path.basename(os.path.normpath(source_dir)), source_dir)
+        existing = self.targets.get((kind, target.name))
+        if existing is not None and os.path.normpath(existing.source_dir) != os.path.normpath(source_dir):
+            raise ValueError(f"Both {existing.source_dir} and {source_dir} define the {kind} {target.name}")
+
+        self.targets[(kind, target.name)] = target
+        self._dependencies = None
+        return target
+
+    def packages(self, kind: str = None) -> list:
+        """
+        Packages of the graph
+
+        :param kind: 'lambda' or 'layer', or None for both
+        :return: list of PackageTarget sorted by kind and name
+        """
+        return sorted(target for target in self.targets.values() if kind is None or target.kind == kind)
+
+    def requirements(self, target: PackageTarget) -> str:
+        """
+        Requirements file of a package
+
+        :param target: package
+        :return: path of the requirements file, or None when the package has none
+        """
+        return target.requirements_path if os.path.exists(target.requirements_path) else None
+
+    @property
+    def dependencies(self) -> dict:
+        """
+        Every package mapped to the layers it imports
+
+        :return: dictionary of PackageTarget to a tuple of PackageTarget
+        """
+        if self._dependencies is None:
+            layers = {target.name: target for target in self.packages('layer')}
+            self._dependencies = {
+                target: tuple(
+                    layers[name] for name in sorted(imported_modules(target.source_dir) & layers.keys())
+                    if layers[name] != target
+                )
+                for target in self.packages()
+            }
+        return self._dependencies
+
+    def subgraph(self, kind: str) -> dict:
+        """
+        Packages of one kind with everything they depend on
+
+        :param kind: 'lambda' or 'layer'
+        :return: dictionary of PackageTarget to a tuple of PackageTarget
+        """
+        dependencies = self.dependencies
+        selected = {}
+        pending = self.packages(kind)
+        while pending:
+            target = pending.pop()
+            if target not in selected:
+                selected[target] = dependencies[target]
+                pending.extend(dependencies[target])
+        return selected
+
+
+def discover_build_graph(root: str = '.', cache_file: str = SCAN_CACHE_FILE) -> BuildGraph:
+    """
+    Scan the package roots of a repository for lambdas and layers
+
+    Only the lambdas and layers directories are scanned, so virtualenvs, build
+    directories and other checkouts in the repository are never taken for packages.
+
+    :param root: repository directory
+    :param cache_file: scan cache file, or None to list every directory again
+    :return: BuildGraph
+    """
+    graph = BuildGraph()
+    scanner = DirectoryScanner(cache_file=cache_file)
+    scanner.add_observer(LambdaObserver(graph))
+    scanner.add_observer(LayerObserver(graph))
+    scanner.scan([os.path.join(root, PACKAGE_ROOTS[kind]) for kind in ('lambda', 'layer')])
+    return graph
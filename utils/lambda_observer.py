@@ -10,30 +10,38 @@ class LambdaObserver(Observer):
     """
     Lambda Function observer
     """
-    def update(self, event: tuple[str, list[str], list[str]]):
+    required_filenames = frozenset({"handler.py"})
+
+    def __init__(self, graph=None):
         """
-        Update method
+        Initialize the observer
 
-        :param directory:
-        :return:
+        :param graph: BuildGraph the detected lambdas are added to, they are printed when not given
         """
-        dirpath, _, _ = event
-        if self.is_lambda_function_directory(dirpath):
-            print(f"Lambda Function directory detected: {dirpath}")
+        self.graph = graph
 
+    def interested(self, event) -> bool:
+        """
+        Only the directories directly below a lambdas directory are lambdas
 
-    def is_lambda_function_directory(self, directory):
+        :param event: DirectoryEvent of the scanned directory
+        :return: bool
         """
-        Determine if the directory is a Lambda Function directory
+        return os.path.basename(os.path.dirname(os.path.normpath(event.dirpath))) == "lambdas"
 
-        :param directory:
-        :return:
+    def update(self, event):
         """
-        # Implement logic to determine if the directory is a Lambda Function directory
-        if not os.path.isdir(directory):
-            return False
+        Update method
 
-        if not "handler.py" in os.listdir(directory):
-            return False
+        Only directories directly below a "lambdas" directory holding a handler.py are
+        dispatched to this observer. Nothing below a lambda is scanned, a lambda holds no
+        other packages.
 
-        return True
+        :param event: DirectoryEvent of the scanned directory
+        :return:
+        """
+        event.dirnames.clear()
+        if self.graph is not None:
+            self.graph.add("lambda", event.dirpath)
+        else:
+            print(f"Lambda Function directory detected: {event.dirpath}")
@@ -10,27 +10,38 @@ class LayerObserver(Observer):
     """
     Layer observer
     """
+    path_patterns = ("*layers*",)
 
-    def update(self, event: tuple[str, list[str], list[str]]):
+    def __init__(self, graph=None):
         """
-        Update method
+        Initialize the observer
 
-        :param directory:
-        :return:
+        :param graph: BuildGraph the detected layers are added to, they are printed when not given
+        """
+        self.graph = graph
+
+    def interested(self, event) -> bool:
         """
-        directory, _, _ = event
-        if self.is_layer_directory(directory):
-            print(f"Layer directory detected: {directory}")
+        Only the directories directly below a layers directory are layers
 
-    def is_layer_directory(self, directory):
+        :param event: DirectoryEvent of the scanned directory
+        :return: bool
         """
-        Determine if the directory is a Layer directory
+        return os.path.basename(os.path.dirname(os.path.normpath(event.dirpath))) == "layers"
+
+    def update(self, event):
         """
-        # Implement logic to determine if the directory is a Layer directory
-        if not os.path.isdir(directory):
-            return False
+        Update method
 
-        if not "layers" in directory:
-            return False
+        Only directories directly below a "layers" directory are dispatched to this observer.
+        Nothing below a layer is scanned, so vendored packages that happen to have a
+        "layers" directory are not taken for layers.
 
-        return True
+        :param event: DirectoryEvent of the scanned directory
+        :return:
+        """
+        event.dirnames.clear()
+        if self.graph is not None:
+            self.graph.add("layer", event.dirpath)
+        else:
+            print(f"Layer directory detected: {event.dirpath}")
@@ -2,27 +2,108 @@
 """
 Observer pattern implementation
 """
+import fnmatch
+import functools
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import NamedTuple
 
 class Observer:
     """
     Observer class
+
+    An observer declares which events it cares about and the Observable only dispatches
+    those to it:
+
+    - path_patterns: fnmatch globs, one of which must match the event's dirpath
+    - required_filenames: filenames that must all be in the event's filenames
+    - interested(): any further check, run after the declarations above
+
+    Observers marked slow are updated on the Observable's thread pool.
     """
-    def update(self, event: tuple[str, list[str], list[str]]):
+    path_patterns = None
+    required_filenames = None
+    slow = False
+
+    def interested(self, event) -> bool:  # pylint: disable=unused-argument
+        """
+        Whether the observer wants an event that passed its declared patterns
+
+        :param event: DirectoryEvent
+        :return: True by default
+        """
+        return True
+
+    def update(self, event):
         """
         Update method
 
-        :param event: tuple containing the directory path, directory names, and filenames
+        :param event: DirectoryEvent with the directory path, directory names, filenames and entries
         :return:
         """
         raise NotImplementedError("Subclass must implement abstract method")
 
+    def update_many(self, events):
+        """
+        Update with several events at once; override when a batch can be handled faster
+
+        :param events: list of DirectoryEvent
+        :return:
+        """
+        for event in events:
+            self.update(event)
+
+
+class _Subscription(NamedTuple):
+    """
+    An observer with its compiled interest
+    """
+    order: int
+    observer: Observer
+    required_filenames: frozenset
+    path_matcher: object
+
+
+def _compile_patterns(patterns):
+    """
+    Compile fnmatch globs into one regular expression
+
+    :param patterns: iterable of globs, or None
+    :return: compiled pattern, or None when there are no globs
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+
+def _update_each(observer, events):
+    """
+    Update an observer without update_many one event at a time
+
+    :param observer: observer
+    :param events: list of events
+    """
+    for event in events:
+        observer.update(event)
+
 
 class Observable:
     """
     Observable class
     """
-    def __init__(self):
+    def __init__(self, max_workers: int = None):
+        """
+        Initialize the observable
+
+        :param max_workers: threads used to update slow observers, defaults to the executor's default
+        """
         self._observers = []
+        self._max_workers = max_workers
+        self._executor = None
+        self._pending = []
+        self._unindexed = []
+        self._by_filename = {}
 
     def add_observer(self, observer):
         """
@@ -33,6 +114,7 @@ class Observable:
         """
         if observer not in self._observers:
             self._observers.append(observer)
+            self._build_index()
 
     def remove_observer(self, observer):
         """
@@ -42,13 +124,115 @@ class Observable:
         :return:
         """
         self._observers.remove(observer)
+        self._build_index()
 
-    def notify_observers(self, event: tuple[str, list[str], list[str]]):
+    def _build_index(self):
+        """
+        Index the observers by one of their required filenames
+
+        Observers without required filenames are checked for every event; the others only
+        when a directory contains their index filename.
+        """
+        self._unindexed = []
+        self._by_filename = {}
+        for order, observer in enumerate(self._observers):
+            required = frozenset(getattr(observer, 'required_filenames', None) or ())
+            subscription = _Subscription(
+                order, observer, required, _compile_patterns(getattr(observer, 'path_patterns', None))
+            )
+            if required:
+                self._by_filename.setdefault(min(required), []).append(subscription)
+            else:
+                self._unindexed.append(subscription)
+
+    def interested_observers(self, event) -> list:
+        """
+        Observers that want an event, in the order they were added
+
+        :param event: DirectoryEvent
+        :return: list of observers
+        """
+        filenames = getattr(event, 'filenames', None) or ()
+        candidates = self._unindexed
+        if self._by_filename:
+            indexed = [subscription for name in filenames for subscription in self._by_filename.get(name, ())]
+            if indexed:
+                candidates = sorted(self._unindexed + indexed, key=lambda subscription: subscription.order)
+
+        observers = []
+        filename_set = None
+        for subscription in candidates:
+            if len(subscription.required_filenames) > 1:
+                if filename_set is None:
+                    filename_set = set(filenames)
+                if not subscription.required_filenames <= filename_set:
+                    continue
+
+            if subscription.path_matcher is not None:
+                dirpath = getattr(event, 'dirpath', None)
+                if dirpath is None or not subscription.path_matcher.match(dirpath.replace(os.sep, '/')):
+                    continue
+
+            observer = subscription.observer
+            if not hasattr(observer, 'interested') or observer.interested(event):
+                observers.append(observer)
+
+        return observers
+
+    def _submit(self, function, argument):
+        """
+        Run a slow observer's update on the thread pool
+
+        :param function: bound update method
+        :param argument: event or list of events
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='observer')
+        self._pending.append(self._executor.submit(function, argument))
+
+    def notify_observers(self, event):
         """
         Notify observers
 
-        :param event: tuple containing the directory path, directory names, and filenames
+        Only observers interested in the event are updated. Slow observers are updated on
+        the thread pool; call wait_for_observers() before relying on their results.
+
+        :param event: DirectoryEvent with the directory path, directory names, filenames and entries
+        :return:
+        """
+        for observer in self.interested_observers(event):
+            if getattr(observer, 'slow', False):
+                self._submit(observer.update, event)
+            else:
+                observer.update(event)
+
+    def notify_many(self, events):
+        """
+        Notify observers of several events, giving each observer its events in one update_many call
+
+        :param events: iterable of DirectoryEvent
+        :return:
+        """
+        batches = {}
+        for event in events:
+            for observer in self.interested_observers(event):
+                batches.setdefault(id(observer), (observer, []))[1].append(event)
+
+        for observer, observer_events in batches.values():
+            update_many = getattr(observer, 'update_many', None) or functools.partial(_update_each, observer)
+
+            if getattr(observer, 'slow', False):
+                self._submit(update_many, observer_events)
+            else:
+                update_many(observer_events)
+
+    def wait_for_observers(self):
+        """
+        Wait until the slow observers have handled every event, re-raising the first error
+
         :return:
         """
-        for observer in self._observers:
-            observer.update(event)
+        pending, self._pending = self._pending, []
+        wait(pending)
+        for future in pending:
+            future.result()
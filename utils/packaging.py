@@ -0,0 +1,597 @@
+# utils/packaging.py
+"""
+This module builds the deployment packages of the lambdas and layers
+"""
+import compileall
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import platform
+import py_compile
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple
+
+BUILD_CACHE_DIR = '.build_cache'
+DIST_DIR = 'dist'
+
+# Directory holding one directory per package, by package kind
+PACKAGE_ROOTS = {'lambda': 'lambdas', 'layer': 'layers'}
+
+SKIPPED_FILES = {'requirements.txt'}
+SKIPPED_DIRECTORIES = {'__pycache__'}
+
+# Bumped whenever the archive layout changes, which invalidates every manifest
+MANIFEST_VERSION = 1
+
+# Every entry gets the same timestamp and mode so identical inputs give identical archives
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FILE_MODE = 0o644
+EXECUTABLE_MODE = 0o755
+
+# Deflating these again costs time and saves nothing
+STORED_EXTENSIONS = frozenset({
+    '.bz2', '.gif', '.gz', '.jar', '.jpeg', '.jpg', '.png', '.tgz', '.webp', '.whl', '.xz', '.zip', '.zst',
+})
+
+# Lambda limits: 50 MB for a zipped upload and 250 MB unzipped, layers included
+DEFAULT_SIZE_BUDGET = 50 * 1024 * 1024
+DEFAULT_UNZIPPED_SIZE_BUDGET = 250 * 1024 * 1024
+
+# Already part of every Python Lambda runtime, so vendoring them only adds weight
+RUNTIME_PROVIDED_PACKAGES = frozenset({'boto3', 'botocore', 's3transfer', 'jmespath'})
+
+# Pruned from installed dependencies; the package's own sources are never pruned
+PRUNED_DIRECTORIES = frozenset({'__pycache__', 'tests', 'test'})
+PRUNED_TOP_LEVEL_DIRECTORIES = frozenset({'bin'})
+PRUNED_FILE_PATTERNS = ('*.pyi', '*.pyc', '*.pyo')
+
+# importlib.metadata only needs METADATA to find a distribution and its version
+KEPT_DIST_INFO_FILES = frozenset({'METADATA'})
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PackageSizeError(Exception):
+    """
+    Raised when an archive exceeds its size budget
+    """
+
+
+class PackageTarget(NamedTuple):
+    """
+    A lambda or layer to package
+    """
+    kind: str
+    name: str
+    source_dir: str
+
+    @property
+    def requirements_path(self) -> str:
+        """
+        Path of the requirements file, which may not exist
+        """
+        return os.path.join(self.source_dir, 'requirements.txt')
+
+
+class BuildOptions(NamedTuple):
+    """
+    How packages are built
+
+    A size budget of 0 disables that check. Bytecode is compiled for the interpreter
+    running the build, so runtime names the Lambda runtime it must match, e.g. 'python3.12'.
+    """
+    prune: bool = True
+    compile_bytecode: bool = False
+    runtime: str = None
+    size_budget: int = DEFAULT_SIZE_BUDGET
+    unzipped_size_budget: int = DEFAULT_UNZIPPED_SIZE_BUDGET
+
+
+DEFAULT_OPTIONS = BuildOptions()
+
+
+def requirements_cache_key(requirements_path: str) -> str:
+    """
+    Cache key of a pip install: the requirements plus the interpreter and platform they resolve for
+
+    :param requirements_path: path of the requirements file
+    :return: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(requirements_path, 'rb') as requirements:
+        digest.update(requirements.read())
+    digest.update(f"\0{sys.implementation.name}-{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    digest.update(f"\0{sys.platform}-{platform.machine()}".encode())
+    return digest.hexdigest()
+
+
+def install_requirements(requirements_path: str, target_dir: str, cache_dir: str = BUILD_CACHE_DIR) -> bool:
+    """
+    Install requirements into a directory, reusing an earlier install of the same requirements
+
+    :param requirements_path: path of the requirements file
+    :param target_dir: directory the packages are copied into
+    :param cache_dir: build cache directory
+    :return: True when the install came from the cache
+    """
+    pip_cache_dir = os.path.join(cache_dir, 'pip')
+    cached_dir = os.path.join(pip_cache_dir, requirements_cache_key(requirements_path))
+    hit = os.path.isdir(cached_dir)
+
+    if not hit:
+        os.makedirs(pip_cache_dir, exist_ok=True)
+        install_dir = tempfile.mkdtemp(dir=pip_cache_dir, prefix='.install-')
+        try:
+            LOGGER.info("Installing %s ...", requirements_path)
+            subprocess.run(
+                [sys.executable, '-m', 'pip', 'install', '--quiet', '--upgrade', '--target', install_dir, '-r', requirements_path],
+                check=True,
+            )
+            # Another build may have filled the same entry in the meantime; either copy is fine
+            try:
+                os.replace(install_dir, cached_dir)
+            except OSError:
+                shutil.rmtree(install_dir)
+        except BaseException:
+            shutil.rmtree(install_dir, ignore_errors=True)
+            raise
+    else:
+        LOGGER.info("Using cached install of %s", requirements_path)
+
+    shutil.copytree(cached_dir, target_dir, dirs_exist_ok=True)
+    return hit
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file's contents
+
+    :param path: file path
+    :return: hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_source_files(source_dir: str):
+    """
+    Files of a package directory in archive order, leaving out requirements files and bytecode caches
+
+    :param source_dir: package directory
+    :return: generator of (relative path with forward slashes, file path) tuples, sorted by relative path
+    """
+    found = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [directory for directory in dirs if directory not in SKIPPED_DIRECTORIES]
+        for current_file in files:
+            if current_file not in SKIPPED_FILES:
+                path = os.path.join(root, current_file)
+                found.append((os.path.relpath(path, source_dir).replace(os.sep, '/'), path))
+    return iter(sorted(found))
+
+
+def copy_sources(source_dir: str, destination_dir: str) -> int:
+    """
+    Copy the sources of a package, leaving out requirements files and bytecode caches
+
+    :param source_dir: package directory
+    :param destination_dir: staging directory
+    :return: number of files copied
+    """
+    copied = 0
+    for relative_path, src_file in iter_source_files(source_dir):
+        dst_file = os.path.join(destination_dir, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+
+        LOGGER.debug("Copying %s to %s", src_file, dst_file)
+        shutil.copy2(src_file, dst_file)
+        copied += 1
+
+    return copied
+
+
+def create_zip_from_directory(source_dir: str, zip_file: str) -> dict:
+    """
+    Create a reproducible ZIP file from a directory
+
+    Entries are sorted and carry a fixed timestamp and mode, so the same files always
+    produce the same bytes. Already-compressed files are stored as they are. The archive
+    is written next to its destination and moved into place, so a failed or concurrent
+    build never leaves a truncated archive behind.
+
+    :param source_dir: directory to archive
+    :param zip_file: path of the archive
+    :return: dictionary mapping archive entries to the SHA-256 of their contents
+    """
+    LOGGER.debug("Creating ZIP file %s from directory %s", zip_file, source_dir)
+    entries = {}
+    archive_names = []
+    for root, _, files in os.walk(source_dir):
+        for file in files:
+            file_path = os.path.join(root, file)
+            archive_names.append((os.path.relpath(file_path, source_dir).replace(os.sep, '/'), file_path))
+
+    partial_file = f"{zip_file}.{os.getpid()}.partial"
+    with zipfile.ZipFile(partial_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for archive_name, file_path in sorted(archive_names):
+            info = zipfile.ZipInfo(archive_name, date_time=FIXED_DATE_TIME)
+            info.create_system = 3
+            info.external_attr = (EXECUTABLE_MODE if os.access(file_path, os.X_OK) else FILE_MODE) << 16
+            extension = os.path.splitext(archive_name)[1].lower()
+            info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+            with open(file_path, 'rb') as source:
+                data = source.read()
+            archive.writestr(info, data)
+            entries[archive_name] = hashlib.sha256(data).hexdigest()
+    os.replace(partial_file, zip_file)
+    return entries
+
+
+def archive_path(target: PackageTarget, dist_dir: str = DIST_DIR) -> str:
+    """
+    Path of the archive of a package
+
+    :param target: package
+    :param dist_dir: directory the archives are written to
+    :return: archive path
+    """
+    return os.path.join(dist_dir, f"{target.name}.zip")
+
+
+def inputs_hash(target: PackageTarget, options: BuildOptions = DEFAULT_OPTIONS) -> str:
+    """
+    Hash of everything a package is built from
+
+    :param target: package
+    :param options: build options; the size budgets do not change the archive and are left out
+    :return: hex digest over the source files, the requirements cache key, the options and the layout version
+    """
+    digest = hashlib.sha256(f"{MANIFEST_VERSION}\0{target.kind}\0{target.name}\0".encode())
+    digest.update(f"{options.prune}\0{options.compile_bytecode}\0{options.runtime}\0".encode())
+    for relative_path, path in iter_source_files(target.source_dir):
+        digest.update(f"{relative_path}\0{file_sha256(path)}\0".encode())
+    if os.path.exists(target.requirements_path):
+        digest.update(f"requirements\0{requirements_cache_key(target.requirements_path)}".encode())
+    return digest.hexdigest()
+
+
+def manifest_path(zip_file: str) -> str:
+    """
+    Path of the build manifest kept next to an archive
+
+    :param zip_file: path of the archive
+    :return: manifest path
+    """
+    return f"{os.path.splitext(zip_file)[0]}.manifest.json"
+
+
+def read_manifest(zip_file: str) -> dict:
+    """
+    Read the build manifest of an archive
+
+    :param zip_file: path of the archive
+    :return: manifest dictionary, empty when there is none or it cannot be read
+    """
+    try:
+        with open(manifest_path(zip_file), encoding='utf-8') as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_up_to_date(zip_file: str, inputs: str) -> bool:
+    """
+    Whether an archive was built from the given inputs and has not been touched since
+
+    :param zip_file: path of the archive
+    :param inputs: inputs hash of the package
+    :return: bool
+    """
+    manifest = read_manifest(zip_file)
+    return (
+        manifest.get('version') == MANIFEST_VERSION
+        and manifest.get('inputs') == inputs
+        and os.path.exists(zip_file)
+        and file_sha256(zip_file) == manifest.get('archive')
+    )
+
+
+def write_manifest(zip_file: str, inputs: str, entries: dict):
+    """
+    Record what an archive was built from and what it contains
+
+    :param zip_file: path of the archive
+    :param inputs: inputs hash of the package
+    :param entries: archive entries and the SHA-256 of their contents
+    """
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'inputs': inputs,
+        'archive': file_sha256(zip_file),
+        'entries': entries,
+    }
+    partial_file = f"{manifest_path(zip_file)}.{os.getpid()}.partial"
+    with open(partial_file, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(partial_file, manifest_path(zip_file))
+
+
+def distribution_name(directory: str) -> str:
+    """
+    Normalized project name of a .dist-info or .egg-info directory
+
+    :param directory: directory name, e.g. 'boto3-1.35.0.dist-info'
+    :return: lower case name with dashes and dots as underscores, e.g. 'boto3'
+    """
+    return directory.split('-', 1)[0].lower().replace('.', '_')
+
+
+def prune_dependencies(install_dir: str, provided: frozenset = RUNTIME_PROVIDED_PACKAGES) -> int:
+    """
+    Remove what a deployment package does not need from installed dependencies
+
+    Removes packages the Lambda runtime already provides, test suites, scripts, bytecode
+    caches, type stubs and everything in .dist-info directories except METADATA.
+
+    :param install_dir: directory the requirements were installed into
+    :param provided: top-level package names provided by the runtime
+    :return: number of bytes removed
+    """
+    removed = 0
+
+    def remove(path: str, is_directory: bool):
+        nonlocal removed
+        if is_directory:
+            for root, _, files in os.walk(path):
+                removed += sum(os.path.getsize(os.path.join(root, file)) for file in files)
+            shutil.rmtree(path)
+        else:
+            removed += os.path.getsize(path)
+            os.remove(path)
+
+    for entry in list(os.scandir(install_dir)):
+        name = entry.name
+        if entry.is_dir() and (name.endswith('.dist-info') or name.endswith('.egg-info')):
+            if distribution_name(name) in provided:
+                remove(entry.path, True)
+        elif os.path.splitext(name)[0] in provided or (entry.is_dir() and name in PRUNED_TOP_LEVEL_DIRECTORIES):
+            remove(entry.path, entry.is_dir())
+
+    for root, dirs, files in os.walk(install_dir):
+        for directory in [directory for directory in dirs if directory in PRUNED_DIRECTORIES]:
+            remove(os.path.join(root, directory), True)
+            dirs.remove(directory)
+
+        in_dist_info = os.path.basename(root).endswith('.dist-info')
+        for file in files:
+            if (in_dist_info and file not in KEPT_DIST_INFO_FILES) or any(fnmatch.fnmatch(file, pattern) for pattern in PRUNED_FILE_PATTERNS):
+                remove(os.path.join(root, file), False)
+
+        if in_dist_info:
+            for directory in list(dirs):
+                remove(os.path.join(root, directory), True)
+                dirs.remove(directory)
+
+    return removed
+
+
+def compile_bytecode(directory: str, runtime: str = None):
+    """
+    Precompile every module so the runtime does not compile them on a cold start
+
+    The bytecode uses unchecked hashes, so it stays valid whatever timestamps the
+    files get when the archive is extracted, and the archive stays reproducible.
+
+    :param directory: staged package directory
+    :param runtime: Lambda runtime the bytecode is for, e.g. 'python3.12'
+    :raises ValueError: when the runtime does not match the interpreter running the build
+    """
+    build_runtime = f"python{sys.version_info[0]}.{sys.version_info[1]}"
+    if runtime is not None and runtime != build_runtime:
+        raise ValueError(f"Cannot compile bytecode for {runtime} with {build_runtime}")
+
+    if not compileall.compile_dir(directory, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH):
+        raise ValueError(f"Compiling the modules in {directory} failed")
+
+
+def package_sizes(zip_file: str) -> list:
+    """
+    Size contribution of each top-level package in an archive
+
+    Layer archives are grouped below their python/ directory.
+
+    :param zip_file: path of the archive
+    :return: list of (name, compressed bytes, uncompressed bytes) tuples, largest first
+    """
+    sizes = {}
+    with zipfile.ZipFile(zip_file) as archive:
+        for info in archive.infolist():
+            parts = info.filename.split('/')
+            if parts[0] == 'python' and len(parts) > 1:
+                parts = parts[1:]
+            name = parts[0] if len(parts) > 1 else info.filename
+            compressed, uncompressed = sizes.get(name, (0, 0))
+            sizes[name] = (compressed + info.compress_size, uncompressed + info.file_size)
+
+    return sorted(((name, *size) for name, size in sizes.items()), key=lambda item: (-item[1], item[0]))
+
+
+def check_size_budget(zip_file: str, options: BuildOptions = DEFAULT_OPTIONS):
+    """
+    Check an archive against the size budgets
+
+    :param zip_file: path of the archive
+    :param options: build options holding the budgets
+    :return: tuple of the zipped and unzipped size in bytes
+    :raises PackageSizeError: when a budget is exceeded
+    """
+    size = os.path.getsize(zip_file)
+    with zipfile.ZipFile(zip_file) as archive:
+        unzipped_size = sum(info.file_size for info in archive.infolist())
+
+    if options.size_budget and size > options.size_budget:
+        raise PackageSizeError(f"{zip_file} is {size} bytes, over the budget of {options.size_budget} bytes")
+    if options.unzipped_size_budget and unzipped_size > options.unzipped_size_budget:
+        raise PackageSizeError(
+            f"{zip_file} is {unzipped_size} bytes unzipped, over the budget of {options.unzipped_size_budget} bytes"
+        )
+    return size, unzipped_size
+
+
+def stage_package(target: PackageTarget, staging_dir: str, cache_dir: str = BUILD_CACHE_DIR,
+                  options: BuildOptions = DEFAULT_OPTIONS):
+    """
+    Lay out the files of a package the way Lambda expects them
+
+    A lambda is copied to the root of the archive. A layer is copied to python/<name>
+    because Lambda adds /opt/python to sys.path, so the layer is importable by its name.
+    Requirements are installed next to the code and pruned before the code is copied.
+
+    :param target: package to stage
+    :param staging_dir: empty staging directory
+    :param cache_dir: build cache directory
+    :param options: build options
+    """
+    if target.kind == 'layer':
+        install_dir = os.path.join(staging_dir, 'python')
+        code_dir = os.path.join(install_dir, target.name)
+    else:
+        install_dir = code_dir = staging_dir
+
+    if os.path.exists(target.requirements_path):
+        install_requirements(target.requirements_path, install_dir, cache_dir)
+        if options.prune:
+            removed = prune_dependencies(install_dir)
+            LOGGER.info("Pruned %.1f KB from the dependencies of %s", removed / 1024, target.name)
+
+    copy_sources(target.source_dir, code_dir)
+
+    if options.compile_bytecode:
+        compile_bytecode(staging_dir, options.runtime)
+
+
+def build_package(target: PackageTarget, dist_dir: str = DIST_DIR, cache_dir: str = BUILD_CACHE_DIR,
+                  force: bool = False, options: BuildOptions = DEFAULT_OPTIONS) -> str:
+    """
+    Build the ZIP archive of a package unless its manifest shows it is up to date
+
+    :param target: package to build
+    :param dist_dir: directory the archive is written to
+    :param cache_dir: build cache directory
+    :param force: rebuild even when the package is up to date
+    :param options: build options
+    :return: path of the archive
+    :raises PackageSizeError: when the archive exceeds a size budget
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+    zip_file = archive_path(target, dist_dir)
+
+    inputs = inputs_hash(target, options)
+    if not force and is_up_to_date(zip_file, inputs):
+        LOGGER.info("%s %s is up to date", target.kind.capitalize(), target.name)
+        check_size_budget(zip_file, options)
+        return zip_file
+
+    with tempfile.TemporaryDirectory() as staging_dir:
+        stage_package(target, staging_dir, cache_dir, options)
+        entries = create_zip_from_directory(staging_dir, zip_file)
+    write_manifest(zip_file, inputs, entries)
+
+    size, unzipped_size = check_size_budget(zip_file, options)
+    LOGGER.info("Packaged %s %s as %s (%.1f KB, %.1f KB unzipped)",
+                target.kind, target.name, zip_file, size / 1024, unzipped_size / 1024)
+    return zip_file
+
+
+def build_order(dependencies: dict) -> list:
+    """
+    Group packages into generations that only depend on packages of earlier generations
+
+    :param dependencies: packages mapped to the packages they depend on; other dependencies are ignored
+    :return: list of generations, each a list of packages sorted by kind and name
+    :raises ValueError: when the dependencies form a cycle
+    """
+    remaining = {target: set(requires) & dependencies.keys() for target, requires in dependencies.items()}
+    generations = []
+    while remaining:
+        ready = sorted(target for target, requires in remaining.items() if not requires)
+        if not ready:
+            raise ValueError(f"Dependency cycle between {', '.join(sorted(target.name for target in remaining))}")
+        for target in ready:
+            del remaining[target]
+        for requires in remaining.values():
+            requires.difference_update(ready)
+        generations.append(ready)
+    return generations
+
+
+def build_package_graph(dependencies: dict, jobs: int = None, dist_dir: str = DIST_DIR,
+                        cache_dir: str = BUILD_CACHE_DIR, force: bool = False,
+                        options: BuildOptions = DEFAULT_OPTIONS) -> dict:
+    """
+    Build the packages whose inputs changed, each after the packages it depends on
+
+    Unchanged packages are settled here from their manifests, so a build without changes
+    never starts a process. The others are built in parallel processes as soon as their
+    dependencies are built; after a failure nothing new is started and the first error is raised.
+
+    :param dependencies: packages mapped to the packages they depend on
+    :param jobs: number of processes, defaults to the number of CPUs
+    :param dist_dir: directory the archives are written to
+    :param cache_dir: build cache directory
+    :param force: rebuild packages that are up to date
+    :param options: build options
+    :return: packages mapped to their archive paths
+    :raises PackageSizeError: when an archive exceeds a size budget
+    :raises ValueError: when the dependencies form a cycle
+    """
+    zip_files = {}
+    stale = {}
+    for target, requires in dependencies.items():
+        zip_file = archive_path(target, dist_dir)
+        if not force and is_up_to_date(zip_file, inputs_hash(target, options)):
+            LOGGER.info("%s %s is up to date", target.kind.capitalize(), target.name)
+            check_size_budget(zip_file, options)
+            zip_files[target] = zip_file
+        else:
+            stale[target] = requires
+
+    generations = build_order(stale)
+    if jobs == 1 or len(stale) <= 1:
+        for generation in generations:
+            for target in generation:
+                zip_files[target] = build_package(target, dist_dir, cache_dir, True, options)
+        return zip_files
+
+    # Submitted in build order so that ties go to the earlier generation
+    waiting = [target for generation in generations for target in generation]
+    remaining = {target: set(stale[target]) & stale.keys() for target in waiting}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while waiting or running:
+            for target in [target for target in waiting if not remaining[target]]:
+                waiting.remove(target)
+                running[executor.submit(build_package, target, dist_dir, cache_dir, True, options)] = target
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                target = running.pop(future)
+                if future.exception() is not None:
+                    wait(running)
+                    raise future.exception()
+                zip_files[target] = future.result()
+                for requires in remaining.values():
+                    requires.discard(target)
+
+    return zip_files
@@ -2,27 +2,200 @@
 """
 This module contains the DirectoryScanner class
 """
+import fnmatch
+import json
 import os
+from typing import NamedTuple
 
 from utils.observer import Observable
 from utils.lambda_observer import LambdaObserver
 from utils.layer_observer import LayerObserver
 
+# Directory names that are never descended into
+DEFAULT_IGNORE_PATTERNS = (
+    '.git', 'node_modules', '__pycache__', 'dist', '.build_cache', '.venv', 'venv', '.tox', '.nox', 'build', '*.egg-info',
+)
+
+SCAN_CACHE_VERSION = 1
+
+
+class CachedEntry(NamedTuple):
+    """
+    Directory entry restored from the scan cache, answering like an os.DirEntry
+    """
+    name: str
+    path: str
+    directory: bool
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:  # pylint: disable=unused-argument
+        """
+        Whether the entry is a directory
+        """
+        return self.directory
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:  # pylint: disable=unused-argument
+        """
+        Whether the entry is a file
+        """
+        return not self.directory
+
+
+class DirectoryEvent(NamedTuple):
+    """
+    A scanned directory
+
+    Observers may remove names from dirnames to keep the scanner out of those directories.
+    """
+    dirpath: str
+    dirnames: list
+    filenames: list
+    entries: tuple = ()
+
+
 class DirectoryScanner(Observable):
     """
     Directory scanner class
     """
-    def scan(self, root_directory):
+    def __init__(self, ignore_patterns=DEFAULT_IGNORE_PATTERNS, cache_file: str = None, max_workers: int = None):
+        """
+        Initialize the scanner
+
+        :param ignore_patterns: fnmatch patterns of directory names that are not descended into
+        :param cache_file: JSON file keeping directory listings between scans, keyed by directory mtime
+        :param max_workers: threads used to update slow observers
+        """
+        super().__init__(max_workers)
+        self.ignore_patterns = tuple(ignore_patterns)
+        self.cache_file = cache_file
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = {}
+
+    def is_ignored(self, name: str) -> bool:
+        """
+        Whether a directory name matches an ignore pattern
+
+        :param name: directory name
+        :return: bool
+        """
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignore_patterns)
+
+    def _load_cache(self):
+        """
+        Read the scan cache, starting empty when it is missing, unreadable or from another version
+        """
+        self._cache = {}
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == SCAN_CACHE_VERSION:
+            self._cache = data.get('directories', {})
+
+    def _save_cache(self, directories: dict):
+        """
+        Write the listings of this scan to the scan cache
+
+        :param directories: listings keyed by directory path
+        """
+        if self.cache_file is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        partial_file = f"{self.cache_file}.{os.getpid()}.partial"
+        with open(partial_file, 'w', encoding='utf-8') as file:
+            json.dump({'version': SCAN_CACHE_VERSION, 'directories': directories}, file, separators=(',', ':'))
+        os.replace(partial_file, self.cache_file)
+
+    def list_directory(self, dirpath: str, directories: dict) -> tuple:
+        """
+        List a directory, reusing the cached listing when the directory's mtime is unchanged
+
+        The mtime of a directory changes when entries are added, removed or renamed in it,
+        which is all a listing depends on.
+
+        :param dirpath: directory path
+        :param directories: listings collected during this scan, updated in place
+        :return: tuple of entries, sorted by name
+        """
+        try:
+            mtime_ns = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return ()
+
+        cached = self._cache.get(dirpath)
+        if cached is not None and cached['mtime_ns'] == mtime_ns:
+            self.cache_hits += 1
+            directories[dirpath] = cached
+            return tuple(
+                CachedEntry(name, os.path.join(dirpath, name), directory)
+                for name, directory in cached['entries']
+            )
+
+        self.cache_misses += 1
+        try:
+            with os.scandir(dirpath) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            return ()
+
+        directories[dirpath] = {
+            'mtime_ns': mtime_ns,
+            'entries': [(entry.name, entry.is_dir()) for entry in entries],
+        }
+        return tuple(entries)
+
+    def scan(self, root_directory, batch: bool = False):
         """
         Scan the directory
 
-        It notifies all observers with a tuple containing the directory path, directory names, and filenames
+        Every directory is listed once with os.scandir (or taken from the scan cache) and
+        observers are notified top-down with a DirectoryEvent holding the directory path,
+        directory names, filenames and the entries themselves. Ignored directories are
+        pruned before they are descended into.
+
+        In batch mode observers get every event in a single update_many call after the
+        walk, so they can no longer prune it. The scan returns once slow observers are done.
 
-        :param root_directory:
+        :param root_directory: directory to scan, or a list of directories scanned in order
+        :param batch: notify observers once with all events
         :return:
         """
-        for dirpath, dirnames, filenames in os.walk(root_directory):
-            self.notify_observers((dirpath, dirnames, filenames))
+        self._load_cache()
+        self.cache_hits = self.cache_misses = 0
+        directories = {}
+        events = []
+
+        roots = [root_directory] if isinstance(root_directory, str) else list(root_directory)
+        stack = list(reversed(roots))
+        while stack:
+            dirpath = stack.pop()
+            entries = self.list_directory(dirpath, directories)
+
+            dirnames = []
+            filenames = []
+            for entry in entries:
+                if entry.is_dir():
+                    if not self.is_ignored(entry.name):
+                        dirnames.append(entry.name)
+                else:
+                    filenames.append(entry.name)
+
+            event = DirectoryEvent(dirpath, dirnames, filenames, entries)
+            if batch:
+                events.append(event)
+            else:
+                self.notify_observers(event)
+
+            # Reversed so directories are visited in name order
+            stack.extend(os.path.join(dirpath, name) for name in reversed(event.dirnames))
+
+        if batch:
+            self.notify_many(events)
+        self.wait_for_observers()
+        self._save_cache(directories)
 
 if __name__ == "__main__":
     scanner = DirectoryScanner()
@@ -0,0 +1,249 @@
+# utils/step_function.py
+"""
+This module generates and validates the Step Functions definition that fans out the scoreboard fetches
+"""
+import itertools
+import json
+from typing import NamedTuple
+
+DEFAULT_CONFIG_FILE = 'step_functions/config.json'
+DEFAULT_DEFINITION_FILE = 'step_functions/step_function.json'
+
+GENDERS = ('male', 'female')
+DIVISIONS = ('d1', 'd2', 'd3')
+
+# Targets a single FetchNCAAMatches invocation accepts, see MAX_TARGETS in its handler
+MAX_TARGETS_PER_ITERATION = 64
+
+# Errors Lambda raises for transient service problems and throttled invocations
+RETRIED_LAMBDA_ERRORS = [
+    'Lambda.ServiceException',
+    'Lambda.AWSLambdaException',
+    'Lambda.SdkClientException',
+    'Lambda.TooManyRequestsException',
+]
+
+TERMINAL_TYPES = {'Succeed', 'Fail'}
+
+
+class StepFunctionConfig(NamedTuple):
+    """
+    What the state machine fetches and how wide it fans out
+
+    day_offsets count days back from the date the execution started, so 0 is today and
+    1 is yesterday. Every Map iteration invokes FetchNCAAMatches once with up to
+    targets_per_iteration targets, which it fetches with fetch_concurrency requests in
+    flight; at most max_concurrency iterations run at the same time. With use_planner
+    the invocations skip targets their FetchPlanner knows to be empty or out of season.
+    """
+    format_dates_arn: str
+    fetch_matches_arn: str
+    genders: tuple = GENDERS
+    divisions: tuple = ('d1', 'd2')
+    day_offsets: tuple = (0, 1)
+    targets_per_iteration: int = 4
+    max_concurrency: int = 2
+    fetch_concurrency: int = 4
+    use_planner: bool = True
+    comment: str = "Fetch the NCAA scoreboards of every gender, division and day"
+
+
+def load_config(config_file: str = DEFAULT_CONFIG_FILE) -> StepFunctionConfig:
+    """
+    Read the generator configuration
+
+    :param config_file: JSON file with the fields of StepFunctionConfig
+    :return: StepFunctionConfig
+    :raises ValueError: when the file has unknown fields
+    """
+    with open(config_file, encoding='utf-8') as file:
+        values = json.load(file)
+
+    unknown = sorted(set(values) - set(StepFunctionConfig._fields))
+    if unknown:
+        raise ValueError(f"Unknown fields in {config_file}: {', '.join(unknown)}")
+
+    return StepFunctionConfig(**{
+        name: tuple(value) if isinstance(value, list) else value for name, value in values.items()
+    })
+
+
+def plan_batches(config: StepFunctionConfig) -> list:
+    """
+    Split every gender, division and day offset combination into the Map items
+
+    Targets are ordered by day first, so the scoreboards of today are fetched first.
+
+    :param config: StepFunctionConfig
+    :return: list of {'targets': [{'gender', 'division', 'day_offset'}, ...]} items
+    """
+    targets = [
+        {'gender': gender, 'division': division, 'day_offset': day_offset}
+        for day_offset, gender, division in itertools.product(config.day_offsets, config.genders, config.divisions)
+    ]
+    size = max(config.targets_per_iteration, 1)
+    return [{'targets': targets[start:start + size]} for start in range(0, len(targets), size)]
+
+
+def generate_definition(config: StepFunctionConfig) -> dict:
+    """
+    Build the state machine definition
+
+    GetDates resolves the date the execution started, PlanTargets holds the batches of
+    targets and FetchMatches is a Map state invoking FetchNCAAMatches once per batch.
+
+    :param config: StepFunctionConfig
+    :return: Amazon States Language definition
+    """
+    retry = [{
+        'ErrorEquals': RETRIED_LAMBDA_ERRORS,
+        'IntervalSeconds': 2,
+        'MaxAttempts': 3,
+        'BackoffRate': 2.0,
+    }]
+
+    return {
+        'Comment': config.comment,
+        'StartAt': 'GetDates',
+        'States': {
+            'GetDates': {
+                'Type': 'Task',
+                'Resource': config.format_dates_arn,
+                'Parameters': {'State': {'EnteredTime.$': '$$.State.EnteredTime'}},
+                'ResultPath': '$.dates',
+                'Retry': retry,
+                'Next': 'PlanTargets',
+            },
+            'PlanTargets': {
+                'Type': 'Pass',
+                'Result': plan_batches(config),
+                'ResultPath': '$.batches',
+                'Next': 'FetchMatches',
+            },
+            'FetchMatches': {
+                'Type': 'Map',
+                'ItemsPath': '$.batches',
+                'MaxConcurrency': config.max_concurrency,
+                'ItemSelector': {
+                    'reference_date.$': '$.dates.today',
+                    'targets.$': '$$.Map.Item.Value.targets',
+                    'max_concurrency': config.fetch_concurrency,
+                    'use_planner': config.use_planner,
+                },
+                'ItemProcessor': {
+                    'ProcessorConfig': {'Mode': 'INLINE'},
+                    'StartAt': 'FetchNCAAMatches',
+                    'States': {
+                        'FetchNCAAMatches': {
+                            'Type': 'Task',
+                            'Resource': config.fetch_matches_arn,
+                            'Retry': retry,
+                            'End': True,
+                        },
+                    },
+                },
+                'End': True,
+            },
+        },
+    }
+
+
+def _check_states(states: dict, start_at: str, scope: str) -> list:
+    """
+    Check that the states of a state machine or Map processor link up
+
+    :param states: states by name
+    :param start_at: name of the first state
+    :param scope: where the states are, used in the messages
+    :return: list of problems
+    """
+    problems = []
+    if start_at not in states:
+        problems.append(f"{scope}: StartAt '{start_at}' is not a state")
+
+    reachable = set()
+    pending = [start_at]
+    while pending:
+        name = pending.pop()
+        if name in reachable or name not in states:
+            continue
+        reachable.add(name)
+        state = states[name]
+        if 'Next' in state:
+            pending.append(state['Next'])
+        pending.extend(choice.get('Next') for choice in state.get('Choices', ()))
+        if 'Default' in state:
+            pending.append(state['Default'])
+
+    for name, state in states.items():
+        state_type = state.get('Type')
+        if 'Next' in state and state['Next'] not in states:
+            problems.append(f"{scope}: {name} goes to missing state '{state['Next']}'")
+        if state_type not in TERMINAL_TYPES and state_type != 'Choice' and ('Next' in state) == bool(state.get('End')):
+            problems.append(f"{scope}: {name} must have either Next or End")
+        if name not in reachable:
+            problems.append(f"{scope}: {name} is unreachable")
+        if state_type == 'Task' and not str(state.get('Resource', '')).startswith('arn:aws:'):
+            problems.append(f"{scope}: {name} has no Resource ARN")
+
+    if not any(state.get('End') or state.get('Type') in TERMINAL_TYPES for state in states.values()):
+        problems.append(f"{scope}: no state ends the execution")
+    return problems
+
+
+def validate_definition(definition: dict, config: StepFunctionConfig = None) -> list:
+    """
+    Check a generated definition
+
+    Besides the wiring of the states, every Map state needs a processor and a bounded
+    MaxConcurrency, and with a config the batches must cover every target exactly once
+    within the limit of one invocation.
+
+    :param definition: Amazon States Language definition
+    :param config: StepFunctionConfig the definition was generated from
+    :return: list of problems, empty when the definition is valid
+    """
+    states = definition.get('States', {})
+    problems = _check_states(states, definition.get('StartAt'), 'StateMachine')
+
+    for name, state in states.items():
+        if state.get('Type') != 'Map':
+            continue
+        processor = state.get('ItemProcessor', {})
+        problems.extend(_check_states(processor.get('States', {}), processor.get('StartAt'), name))
+        max_concurrency = state.get('MaxConcurrency')
+        if not isinstance(max_concurrency, int) or max_concurrency < 1:
+            problems.append(f"{name}: MaxConcurrency must be a positive integer, got {max_concurrency!r}")
+
+    if config is not None:
+        for field in ('max_concurrency', 'fetch_concurrency', 'targets_per_iteration'):
+            if getattr(config, field) < 1:
+                problems.append(f"config: {field} must be at least 1")
+        for field, allowed in (('genders', GENDERS), ('divisions', DIVISIONS)):
+            invalid = sorted(set(getattr(config, field)) - set(allowed))
+            if invalid:
+                problems.append(f"config: invalid {field} {', '.join(invalid)}")
+        if any(not isinstance(offset, int) or offset < 0 for offset in config.day_offsets):
+            problems.append("config: day_offsets must be integers of zero or more")
+
+        batches = states.get('PlanTargets', {}).get('Result', [])
+        targets = [
+            (target['gender'], target['division'], target['day_offset']) for batch in batches for target in batch['targets']
+        ]
+        expected = set(itertools.product(config.genders, config.divisions, config.day_offsets))
+        if len(targets) != len(set(targets)) or set(targets) != expected:
+            problems.append("PlanTargets: the batches do not cover every target exactly once")
+        if any(len(batch['targets']) > MAX_TARGETS_PER_ITERATION for batch in batches):
+            problems.append(f"PlanTargets: a batch has more than {MAX_TARGETS_PER_ITERATION} targets")
+
+    return problems
+
+
+def render_definition(definition: dict) -> str:
+    """
+    Serialize a definition the way it is stored in the repository
+
+    :param definition: Amazon States Language definition
+    :return: JSON text ending with a newline
+    """
+    return json.dumps(definition, indent=2) + '\n'